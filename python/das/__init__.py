@@ -1,14 +1,28 @@
 import os
 import re
 import sys
+import glob
+import gc
+import errno
+import binascii
 import datetime
+import threading
+from copy import deepcopy as _deepcopy
+try:
+   import cPickle as pickle
+except ImportError:
+   import pickle
 
-__version__ = "0.13.1"
+__version__ = "0.14.0"
 __verbose__ = False
 try:
    __verbose__ = (int(os.environ.get("DAS_VERBOSE", "0")) != 0)
 except:
    pass
+# Engine used to parse das files content: "literal" (default) or "eval"
+__parse_engine__ = os.environ.get("DAS_PARSE_ENGINE", "literal")
+# Directory where evaluated schema files are cached (disabled when empty)
+__schema_cache__ = os.environ.get("DAS_SCHEMA_CACHE", "")
 
 from .types import (ReservedNameError,
                     VersionError,
@@ -18,9 +32,11 @@ from .types import (ReservedNameError,
                     Set,
                     Dict,
                     Struct,
-                    GlobalValidationDisabled)
+                    GlobalValidationDisabled,
+                    Batch)
 from .schematypes import (TypeValidator,
-                          ValidationError)
+                          ValidationError,
+                          ValidationContext)
 from .validation import (UnknownSchemaError,
                          SchemaVersionError,
                          Schema,
@@ -32,6 +48,11 @@ from .mixin import (SchemaTypeError,
                     bind,
                     has_bound_mixins,
                     get_bound_mixins)
+from .mixin import reset_bind_cache as _reset_bind_cache
+from .parser import ParseError
+from . import parser
+from . import serializer
+from . import binary
 from . import schema
 from . import schematypes
 from . import types
@@ -44,6 +65,10 @@ def load_schemas(paths=None, force=False):
    SchemaTypesRegistry.instance.load_schemas(paths=paths, force=force)
 
 
+def watch_schemas(env=True, interval=None):
+   SchemaTypesRegistry.instance.watch(env=env, interval=interval)
+
+
 def list_schemas():
    return SchemaTypesRegistry.instance.list_schemas()
 
@@ -173,9 +198,10 @@ def register_mixins(*mixins, **kwargs):
 
       if changed:
          if stn:
-            SchemaTypesRegistry.instance.set_schema_type_property(stn, "mixins", mixins)
+            SchemaTypesRegistry.instance.set_schema_type_property(stn, "mixins", _mixins)
          else:
             schema_type.set_property("mixins", _mixins)
+         _reset_bind_cache()
 
    else:
       tmp = {}
@@ -196,6 +222,7 @@ def register_mixins(*mixins, **kwargs):
                changed = True
          if changed:
             SchemaTypesRegistry.instance.set_schema_type_property(k, "mixins", mixins)
+            _reset_bind_cache()
 
 
 def get_registered_mixins(name):
@@ -258,13 +285,17 @@ def conform(value, schema_type, fill=False):
    return schema_type.conform(value, fill=fill)
 
 
-def validate(d, schema_type):
+def batch(data):
+   return Batch(data)
+
+
+def validate(d, schema_type, context=None):
    if not isinstance(schema_type, (basestring, TypeValidator)):
       raise Exception("Expected a string or a das.schematypes.TypeValidator instance as second argument")
    if isinstance(schema_type, TypeValidator):
-      return schema_type.validate(d)
+      return schema_type.validate(d, context=context)
    else:
-      return get_schema_type(schema_type).validate(d)
+      return get_schema_type(schema_type).validate(d, context=context)
 
 
 def check(d, schema_type):
@@ -293,27 +324,37 @@ def is_compatible(d, schema_type):
       return False
 
 
+_MetaLine = re.compile(r"^\s*([^:]+):\s*(.*)\s*$")
+
+
+def _read_header(f):
+   # Read '# key: value' lines at the top of the file
+   #   Returns metadata dictionary and first content line (empty string if none)
+   md = {}
+   readline = f.readline
+   while True:
+      l = readline()
+      sl = l.strip()
+      if not sl.startswith("#"):
+         return md, l
+      m = _MetaLine.match(sl[1:])
+      if m is not None:
+         md[m.group(1)] = m.group(2)
+
+
 def _read_file(path, skip_content=False):
-   mde = re.compile(r"^\s*([^:]+):\s*(.*)\s*$")
-   reading_content = False
-   content = ""
    md = {}
+   content = ""
    if os.path.isfile(path):
       with open(path, "rb") as f:
-         for l in f.readlines():
-            sl = l.strip()
-            if sl.startswith("#"):
-               if not reading_content:
-                  m = mde.match(sl[1:])
-                  if m is not None:
-                     md[m.group(1)] = m.group(2)
-            else:
-               reading_content = True
-               if skip_content:
-                  break
-               else:
-                  # Convert line endings to LF on the fly
-                  content += l.rstrip() + "\n"
+         md, line = _read_header(f)
+         if not skip_content and line:
+            # Read content in a single call, starting from first non-header line
+            f.seek(-len(line), os.SEEK_CUR)
+            content = f.read()
+   if "\r" in content:
+      # Convert line endings to LF
+      content = content.replace("\r\n", "\n")
    return md, content
 
 
@@ -321,6 +362,93 @@ def read_meta(path):
    return _read_file(path, skip_content=True)[0]
 
 
+# path -> ((mtime, size), metadata)
+_MetaCache = {}
+_MetaCacheLock = threading.Lock()
+
+
+def _expand_paths(paths_or_globs):
+   if isinstance(paths_or_globs, basestring):
+      paths_or_globs = [paths_or_globs]
+   seen = set()
+   for item in paths_or_globs:
+      if glob.has_magic(item):
+         paths = sorted(glob.glob(item))
+      else:
+         paths = [item]
+      for path in paths:
+         if path in seen or not os.path.isfile(path):
+            continue
+         seen.add(path)
+         yield path
+
+
+def _cached_meta(path):
+   # Returns (path, metadata) if path is missing or its cached metadata is up to date, None otherwise
+   try:
+      st = os.stat(path)
+   except OSError:
+      return path, {}
+   with _MetaCacheLock:
+      ent = _MetaCache.get(os.path.abspath(path), None)
+   if ent is not None and ent[0] == (st.st_mtime, st.st_size):
+      return path, ent[1].copy()
+   return None
+
+
+def _scan_meta(path, use_cache):
+   try:
+      st = os.stat(path)
+   except OSError:
+      return path, {}
+   key = (st.st_mtime, st.st_size)
+   apath = os.path.abspath(path)
+   if use_cache:
+      with _MetaCacheLock:
+         ent = _MetaCache.get(apath, None)
+      if ent is not None and ent[0] == key:
+         return path, ent[1].copy()
+   md = read_meta(path)
+   with _MetaCacheLock:
+      _MetaCache[apath] = (key, md)
+   return path, md.copy()
+
+
+def scan_meta(paths_or_globs, workers=1, cache=True):
+   # Read header of all files matching input paths or glob patterns
+   #   Yields (path, metadata) tuples as they are read (order is not preserved when workers > 1)
+   #   Results are cached by file modification time and size
+   #   Headers are small: a thread pool (workers > 1) only pays off when file access is slow (network drives)
+   paths = _expand_paths(paths_or_globs)
+   if workers is None or workers <= 1:
+      for path in paths:
+         yield _scan_meta(path, cache)
+   else:
+      # Cached files are yielded first, only the others are queued to the pool
+      pending = []
+      for path in paths:
+         rv = (_cached_meta(path) if cache else None)
+         if rv is None:
+            pending.append(path)
+         else:
+            yield rv
+      if not pending:
+         return
+      from multiprocessing.pool import ThreadPool
+      pool = ThreadPool(workers)
+      try:
+         for rv in pool.imap_unordered(lambda x: _scan_meta(x, False), pending, chunksize=16):
+            yield rv
+      finally:
+         pool.terminate()
+         pool.join()
+
+
+def clear_meta_cache():
+   with _MetaCacheLock:
+      _MetaCache.clear()
+
+
 def ascii_or_unicode(s, encoding=None):
    if isinstance(s, str):
       try:
@@ -369,46 +497,61 @@ def decode(d, encoding):
       return d
 
 
-def read_string(s, schema_type=None, encoding=None, strict_schema=True, **funcs):
-   if schema_type is not None:
-      if isinstance(schema_type, basestring):
-         schname = schema_type
-         sch = get_schema_type(schema_type)
-      elif isinstance(schema_type, TypeValidator):
-         schname = get_schema_type_name(schema_type)
-         sch = schema_type
-      else:
-         print_once("[das] 'schema_type' must either be a string or a das.schematypes.TypeValidator instance")
-         sch = None
-      if sch is not None:
-         mod = get_schema_module(schname)
-         if mod is not None and hasattr(mod, "__all__"):
-            for item in mod.__all__:
-               funcs[item] = getattr(mod, item)
-      else:
-         mod = None
+def _get_read_schema_type(schema_type, funcs):
+   # Resolve schema type to validate read data against, adding schema module exported names to funcs
+   if schema_type is None:
+      return None
+   if isinstance(schema_type, basestring):
+      schname = schema_type
+      sch = get_schema_type(schema_type)
+   elif isinstance(schema_type, TypeValidator):
+      schname = get_schema_type_name(schema_type)
+      sch = schema_type
    else:
-      sch, mod = None, None
+      print_once("[das] 'schema_type' must either be a string or a das.schematypes.TypeValidator instance")
+      sch = None
+   if sch is not None:
+      mod = get_schema_module(schname)
+      if mod is not None and hasattr(mod, "__all__"):
+         for item in mod.__all__:
+            funcs[item] = getattr(mod, item)
+   return sch
+
+
+def _validate_read(rv, sch, strict_schema, lazy=False):
+   return sch.validate(rv, context=ValidationContext(compatible=(not strict_schema), lazy=lazy))
+
+
+def read_string(s, schema_type=None, encoding=None, strict_schema=True, engine=None, lazy=False, **funcs):
+   sch = _get_read_schema_type(schema_type, funcs)
 
    if not encoding:
       if __verbose__:
          print_once("[das] Warning: das.read assumes system default encoding for unicode characters unless explicitely set.")
-   else:
-      s = ("# encoding: %s\n" % encoding) + s
 
-   rv = eval(s, globals(), funcs)
+   if engine is None:
+      engine = __parse_engine__
 
-   if encoding:
-      rv = decode(rv, encoding)
+   if engine == "literal":
+      if encoding:
+         # Strings are decoded while parsing, schema types get already decoded arguments
+         decoded_calls = set(f for f in funcs.itervalues() if isinstance(f, type) and issubclass(f, TypeValidator))
+         rv = parser.parse(s, names=funcs, encoding=encoding, decode=lambda x: decode(x, encoding), decoded_calls=decoded_calls)
+      else:
+         rv = parser.parse(s, names=funcs)
+   elif engine == "eval":
+      if encoding:
+         s = ("# encoding: %s\n" % encoding) + s
+      rv = eval(s, globals(), funcs)
+      if encoding:
+         rv = decode(rv, encoding)
+   else:
+      raise Exception("Unsupported parse engine '%s'" % engine)
 
    if sch is None:
       return rv
    else:
-      try:
-         schematypes.Struct.CompatibilityMode = (True if not strict_schema else False)
-         return sch.validate(rv)
-      finally:
-         schematypes.Struct.CompatibilityMode = False
+      return _validate_read(rv, sch, strict_schema, lazy=lazy)
 
 
 # returns: -2 if version check could not be performed
@@ -430,16 +573,16 @@ def is_version_compatible(reqver, curver):
       return -2
 
 
-def read(path, schema_type=None, ignore_meta=False, strict_schema=None, **funcs):
-   # Read header data
-   md, src = _read_file(path)  
-
+def _check_meta(md, path, schema_type=None, ignore_meta=False, strict_schema=None):
+   # Check library and schema versions found in file header
+   #   Returns schema type, encoding, strict_schema flag and whether data was saved with the current schema version
    libver = md.get("version", None)
    if libver:
       compat = is_version_compatible(libver, __version__)
       if compat <= 0:
          raise VersionError("Library", current_version=__version__, required_version=libver)
 
+   same_version = False
    schema_version = None
    if schema_type is None and not ignore_meta:
       schema_type = md.get("schema_type", None)
@@ -469,6 +612,9 @@ def read(path, schema_type=None, ignore_meta=False, strict_schema=None, **funcs)
                      print_once("[das] Warning: '%s' data was saved using a newer version of the schema, you may loose information in the process" % schema_type)
                   if strict_schema is None:
                      strict_schema = False
+               same_version = (schema_version == schema.version)
+         else:
+            same_version = (schema.version is None)
 
    encoding = md.get("encoding", None)
    if encoding is None:
@@ -478,7 +624,193 @@ def read(path, schema_type=None, ignore_meta=False, strict_schema=None, **funcs)
    if strict_schema is None:
       strict_schema = True
 
-   return read_string(src, schema_type=schema_type, encoding=encoding, strict_schema=strict_schema, **funcs)
+   return schema_type, encoding, strict_schema, same_version
+
+
+def read(path, schema_type=None, ignore_meta=False, strict_schema=None, engine=None, lazy=False, **funcs):
+   # With 'lazy' set, structs fields are validated and wrapped when first accessed
+   #   (calling _validate on returned value or das.write forces validation of the whole data)
+   # Read header data
+   md, src = _read_file(path)  
+
+   schema_type, encoding, strict_schema, _ = _check_meta(md, path, schema_type=schema_type, ignore_meta=ignore_meta, strict_schema=strict_schema)
+
+   return read_string(src, schema_type=schema_type, encoding=encoding, strict_schema=strict_schema, engine=engine, lazy=lazy, **funcs)
+
+
+def read_binary(path, schema_type=None, ignore_meta=False, strict_schema=None, validate=True, lazy=False, **funcs):
+   # Read a file written using das.write_binary
+   #   When 'validate' is False and data was saved using the current version of the requested
+   #   schema type, das types are rebuilt directly from the decoded values
+   with open(path, "rb") as f:
+      md, line = _read_header(f)
+      if line != binary.Magic:
+         raise ParseError("'%s' is not a binary das file" % path.replace("\\", "/"))
+      src = f.read()
+
+   schema_type, encoding, strict_schema, same_version = _check_meta(md, path, schema_type=schema_type, ignore_meta=ignore_meta, strict_schema=strict_schema)
+
+   if same_version:
+      # Data was validated using the file's schema type only
+      stn = (get_schema_type_name(schema_type) if isinstance(schema_type, TypeValidator) else schema_type)
+      same_version = (stn == md.get("schema_type", None))
+
+   sch = _get_read_schema_type(schema_type, funcs)
+
+   # Disable garbage collection while creating lots of objects
+   gcenabled = gc.isenabled()
+   gc.disable()
+   try:
+      rv = binary.loads(src, names=funcs, encoding=encoding)
+      if sch is None:
+         return rv
+      elif not validate and same_version and strict_schema:
+         return binary.build(rv, sch)
+      else:
+         return _validate_read(rv, sch, strict_schema, lazy=lazy)
+   finally:
+      if gcenabled:
+         gc.enable()
+
+
+def _plain(d):
+   # Copy of das data using builtin containers only
+   if type(d) in _Immutables:
+      return d
+   elif isinstance(d, Struct):
+      return dict((k, _plain(v)) for k, v in d._dict.iteritems())
+   elif isinstance(d, dict):
+      return dict((k, _plain(v)) for k, v in d.iteritems())
+   elif isinstance(d, list):
+      return [_plain(x) for x in d]
+   elif isinstance(d, tuple):
+      return tuple(_plain(x) for x in d)
+   elif isinstance(d, set):
+      return set(_plain(x) for x in d)
+   else:
+      return d
+
+
+def _dump_error(e):
+   # Exceptions are sent back from worker processes pickled, or as their class, arguments and
+   #   attributes when unpickling doesn't give the same error (most das exceptions initializers
+   #   don't take the final message)
+   try:
+      s = pickle.dumps(e, pickle.HIGHEST_PROTOCOL)
+      rv = pickle.loads(s)
+      if type(rv) is type(e) and str(rv) == str(e):
+         return (True, s)
+   except Exception:
+      pass
+   try:
+      return (False, pickle.dumps((e.__class__, e.args, e.__dict__), pickle.HIGHEST_PROTOCOL))
+   except Exception:
+      return (False, pickle.dumps((Exception, ("%s: %s" % (e.__class__.__name__, e),), {}), pickle.HIGHEST_PROTOCOL))
+
+
+def _load_error(state):
+   pickled, s = state
+   if pickled:
+      return pickle.loads(s)
+   klass, args, attrs = pickle.loads(s)
+   e = klass.__new__(klass)
+   e.args = args
+   e.__dict__.update(attrs)
+   return e
+
+
+def _read_many_init(schema_path, added_path):
+   # Worker process initializer: load schemas the same way the parent process did
+   os.environ["DAS_SCHEMA_PATH"] = schema_path
+   load_schemas()
+   if added_path:
+      load_schemas(paths=added_path.split(os.pathsep))
+
+
+def _read_many_process(args):
+   # Read a file in a worker process
+   #   Returns (path, pickled (builtin containers data, schema type name), None) or (path, None, pickled error)
+   #   Schema type name is the one data was read with (see _check_meta), data schema type may be
+   #   unnamed (Or alternative, ...)
+   path, schema_type, ignore_meta, strict_schema, engine, funcs = args
+   try:
+      rv = read(path, schema_type=schema_type, ignore_meta=ignore_meta, strict_schema=strict_schema, engine=engine, **funcs)
+      stn = schema_type
+      if stn is None and not ignore_meta:
+         stn = read_meta(path).get("schema_type", None)
+      return (path, pickle.dumps((_plain(rv), stn), pickle.HIGHEST_PROTOCOL), None)
+   except Exception, e:
+      return (path, None, _dump_error(e))
+
+
+def _read_many_thread(args):
+   path, schema_type, ignore_meta, strict_schema, engine, lazy, funcs = args
+   try:
+      return (path, read(path, schema_type=schema_type, ignore_meta=ignore_meta, strict_schema=strict_schema, engine=engine, lazy=lazy, **funcs), None)
+   except Exception, e:
+      return (path, None, e)
+
+
+def read_many(paths, workers=4, mode="thread", ordered=True, schema_type=None, ignore_meta=False, strict_schema=None, engine=None, lazy=False, **funcs):
+   # Read files in parallel
+   #   Yields (path, data, error) tuples, 'error' being the exception raised reading the file
+   #   ('data' is then None). When 'ordered' is False, results are yielded as they complete
+   #   mode: "thread" reads files on a thread pool (no speedup on parsing and validation,
+   #         mostly useful for network file systems)
+   #         "process" parses and validates files in worker processes. Data is sent back using
+   #         builtin containers and das types are rebuilt without validation (see das.binary.build).
+   #         Worker processes load schemas from the current DAS_SCHEMA_PATH and paths added using
+   #         das.load_schemas, 'funcs' must be picklable and 'lazy' is ignored
+   if isinstance(paths, basestring):
+      paths = [paths]
+   paths = list(paths)
+   if mode not in ("thread", "process"):
+      raise Exception("Unsupported read mode '%s'" % mode)
+
+   if workers is None or workers <= 1 or len(paths) <= 1:
+      for path in paths:
+         yield _read_many_thread((path, schema_type, ignore_meta, strict_schema, engine, lazy, funcs))
+      return
+
+   chunksize = max(1, min(16, len(paths) / (workers * 4)))
+
+   if mode == "thread":
+      from multiprocessing.pool import ThreadPool
+      pool = ThreadPool(workers)
+      try:
+         args = [(path, schema_type, ignore_meta, strict_schema, engine, lazy, funcs) for path in paths]
+         for rv in (pool.imap if ordered else pool.imap_unordered)(_read_many_thread, args, chunksize=chunksize):
+            yield rv
+      finally:
+         pool.terminate()
+         pool.join()
+      return
+
+   if isinstance(schema_type, TypeValidator):
+      stn = get_schema_type_name(schema_type)
+      if not stn:
+         raise Exception("'schema_type' must be a registered schema type in 'process' mode")
+      schema_type = stn
+   import multiprocessing
+   registry = SchemaTypesRegistry.instance
+   pool = multiprocessing.Pool(workers, initializer=_read_many_init, initargs=(os.environ.get("DAS_SCHEMA_PATH", ""), registry.addedpath))
+   try:
+      args = [(path, schema_type, ignore_meta, strict_schema, engine, funcs) for path in paths]
+      for path, data, error in (pool.imap if ordered else pool.imap_unordered)(_read_many_process, args, chunksize=chunksize):
+         if error is not None:
+            yield (path, None, _load_error(error))
+            continue
+         try:
+            rv, stn = pickle.loads(data)
+            if stn:
+               rv = binary.build(rv, get_schema_type(stn))
+         except Exception, e:
+            yield (path, None, e)
+            continue
+         yield (path, rv, None)
+   finally:
+      pool.terminate()
+      pool.join()
 
 
 class _Placeholder(object):
@@ -625,239 +957,464 @@ def _get_actual_type(st):
       return st
 
 
-def _read_csv(value, row, header, headers, schematype, data, csv):
-   re_d_key = re.compile("[{]key[}]$")
-   re_a_index = re.compile("[[]index[]]$")
-   re_dot = re.compile("[.]")
-   re_tkn = re.compile("[[{][^]}{[]+[]}]")
-   re_int = re.compile("([0-9]+)")
-   st = schematype
+# CSV header path steps
+#   _CSV_FIELD: struct field (or any other constant key)
+#   _CSV_DICTVALUE: dictionary value, key read from the '{key}' column of the same row
+#   _CSV_SEQVALUE: sequence value, index read from the '[index]' column of the same row
+_CSV_FIELD, _CSV_DICTVALUE, _CSV_SEQVALUE = range(3)
 
-   keys = []
-   for sh in re_dot.split(header):
-      pure_name = re_tkn.sub("", sh)
-      keys.append(pure_name)
-      keys += re_tkn.findall(sh)
+# CSV column kinds (last header token)
+_CSV_KEY, _CSV_INDEX, _CSV_VALUE = range(3)
 
-   parent = data
-   key = keys[0]
-   found = True
+_CSVDot = re.compile("[.]")
+_CSVToken = re.compile("[[{][^]}{[]+[]}]")
+_CSVInt = re.compile("([0-9]+)")
 
-   parent_header = ""
-   is_optional = False
 
-   while (True):
-      creatable = True
-      cur_key = keys.pop(0)
-      cur_header = cur_key
+class _CSVColumn(object):
+   # Column header compiled once for a schema type: path of container accesses from type data
+   #   to the cell value, with resolved schema types and value converter
+   def __init__(self, header, headers, schematype):
+      super(_CSVColumn, self).__init__()
 
-      # {key} and [index] should be only at the end of header
-      if cur_key == "{key}":
-         break
+      keys = []
+      for sh in _CSVDot.split(header):
+         keys.append(_CSVToken.sub("", sh))
+         keys += _CSVToken.findall(sh)
 
-      elif cur_key == "[index]":
-         break
+      # list of (step kind, key or column, schema type, optional flag)
+      self.steps = []
+      self.dynamic = False
+      self.kind = None
+      self.last = None
+      self.convert = None
 
-      st = _get_value_type(st, cur_key)
-      if isinstance(st, schematypes.Optional):
-         is_optional = True
+      st = schematype
+      parent_header = ""
+      is_optional = False
 
-      st = _get_actual_type(st)
+      while True:
+         cur_key = keys.pop(0)
+
+         # {key} and [index] should be only at the end of header
+         if cur_key == "{key}":
+            self.kind = _CSV_KEY
+            self.last = (_get_actual_type(st.vtype), is_optional)
+            break
 
-      if cur_key == "{value}":
-         creatable = False
-         kv = csv[row][headers[parent_header + "{key}"]]
-         if kv == "":
-            found = False
+         elif cur_key == "[index]":
+            self.kind = _CSV_INDEX
+            self.last = (_get_actual_type(st.type), is_optional)
             break
 
-         key = kv
+         st = _get_value_type(st, cur_key)
+         if isinstance(st, schematypes.Optional):
+            is_optional = True
 
-      elif cur_key == "[value]":
-         creatable = False
-         iv = csv[row][headers[parent_header + "[index]"]]
-         if iv == "":
-            found = False
+         st = _get_actual_type(st)
+
+         if cur_key == "{value}":
+            step = (_CSV_DICTVALUE, headers[parent_header + "{key}"], st, is_optional)
+            parent_header += cur_key
+            self.dynamic = True
+
+         elif cur_key == "[value]":
+            step = (_CSV_SEQVALUE, headers[parent_header + "[index]"], st, is_optional)
+            parent_header += cur_key
+            self.dynamic = True
+
+         else:
+            step = (_CSV_FIELD, cur_key, st, is_optional)
+            parent_header += ("." + cur_key) if parent_header else cur_key
+
+         if not keys:
+            self.kind = _CSV_VALUE
+            self.last = step
+            self.convert = st.string_to_value
             break
 
-         key = int(iv)
+         self.steps.append(step)
+
+   def _parent(self, data, cells):
+      # Container holding the column value, None if a key or index cell is empty
+      parent = data
+      for kind, key, st, is_optional in self.steps:
+         if kind == _CSV_FIELD:
+            if key in parent:
+               parent = parent[key]
+            else:
+               child = _Placeholder.make_place_holder(st, is_optional=is_optional)
+               parent[key] = child
+               parent = child
+         else:
+            kv = cells[key]
+            if kv == "":
+               return None
+            parent = parent[kv if kind == _CSV_DICTVALUE else int(kv)]
+      return parent
+
+   def read(self, table, column, rows, data):
+      # Read column cells of given rows into data (dictionaries and lists with placeholders)
+      dynamic = self.dynamic
+      parent = (None if dynamic else self._parent(data, None))
+
+      if self.kind == _CSV_KEY:
+         vst, is_optional = self.last
+         for r in rows:
+            value = table[r][column]
+            if value != "":
+               if dynamic:
+                  parent = self._parent(data, table[r])
+                  if parent is None:
+                     continue
+               parent[value] = _Placeholder.make_place_holder(vst, is_optional=is_optional)
+
+      elif self.kind == _CSV_INDEX:
+         vst, is_optional = self.last
+         for r in rows:
+            int_res = _CSVInt.match(table[r][column])
+            if int_res:
+               if dynamic:
+                  parent = self._parent(data, table[r])
+                  if parent is None:
+                     continue
+               for _ in xrange(int(int_res.group(1)) + 1 - len(parent)):
+                  parent.append(_Placeholder.make_place_holder(vst, is_optional=is_optional))
 
       else:
-         key = cur_key
-         cur_header = ("." + cur_key) if parent_header else cur_key
+         kind, key, _, is_optional = self.last
+         keycolumn = (None if kind == _CSV_FIELD else key)
+         convert = self.convert
+         for r in rows:
+            cells = table[r]
+            if dynamic:
+               parent = self._parent(data, cells)
+               if parent is None:
+                  continue
+               if keycolumn is not None:
+                  key = cells[keycolumn]
+                  if key == "":
+                     continue
+                  if kind == _CSV_SEQVALUE:
+                     key = int(key)
+
+            if key in parent and not isinstance(parent[key], _Placeholder):
+               if dynamic:
+                  continue
+               # Same value for all remaining rows
+               break
 
-      parent_header += cur_header
+            value = cells[column]
+            if "\\" in value:
+               # TODO : find better way
+               value = value.replace('\\"', '"')
 
-      if not keys:
-         break
+            if not value:
+               if is_optional:
+                  continue
 
-      if not creatable:
-         parent = parent[key]
-      else:
-         parent[key] = parent.get(key, _Placeholder.make_place_holder(st, is_optional=is_optional))
-         parent = parent[key]
+               try:
+                  value = convert(value)
+               except:
+                  continue
 
-   if not found:
-      return
+            else:
+               value = convert(value)
 
-   if re_d_key.search(header):
-      if value != "":
-         parent[value] = _Placeholder.make_place_holder(_get_actual_type(st.vtype), is_optional=is_optional)
+            parent[key] = value
 
-      return
 
-   if re_a_index.search(header):
-      int_res = re_int.match(value)
-      if int_res:
-         for _ in range(int(int_res.group(1)) + 1 - len(parent)):
-            parent.append(_Placeholder.make_place_holder(_get_actual_type(st.type), is_optional=is_optional))
+_CSVMetadata = re.compile("^[<](.*)[>]$")
+_CSVAlias = re.compile("[ ]+as[ ]+([^ ]+)[ ]*$")
 
-      return
 
-   if key in parent and not isinstance(parent[key], _Placeholder):
+def _iter_csv_table(rows):
+   # Yield data read from rows (lists of cell strings, first one being the header)
+   #   A data starts at a row with a non-empty '<schematype>' cell and includes following rows
+   #   with an empty one, rows are only kept until the next data starts
+   rows = iter(rows)
+   headers = next(rows, None)
+   if headers is None:
       return
 
-   # TODO : find better way
-   value = value.replace('\\"', '"')
+   # read metadata columns
+   column = 0
+   schematype_column = None
+   for header in headers:
+      hr = _CSVMetadata.search(header)
+      if not hr:
+         break
 
-   if not value:
-      if is_optional:
-         return
+      if hr.group(1) == "schematype":
+         schematype_column = column
 
-      try:
-         value = st.string_to_value(value)
-      except:
-         return
+      column += 1
 
-   else:
-      value = st.string_to_value(value)
+   if schematype_column is None:
+      return
 
-   parent[key] = value
+   alias_map = {}
+   # type -> (schema type, [(column index, compiled column), ...])
+   plans = {}
+
+   def make(typ, block):
+      plan = plans.get(typ, None)
+      if plan is None:
+         als = alias_map.get(typ, typ)
+         regex = re.compile("^" + als.replace(".", "[.]") + "[.]")
+         con_headers = {}
+         cln_list = []
+         for c in range(column, len(headers)):
+            if regex.search(headers[c]):
+               con_headers[regex.sub("", headers[c])] = c
+               cln_list.append(c)
+         schema_type = get_schema_type(typ)
+         plan = (schema_type, als, [(c, _CSVColumn(regex.sub("", headers[c]), con_headers, schema_type)) for c in cln_list])
+         plans[typ] = plan
+
+      schema_type, _, columns = plan
+      read_data = {}
+      rows = xrange(len(block))
+      for c, col in columns:
+         col.read(block, c, rows, read_data)
 
+      _Placeholder.finalize(read_data)
 
-def read_csv_table(csv_table):
-   data_table = csv_table[:]
+      if _Placeholder.is_place_holder(read_data):
+         raise Exception("Parsing uncompleted")
 
-   headers = data_table.pop(0)
-   col_size = len(headers)
-   row_size = len(data_table)
+      return schema_type.partial_make(read_data)
 
-   re_metadata = re.compile("^[<](.*)[>]$")
-   re_alias = re.compile("[ ]+as[ ]+([^ ]+)[ ]*$")
+   typ = None
+   block = []
 
-   mts = {}
-   contents = []
-   alias_map = {}
-   column_map = {}
-   header_map = {}
-   regex_map = {}
+   for row in rows:
+      tv = row[schematype_column]
 
-   # read metadata
-   column = 0
-   for header in headers:
-      hr = re_metadata.search(header)
-      if not hr:
-         break
+      if tv:
+         if block:
+            yield make(typ, block)
 
-      mtn = hr.group(1)
-      if mtn == "schematype":
-         cur = None
-         for r in range(row_size):
-            tv = data_table[r][column]
+         alr = _CSVAlias.search(tv)
+         tv = _CSVAlias.sub("", tv)
+         if alr:
+            if tv in alias_map and alr.group(1) != alias_map[tv]:
+               raise Exception("Two different aliases were set of '%s'" % (tv))
 
-            if tv:
-               alr = re_alias.search(tv)
-               tv = re_alias.sub("", tv)
-               if alr:
-                  if tv in alias_map and alr.group(1) != alias_map[tv]:
-                     raise Exception("Two different aliases were set of '%s'" % (tv))
+            if tv in plans and plans[tv][1] != alr.group(1):
+               raise Exception("Alias of '%s' must be set on its first data row" % (tv))
 
-                  alias_map[tv] = alr.group(1)
+            alias_map[tv] = alr.group(1)
 
-               if tv not in column_map:
-                  column_map[tv] = list()
+         typ = tv
+         block = [row]
 
-               cur = {"type": tv, "start": r, "end": r}
-               contents.append(cur)
+      elif typ is not None:
+         block.append(row)
 
-            elif cur is not None:
-               cur["end"] = r # pylint: disable=unsupported-assignment-operation
+   if block:
+      yield make(typ, block)
 
-      else:
-         mts[hr.group(1)] = data_table[0][column]
 
-      column += 1
+def read_csv_table(csv_table):
+   return list(_iter_csv_table(csv_table))
 
-   # get content column range
-   for k, cln_list in column_map.items():
-      als = alias_map.get(k, k)
-      regex = re.compile("^" + als.replace(".", "[.]") + "[.]")
-
-      regex_map[k] = regex
-      con_headers = {}
-      header_map[k] = con_headers
-
-      for c in range(column, col_size):
-         if regex.search(headers[c]):
-            con_headers[regex.sub("", headers[c])] = c
-            cln_list.append(c)
-
-   results = []
-
-   for content in contents:
-      typ = content["type"]
-      row_start = content["start"]
-      row_end = content["end"]
-      regex = regex_map[typ]
-      schema_type = get_schema_type(typ)
-      con_headers = header_map[typ]
-      read_data = {}
-      for c in column_map[typ]:
-         header = regex.sub("", headers[c])
-         for r in range(row_start, row_end + 1):
-            _read_csv(data_table[r][c], r, header, con_headers, schema_type, read_data, data_table)
 
-      _Placeholder.finalize(read_data)
+def _iter_csv_rows(f, delimiter, newline, csv_path):
+   # Delimiter is a regular expression, plain single characters are split on directly
+   if len(delimiter) == 1 and not delimiter in ".^$*+?{}[]\\|()":
+      split = lambda x: x.split(delimiter)
+   else:
+      split = re.compile(delimiter).split
+
+   if newline == "\n":
+      # Also strip '\r' of files written on Windows (opened in binary mode, there's no newline translation)
+      lines = ((l[:-2] if l.endswith("\r\n") else (l[:-1] if l.endswith("\n") else l)) for l in f)
+   elif newline == "\r\n":
+      n = len(newline)
+      lines = ((l[:-n] if l.endswith(newline) else l) for l in f)
+   elif "\n" in newline:
+      # Lines end with '\n', newline is also matched as a regular expression at the end of each line
+      n = len(newline)
+      re_strip = re.compile(newline + "$")
+      lines = ((l[:-n] if l.endswith(newline) else re_strip.sub("", l)) for l in f)
+   else:
+      lines = _iter_lines(f, newline)
+
+   col_size = None
+   for l in lines:
+      col_datas = split(l)
+      if col_size is None:
+         col_size = len(col_datas)
+      elif col_size != len(col_datas):
+         raise Exception("Parsing '%s' was failed" % (csv_path))
+      yield col_datas
 
-      if _Placeholder.is_place_holder(read_data):
-         raise Exception("Parsing uncompleted")
 
-      results.append(schema_type.partial_make(read_data))
+def _iter_lines(f, newline, size=65536):
+   pending = ""
+   while True:
+      chunk = f.read(size)
+      if not chunk:
+         break
+      lines = (pending + chunk).split(newline)
+      pending = lines.pop()
+      for l in lines:
+         yield l
+   if pending:
+      yield pending
 
-   return results
+
+def iter_csv(csv_path, delimiter="\t", newline="\n"):
+   # Same as read_csv, yielding data one at a time while reading the file
+   if not os.path.isfile(csv_path):
+      return
+
+   with open(csv_path, "rb") as f:
+      for d in _iter_csv_table(_iter_csv_rows(f, delimiter, newline, csv_path)):
+         yield d
 
 
 def read_csv(csv_path, delimiter="\t", newline="\n"):
-   # re_metadata = re.compile("^[<](.*)[>]$")
-   # re_alias = re.compile("[ ]+as[ ]+([^ ]+)[ ]*$")
-   re_strip = re.compile(newline + "$")
-   re_delimiter = re.compile(delimiter)
+   return list(iter_csv(csv_path, delimiter=delimiter, newline=newline))
 
-   if not os.path.isfile(csv_path):
-      return []
 
-   with open(csv_path, "r") as f:
-      lines = map(lambda x: re_strip.sub("", x), f.readlines())
+# schema type id -> (schema type, registry generation, shareable flag)
+_Shareable = {}
 
-   if len(lines) == 0:
-      return []
 
-   csv_table = []
-   col_size = len(re_delimiter.split(lines[0]))
+def _is_shareable(st, visiting=None):
+   # Check if values validated by 'st' can be shared between copies until they are accessed
+   #   (only das containers and immutable values, no Class values)
+   generation = SchemaTypesRegistry.instance.generation
+   entry = _Shareable.get(id(st), None)
+   if entry is not None and entry[0] is st and entry[1] == generation:
+      return entry[2]
 
-   for l in lines:
-      col_datas = re_delimiter.split(l)
-      if col_size != len(col_datas):
-         raise Exception("Parsing '%s' was failed" % (csv_path))
+   # Only cache results of top level calls (results for recursive types depend on the types being visited)
+   top = (visiting is None)
+   if top:
+      visiting = set()
+   elif id(st) in visiting:
+      return True
+   visiting.add(id(st))
+
+   if isinstance(st, (schematypes.Boolean, schematypes.Integer, schematypes.Real, schematypes.String, schematypes.Empty, schematypes.Alias)):
+      rv = True
+   elif isinstance(st, schematypes.SchemaType):
+      rv = _is_shareable(st._get_plan().type, visiting)
+   elif isinstance(st, (schematypes.Optional, schematypes.Sequence, schematypes.Set)):
+      rv = _is_shareable(st.type, visiting)
+   elif isinstance(st, schematypes.Struct):
+      rv = all(_is_shareable(x[0], visiting) for x in st._get_plan().keys.itervalues())
+   elif isinstance(st, (schematypes.Tuple, schematypes.Or)):
+      rv = all(_is_shareable(x, visiting) for x in st.types)
+   elif isinstance(st, schematypes.Dict):
+      rv = (_is_shareable(st.ktype, visiting) and _is_shareable(st.vtype, visiting) and
+            all(_is_shareable(x, visiting) for x in st.vtypeOverrides.itervalues()))
+   else:
+      rv = False
+
+   if top:
+      _Shareable[id(st)] = (st, generation, rv)
+   return rv
 
-      csv_table.append(col_datas)
 
-   return read_csv_table(csv_table)
+# Values shared by copies
+_Immutables = set([str, unicode, int, long, float, bool, complex, type(None)])
+# Instance state set by das types, other attributes (mixin state) are deep copied
+_CloneState = set(["_schema_type", "_validate_globally_cb", "_global_validation_enabled", "_lazy_values", "_dict"])
+
+
+def _clone(d):
+   immutables = _Immutables
+   klass = d.__class__
+   state = d.__dict__.copy()
+   src = state.get("_dict", None)
+   forwards = None
+   for k, v in state.iteritems():
+      if k in _CloneState or type(v) in immutables:
+         continue
+      elif src is not None and getattr(v, "__self__", None) is src:
+         # Struct method forwarding (see Struct._check_reserved), bound to the new dictionary below
+         forwards = (forwards or []) + [k]
+      else:
+         state[k] = _deepcopy(v)
+   # Linked to the new parent container by the caller
+   state["_validate_globally_cb"] = None
+
+   if isinstance(d, Struct):
+      rv = klass.__new__(klass)
+      lazy = state.get("_lazy_values", None)
+      st = state["_schema_type"]
+      if lazy is not None and st is not None and _is_shareable(st):
+         # Copy on write: parsed values are shared until either struct is first accessed
+         #   (each struct then builds its own values from them)
+         rv.__dict__.update(state)
+         return rv
+      values = {}
+      for k, v in d._dict.iteritems():
+         if type(v) not in immutables:
+            v = (_clone(v) if isinstance(v, TypeBase) else copy(v, deep=True))
+         values[k] = v
+      for k in (forwards or ()):
+         state[k] = getattr(values, state[k].__name__)
+      state.pop("_lazy_values", None)
+      state["_dict"] = values
+      rv.__dict__.update(state)
+      rv._link_values(values.itervalues())
+      return rv
+
+   elif isinstance(d, dict):
+      rv = dict.__new__(klass)
+      setitem = dict.__setitem__
+      for k, v in dict.iteritems(d):
+         if type(v) not in immutables:
+            v = (_clone(v) if isinstance(v, TypeBase) else copy(v, deep=True))
+         setitem(rv, k, v)
+      rv.__dict__.update(state)
+      rv._link_values(dict.itervalues(rv))
+      return rv
+
+   values = []
+   append = values.append
+   for v in d:
+      if type(v) not in immutables:
+         v = (_clone(v) if isinstance(v, TypeBase) else copy(v, deep=True))
+      append(v)
+   if isinstance(d, tuple):
+      rv = tuple.__new__(klass, values)
+   elif isinstance(d, list):
+      rv = list.__new__(klass)
+      list.__init__(rv, values)
+   else:
+      rv = set.__new__(klass)
+      set.__init__(rv, values)
+   rv.__dict__.update(state)
+   rv._link_values(values)
+   return rv
+
+
+def clone(d):
+   # Deep copy of valid data: containers are created directly (no value adaptation nor validation),
+   #   classes (with bound mixins) and instance state (schema type, ...) are kept
+   if not isinstance(d, TypeBase):
+      return copy(d, deep=True)
+   # Disable garbage collection while creating lots of objects
+   gcenabled = gc.isenabled()
+   gc.disable()
+   try:
+      return _clone(d)
+   finally:
+      if gcenabled:
+         gc.enable()
 
 
 def copy(d, deep=True):
    if isinstance(d, TypeValidator):
       return d.copy()
+   elif deep and isinstance(d, TypeBase):
+      return clone(d)
    elif isinstance(d, list):
       if deep:
          rv = d.__class__([copy(x, deep=True) for x in d])
@@ -930,229 +1487,63 @@ def _get_sorted_keys(d):
 def pprint(d, stream=None, indent="  ", depth=0, inline=False, eof=True, encoding=None):
    if stream is None:
       stream = sys.stdout
+   serializer.Serializer(indent=indent, encoding=encoding).serialize(d, stream, depth=depth, inline=inline, eof=eof)
 
-   tindent = indent * depth
-
-   if not inline:
-      stream.write(tindent)
-
-   if isinstance(d, (dict, Struct)):
-      stream.write("{\n")
-      n = len(d)
-      i = 0
-      keys = _get_sorted_keys(d)
-      for k in keys:
-         stream.write("%s%s%s: " % (tindent, indent, repr(k)))
-         v = d[k]
-         pprint(v, stream, indent=indent, depth=depth+1, inline=True, eof=False, encoding=encoding)
-         i += 1
-         if i >= n:
-            stream.write("\n")
-         else:
-            stream.write(",\n")
-      stream.write("%s}" % tindent)
-
-   elif isinstance(d, list):
-      stream.write("[\n")
-      n = len(d)
-      i = 0
-      for v in d:
-         pprint(v, stream, indent=indent, depth=depth+1, inline=False, eof=False, encoding=encoding)
-         i += 1
-         if i >= n:
-            stream.write("\n")
-         else:
-            stream.write(",\n")
-      stream.write("%s]" % tindent)
-
-   elif isinstance(d, set):
-      stream.write("set([\n")
-      n = len(d)
-      i = 0
-      for v in d:
-         pprint(v, stream, indent=indent, depth=depth+1, inline=False, eof=False, encoding=encoding)
-         i += 1
-         if i >= n:
-            stream.write("\n")
-         else:
-            stream.write(",\n")
-      stream.write("%s])" % tindent)
-
-   elif isinstance(d, str):
-      try:
-         d.decode("ascii")
-      except Exception, e:
-         if not encoding:
-            raise Exception("Non-ascii string value found but no encoding provided (%s)." % e)
-         try:
-            stream.write(repr(d.decode(encoding)))
-         except Exception, e:
-            raise Exception("Non-ascii string value cannot be decoded to '%s' (%s)." % (encoding, e))
-      else:
-         # properly deal with multiline characters
-         # using repr here would solve the problem too but lead to less readable files
-         # -> line1\\nline1 -> eval -> line1\nline2
-         lines = d.split("\n")
-         nlines = len(lines)
-         if nlines > 1:
-            stream.write("'''")
-            for i in xrange(nlines):
-               stream.write(lines[i])
-               if i + 1 < nlines:
-                  stream.write("\n")
-            stream.write("'''")
-         else:
-            # stream.write("'%s'" % d)
-            stream.write(repr(d))
-
-   elif isinstance(d, unicode):
-      try:
-         s = d.encode("ascii")
-      except:
-         stream.write(repr(d))
-      else:
-         # see comment above
-         lines = s.split("\n")
-         nlines = len(lines)
-         if nlines > 1:
-            stream.write("'''")
-            for i in xrange(nlines):
-               stream.write(lines[i])
-               if i + 1 < nlines:
-                  stream.write("\n")
-            stream.write("'''")
-         else:
-            # stream.write("'%s'" % s)
-            stream.write(repr(s))
 
-   else:
-      # stream.write(str(d))
-      stream.write(repr(d))
+class _CSVHeaders(object):
+   # Output columns names, in creation order
+   def __init__(self):
+      super(_CSVHeaders, self).__init__()
+      self.names = []
+      self.columns = {}
 
-   if eof:
-      stream.write("\n")
-
-
-class _CSVHeader(object):
-   def __init__(self, name, column, fill=True):
-      super(_CSVHeader, self).__init__()
-      self.__column = column
-      self.__name = name
-      self.__data = []
-      self.__fill = fill
-
-   def fill(self):
-      return self.__fill
-
-   def column(self):
-      return self.__column
-
-   def name(self):
-      return self.__name
-
-   def add_data(self, data):
-      self.__data.append(data)
-
-   def data(self):
-      return self.__data[:]
-
-   def get_row(self, data):
-      if data not in self.__data:
-         return -1
-
-      c = 0
-      for d in self.__data:
-         if d == data:
-            return c
-
-         c += d.count()
-
-      return -1
-
-   def row_count(self):
-      rc = 0
-      for d in self.__data:
-         rc += d.count()
-
-      return rc
+   def get(self, name):
+      column = self.columns.get(name, None)
+      if column is None:
+         column = len(self.names)
+         self.names.append(name)
+         self.columns[name] = column
+      return column
 
 
 class _CSVValue(object):
-   def __init__(self, value, header, valuetype=None, parent=None):
-      super(_CSVValue, self).__init__()
-      self.__children = []
-      self.__header = header
-      self.__parent = parent
-      self.__valuetype = valuetype
-      self.__value = value
-
-      if parent:
-         parent.__children.append(self)
-
-   def header(self):
-      return self.__header
-
-   def value(self):
-      return self.__value
-
-   def valuetype(self):
-      return self.__valuetype
-
-   def parent(self):
-      return self.__parent
-
-   def children(self):
-      return self.__children[:]
-
-   def row(self):
-      if not self.__parent:
-         return self.__header.get_row(self)
-
-      return self.__parent.get_row(self)
-
-   def get_row(self, child):
-      if child not in self.__children:
-         raise Exception("'%s' is not a child of '%s'" % (child.value(), self.value()))
-
-      cr = self.row()
-      header_count = {}
-      for c in self.__children:
-         h = c.header()
-         if h not in header_count:
-            header_count[h] = cr
-
-         if c == child:
-            return header_count[h]
-
-         header_count[h] += c.count()
-
-   def count(self):
-      if not self.__children:
-         return 1
-
-      header_count = {}
-      for c in self.__children:
-         h = c.header()
-         if h not in header_count:
-            header_count[h] = 0
-
-         header_count[h] += c.count()
-
-      return max(header_count.values())
-
-
-def _get_header(key, headers):
-   header = None
-   for h in headers:
-      if key == h.name():
-         header = h
-         break
+   # Cell value with the values of rows it spans (dictionary keys and sequence indices)
+   __slots__ = ("column", "value", "fill", "children", "count")
 
-   if not header:
-      header = _CSVHeader(key, len(headers))
-      headers.append(header)
-
-   return header
+   def __init__(self, value, column, parent=None, fill=True):
+      super(_CSVValue, self).__init__()
+      self.column = column
+      # TODO : find better way
+      self.value = (value.replace("\"", "\\\"") if "\"" in value else value)
+      self.fill = fill
+      self.children = []
+      # Number of rows spanned, see update_count
+      self.count = 1
+      if parent is not None:
+         parent.children.append(self)
+
+   def update_count(self):
+      # Children values of a same column are stacked, value spans the largest stack
+      #   (children counts are up to date, values are created depth first)
+      if self.children:
+         counts = {}
+         for c in self.children:
+            counts[c.column] = counts.get(c.column, 0) + c.count
+         self.count = max(counts.itervalues())
+
+   def layout(self, row, lines, first_row):
+      # Set cells of lines (starting at first_row in output file)
+      column = self.column
+      for r in xrange(row, row + (self.count if self.fill else 1)):
+         if lines[r][column] != "":
+            raise Exception("Invalid index. There is a data at [%s][%s] already" % (first_row + r, column))
+         lines[r][column] = self.value
+
+      rows = {}
+      for c in self.children:
+         cr = rows.get(c.column, row)
+         c.layout(cr, lines, first_row)
+         rows[c.column] = cr + c.count
 
 
 def _dump_csv_data(k, d, valuetype, headers, parent=None, prefix=None):
@@ -1175,24 +1566,23 @@ def _dump_csv_data(k, d, valuetype, headers, parent=None, prefix=None):
          return
 
       ckeys = map(lambda x: eval(repr(x)), _get_sorted_keys(d))
-      key_header = _get_header(prefix + k + "{key}", headers)
+      key_column = headers.get(prefix + k + "{key}")
 
       vk = k + "{value}"
       for ck in ckeys:
-         kv = _CSVValue(ck, key_header, parent=parent)
-         key_header.add_data(kv)
+         kv = _CSVValue(ck, key_column, parent=parent)
          _dump_csv_data(vk, d[ck], valuetype.vtype, headers, parent=kv, prefix=prefix)
+         kv.update_count()
 
    elif isinstance(d, (list, set, tuple)):
       if not d:
          return
 
-      index_header = _get_header(prefix + k + "[index]", headers)
+      index_column = headers.get(prefix + k + "[index]")
       vk = k + "[value]"
       i = 0
       for v in d:
-         index = _CSVValue(str(i), index_header, parent=parent)
-         index_header.add_data(index)
+         index = _CSVValue(str(i), index_column, parent=parent)
          vt = None
          if isinstance(valuetype, (schematypes.Sequence, schematypes.Set)):
             vt = valuetype.type
@@ -1202,39 +1592,131 @@ def _dump_csv_data(k, d, valuetype, headers, parent=None, prefix=None):
             raise Exception("Unexpected value type '%s'" % valuetype)
 
          _dump_csv_data(vk, v, vt, headers, parent=index, prefix=prefix)
+         index.update_count()
          i += 1
 
    # scalar
    else:
-      header = _get_header(prefix + k, headers)
+      _CSVValue(valuetype.value_to_string(d), headers.get(prefix + k), parent=parent)
+
+
+class _OutputFile(object):
+   # File opened for writing, used as a context manager
+   #   In atomic mode, content is written to a temporary file in the same directory and renamed
+   #   to target path only if no exception occured
+   def __init__(self, path, atomic=False, fsync=False):
+      super(_OutputFile, self).__init__()
+      self.path = path
+      self.atomic = atomic
+      self.fsync = fsync
+      self.tmppath = None
+      self.file = None
+
+   def __enter__(self):
+      if not self.atomic:
+         self.file = open(self.path, "wb")
+      else:
+         dirname, basename = os.path.split(os.path.abspath(self.path))
+         while True:
+            tmppath = os.path.join(dirname, ".%s.%s.tmp" % (basename, binascii.hexlify(os.urandom(4))))
+            try:
+               # Created with the same default permissions as open()
+               fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0666)
+            except OSError, e:
+               if e.errno == errno.EEXIST:
+                  continue
+               raise
+            break
+         self.tmppath = tmppath
+         self.file = os.fdopen(fd, "wb")
+      return self.file
+
+   def __exit__(self, exc_type, exc_value, traceback):
+      try:
+         try:
+            if exc_type is None and self.fsync:
+               self.file.flush()
+               os.fsync(self.file.fileno())
+         finally:
+            self.file.close()
+         if self.tmppath is not None and exc_type is None:
+            if os.path.exists(self.path):
+               # Keep target file permissions
+               os.chmod(self.tmppath, os.stat(self.path).st_mode & 07777)
+               if sys.platform == "win32":
+                  os.remove(self.path)
+            os.rename(self.tmppath, self.path)
+      except:
+         ec, ei, tb = sys.exc_info()
+         self._remove_tmpfile()
+         raise ec, ei, tb
+      if self.tmppath is not None and exc_type is not None:
+         self._remove_tmpfile()
+      elif self.tmppath is not None and self.fsync and sys.platform != "win32":
+         # Make rename durable
+         fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+         try:
+            os.fsync(fd)
+         except OSError:
+            pass
+         finally:
+            os.close(fd)
+      return False
+
+   def _remove_tmpfile(self):
+      # Don't hide the original error
+      if self.tmppath is not None and os.path.exists(self.tmppath):
+         try:
+            os.remove(self.tmppath)
+         except OSError:
+            pass
 
-      cv = _CSVValue(valuetype.value_to_string(d), header, valuetype=valuetype, parent=parent)
-      header.add_data(cv)
+
+def _write_header(f, schema_type, encoding):
+   if encoding is not None:
+      f.write("# encoding: %s\n" % encoding)
+   f.write("# version: %s\n" % __version__)
+   f.write("# author: %s\n" % os.environ["USER" if sys.platform != "win32" else "USERNAME"])
+   f.write("# date: %s\n" % datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S"))
+   if schema_type:
+      st = get_schema_type_name(schema_type)
+      f.write("# schema_type: %s\n" % st)
+      sn = get_schema(st)
+      if sn and sn.version is not None:
+         f.write("# schema_version: %s\n" % sn.version)
 
 
-def write(d, path, indent="  ", encoding=None):
-   d._validate()
+def write(d, path, indent="  ", encoding=None, atomic=False, fsync=False, validate=True):
+   if validate:
+      d._validate()
 
    schema_type = d._get_schema_type()
 
    if encoding is None and schema_type:
       encoding = "utf8"
 
-   with open(path, "wb") as f:
-      if encoding is not None:
-         f.write("# encoding: %s\n" % encoding)
-      f.write("# version: %s\n" % __version__)
-      f.write("# author: %s\n" % os.environ["USER" if sys.platform != "win32" else "USERNAME"])
-      f.write("# date: %s\n" % datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S"))
-      if schema_type:
-         st = get_schema_type_name(schema_type)
-         f.write("# schema_type: %s\n" % st)
-         sn = get_schema(st)
-         if sn and sn.version is not None:
-            f.write("# schema_version: %s\n" % sn.version)
+   with _OutputFile(path, atomic=atomic, fsync=fsync) as f:
+      _write_header(f, schema_type, encoding)
       pprint(d, stream=f, indent=indent, encoding=encoding)
 
 
+def write_binary(d, path, encoding=None, atomic=False, fsync=False, validate=True):
+   # Same header as das.write followed by a compact tagged binary encoding of the data
+   #   'encoding' is used on read to decode non-ascii str values, as das.read does
+   if validate:
+      d._validate()
+
+   schema_type = d._get_schema_type()
+
+   if encoding is None and schema_type:
+      encoding = "utf8"
+
+   with _OutputFile(path, atomic=atomic, fsync=fsync) as f:
+      _write_header(f, schema_type, encoding)
+      f.write(binary.Magic)
+      binary.dump(d, f)
+
+
 def write_csv(data, path, alias=None, encoding=None, delimiter="\t", newline="\n"):
    data_list = []
 
@@ -1256,8 +1738,9 @@ def write_csv(data, path, alias=None, encoding=None, delimiter="\t", newline="\n
    if alias is None:
       alias = {}
 
-   header_schema = _CSVHeader("<schematype>", 0, fill=False)
-   headers = [header_schema]
+   headers = _CSVHeaders()
+   schema_column = headers.get("<schematype>")
+   records = []
 
    alias_defined = set()
    for d in data_list:
@@ -1273,41 +1756,32 @@ def write_csv(data, path, alias=None, encoding=None, delimiter="\t", newline="\n
          type_value = schema_type_name + " as " + prefix
       prefix += "."
 
-      schem_val = _CSVValue(type_value, header_schema)
-      header_schema.add_data(schem_val)
+      schem_val = _CSVValue(type_value, schema_column, fill=False)
 
       keys = map(lambda x: eval(repr(x)), _get_sorted_keys(d))
 
       for k in keys:
          _dump_csv_data(k, d[k], schema_type[k], headers, parent=schem_val, prefix=prefix)
 
-   with open(path, "wb") as f:
-      f.write(delimiter.join(map(lambda x: x.name(), headers)))
-      row_counts = max(map(lambda x: x.row_count(), headers))
-
-      column_counts = len(headers)
-      lines = map(lambda y: map(lambda x: "", range(column_counts)), range(row_counts))
-
-      for header in headers:
-         for hd in header.data():
-            vv = hd.value()
+      schem_val.update_count()
+      records.append(schem_val)
 
-            # TODO : find better way
-            if "\"" in hd.value():
-               vv = vv.replace("\"", "\\\"")
-
-            sr = hd.row()
-            er = sr + (hd.count() if header.fill() else 1)
-            c = header.column()
-
-            for r in range(sr, er):
-               if lines[r][c] != "":
-                  raise Exception("Invalid index. There is a data at [%s][%s] already" % (r, c))
-               lines[r][c] = vv
-
-      for r in lines:
-         f.write(newline)
-         f.write(delimiter.join(r))
+   with open(path, "wb") as f:
+      f.write(delimiter.join(headers.names))
+      column_counts = len(headers.names)
+
+      # Each data rows are laid out and written separately
+      row = 0
+      for i in xrange(len(records)):
+         schem_val = records[i]
+         records[i] = None
+         lines = [[""] * column_counts for _ in xrange(schem_val.count)]
+         schem_val.layout(0, lines, row)
+         row += schem_val.count
+
+         for r in lines:
+            f.write(newline)
+            f.write(delimiter.join(r))
 
 
 def generate_empty_schema(path, name=None, version=None, author=None):
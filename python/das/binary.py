@@ -0,0 +1,394 @@
+from __future__ import absolute_import
+import struct  # standard library module, not das.struct
+import das
+
+
+# First content line of binary das files (following the usual '# key: value' header lines)
+Magic = "DASB1\n"
+
+# Number of buffered strings before output stream is written to
+_ChunkSize = 8192
+
+_Size = struct.Struct("<I")
+_Int = struct.Struct("<q")
+_Real = struct.Struct("<d")
+_Complex = struct.Struct("<dd")
+
+_IntMin = -(2 ** 63)
+_IntMax = 2 ** 63 - 1
+
+# Value tags
+#   containers: tag followed by item count ('d': key and value for each item)
+#   strings, big integers and other values: tag followed by byte length
+_NONE, _TRUE, _FALSE = "N", "T", "F"
+_INT, _BIGINT, _LONG, _BIGLONG = "i", "I", "l", "L"
+_REAL, _COMPLEX = "f", "c"
+_STR, _UNICODE = "s", "u"
+_LIST, _TUPLE, _SET, _DICT = "q", "t", "S", "d"
+# Any other value is stored using its representation (evaluated on read, like das text files)
+_REPR = "r"
+
+# Containers kinds while reading
+_Containers = {_LIST: list, _TUPLE: list, _SET: list, _DICT: dict}
+
+
+def _write_int(append, tag, bigtag, v):
+   if _IntMin <= v <= _IntMax:
+      append(tag)
+      append(_Int.pack(v))
+   else:
+      s = str(v).rstrip("L")
+      append(bigtag)
+      append(_Size.pack(len(s)))
+      append(s)
+
+
+def dump(d, stream):
+   parts = []
+   append = parts.append
+   pack_size = _Size.pack
+   # Stack of iterators on containers items
+   stack = [iter([d])]
+
+   while stack:
+      for v in stack[-1]:
+         t = type(v)
+         if t is str:
+            append(_STR)
+            append(pack_size(len(v)))
+            append(v)
+         elif t is unicode:
+            v = v.encode("utf-8")
+            append(_UNICODE)
+            append(pack_size(len(v)))
+            append(v)
+         elif t is bool:
+            append(_TRUE if v else _FALSE)
+         elif v is None:
+            append(_NONE)
+         elif t is float:
+            append(_REAL)
+            append(_Real.pack(v))
+         elif t is int:
+            _write_int(append, _INT, _BIGINT, v)
+         elif t is long:
+            _write_int(append, _LONG, _BIGLONG, v)
+         elif isinstance(v, das.types.Struct):
+            append(_DICT)
+            append(pack_size(len(v._dict)))
+            stack.append(_iter_items(v._dict))
+            break
+         elif isinstance(v, dict):
+            append(_DICT)
+            append(pack_size(len(v)))
+            stack.append(_iter_items(v))
+            break
+         elif isinstance(v, list):
+            append(_LIST)
+            append(pack_size(len(v)))
+            stack.append(iter(v))
+            break
+         elif isinstance(v, tuple):
+            append(_TUPLE)
+            append(pack_size(len(v)))
+            stack.append(iter(v))
+            break
+         elif isinstance(v, set):
+            append(_SET)
+            append(pack_size(len(v)))
+            stack.append(iter(v))
+            break
+         elif isinstance(v, basestring):
+            # string subclasses
+            if isinstance(v, unicode):
+               v = v.encode("utf-8")
+               append(_UNICODE)
+            else:
+               v = str(v)
+               append(_STR)
+            append(pack_size(len(v)))
+            append(v)
+         elif isinstance(v, (int, long)):
+            _write_int(append, _INT, _BIGINT, int(v))
+         elif isinstance(v, float):
+            append(_REAL)
+            append(_Real.pack(v))
+         elif isinstance(v, complex):
+            append(_COMPLEX)
+            append(_Complex.pack(v.real, v.imag))
+         else:
+            v = repr(v)
+            append(_REPR)
+            append(pack_size(len(v)))
+            append(v)
+      else:
+         stack.pop()
+
+      if len(parts) >= _ChunkSize:
+         stream.write("".join(parts))
+         del(parts[:])
+
+   stream.write("".join(parts))
+
+
+def _iter_items(d):
+   for k, v in d.iteritems():
+      yield k
+      yield v
+
+
+def _error(msg, pos):
+   raise das.ParseError("Invalid binary data: %s (offset %d)" % (msg, pos))
+
+
+class _NoKeyType(object):
+   def __repr__(self):
+      return "<no key>"
+
+_NoKey = _NoKeyType()
+
+
+def loads(s, pos=0, names=None, encoding=None):
+   # Decode value stored in 's' starting at 'pos'
+   #   When 'encoding' is set, string values (not dictionary keys) are converted the same way
+   #   das.read does (see das.ascii_or_unicode)
+   unpack_size = _Size.unpack_from
+   unpack_int = _Int.unpack_from
+   unpack_real = _Real.unpack_from
+   n = len(s)
+   # Stack entries: [container, kind, remaining items, pending dictionary key or _NoKey]
+   stack = []
+   cur, kind, remaining, key = [], _LIST, 1, _NoKey
+
+   try:
+      while True:
+         if remaining == 0:
+            if kind == _TUPLE:
+               v = tuple(cur)
+            elif kind == _SET:
+               v = set(cur)
+            else:
+               v = cur
+            if not stack:
+               break
+            cur, kind, remaining, key = stack.pop()
+
+         else:
+            tag = s[pos]
+            pos += 1
+            if tag == _STR or tag == _UNICODE:
+               size, = unpack_size(s, pos)
+               pos += 4
+               v = s[pos:pos+size]
+               if len(v) != size:
+                  _error("truncated string", pos)
+               pos += size
+               if encoding is not None and (kind != _DICT or key is not _NoKey):
+                  # Values (not dictionary keys) are converted like das.read does (das.ascii_or_unicode)
+                  try:
+                     v.decode("ascii")
+                  except UnicodeError:
+                     v = v.decode("utf-8" if tag == _UNICODE else encoding)
+               elif tag == _UNICODE:
+                  v = v.decode("utf-8")
+            elif tag == _INT or tag == _LONG:
+               v, = unpack_int(s, pos)
+               pos += 8
+               if tag == _LONG:
+                  v = long(v)
+            elif tag == _REAL:
+               v, = unpack_real(s, pos)
+               pos += 8
+            elif tag == _NONE:
+               v = None
+            elif tag == _TRUE:
+               v = True
+            elif tag == _FALSE:
+               v = False
+            elif tag in _Containers:
+               size, = unpack_size(s, pos)
+               pos += 4
+               stack.append((cur, kind, remaining, key))
+               cur, kind, remaining, key = _Containers[tag](), tag, (size * 2 if tag == _DICT else size), _NoKey
+               continue
+            elif tag == _BIGINT or tag == _BIGLONG:
+               size, = unpack_size(s, pos)
+               pos += 4
+               v = long(s[pos:pos+size])
+               pos += size
+               if tag == _BIGINT:
+                  v = int(v)
+            elif tag == _COMPLEX:
+               real, imag = _Complex.unpack_from(s, pos)
+               pos += 16
+               v = complex(real, imag)
+            elif tag == _REPR:
+               size, = unpack_size(s, pos)
+               pos += 4
+               try:
+                  v = das.parser.parse(s[pos:pos+size], names=names)
+               except das.ParseError, e:
+                  _error("cannot evaluate %s (%s)" % (repr(s[pos:pos+size]), e), pos)
+               pos += size
+            else:
+               _error("unknown tag %s" % repr(tag), pos - 1)
+
+         # Add value to current container
+         remaining -= 1
+         if kind == _DICT:
+            if key is _NoKey:
+               key = v
+            else:
+               cur[key] = v
+               key = _NoKey
+         else:
+            cur.append(v)
+
+   except IndexError:
+      _error("unexpected end of data", pos)
+   except struct.error:
+      _error("unexpected end of data", pos)
+
+   if pos != n:
+      _error("unexpected data after value", pos)
+
+   return v[0]
+
+
+def _resolve(st):
+   # Deprecated types are kept (they accept None and warn when used, see _Builder.build)
+   while True:
+      if isinstance(st, das.schematypes.SchemaType):
+         st = st._get_plan().type
+      elif isinstance(st, das.schematypes.Optional) and not isinstance(st, das.schematypes.Deprecated):
+         st = st.type
+      else:
+         return st
+
+
+# Schema type kinds while rebuilding
+_SCALAR, _STRUCT, _SEQUENCE, _SETTYPE, _TUPLETYPE, _DICTTYPE, _OTHER = range(7)
+
+_Scalars = (das.schematypes.Boolean, das.schematypes.Integer, das.schematypes.Real, das.schematypes.String, das.schematypes.Empty)
+
+
+class _Builder(object):
+   # Rebuild das types for a value previously validated using a schema type, without validation
+   #   Values not matching the expected layout and types requiring validation to be interpreted
+   #   (Or, Class, Deprecated, ...) are validated using the original schema type
+   def __init__(self):
+      super(_Builder, self).__init__()
+      # schema type id -> (schema type, resolved schema type, kind, mixins)
+      self._infos = {}
+
+   def _info(self, schema_type):
+      info = self._infos.get(id(schema_type), None)
+      if info is None or info[0] is not schema_type:
+         st = _resolve(schema_type)
+         mixins = None
+         if isinstance(st, _Scalars):
+            kind = _SCALAR
+         elif isinstance(st, das.schematypes.Struct):
+            kind = _STRUCT
+         elif isinstance(st, das.schematypes.Sequence):
+            kind = _SEQUENCE
+         elif isinstance(st, das.schematypes.Set):
+            kind = _SETTYPE
+         elif isinstance(st, das.schematypes.Tuple):
+            kind = _TUPLETYPE
+         elif isinstance(st, das.schematypes.Dict):
+            kind = _DICTTYPE
+         else:
+            kind = _OTHER
+         if kind != _SCALAR and kind != _OTHER:
+            stn = st._get_plan().name
+            if stn:
+               mixins = das.get_registered_mixins(stn)
+            else:
+               mixins = st.get_property("mixins", None)
+         info = (schema_type, st, kind, mixins)
+         self._infos[id(schema_type)] = info
+      return info
+
+   def build(self, value, schema_type):
+      _, st, kind, mixins = self._info(schema_type)
+      build = self.build
+
+      if kind == _SCALAR:
+         return value
+
+      elif kind == _STRUCT:
+         if type(value) is not dict:
+            return schema_type.validate(value)
+         plan = st._get_plan()
+         keys, reserved = plan.keys, plan.reserved
+         infos = self._infos
+         rv = das.types.Struct()
+         rvvalues = rv._dict
+         for k, v in value.iteritems():
+            entry = keys.get(k, None)
+            if entry is None or entry[2] is not None:
+               # Unknown key or alias
+               return schema_type.validate(value)
+            vt = entry[0]
+            if entry[1]:
+               # Deprecated field: value is rebuilt using the deprecated type, with the warning
+               #   das.read prints (see das.schematypes.Struct._validate_fields)
+               v = (vt.validate(v) if v is None else build(v, vt.type))
+               das.print_once("[das] Field %s is deprecated" % repr(k) if not vt.message else vt.message)
+            else:
+               info = infos.get(id(vt), None)
+               if info is None or info[0] is not vt:
+                  info = self._info(vt)
+               if info[2] != _SCALAR:
+                  v = build(v, vt)
+            if k in reserved or (isinstance(v, das.schematypes._Containers) and not isinstance(v, das.types.TypeBase)):
+               rv[k] = v
+            else:
+               rvvalues[k] = v
+         rv._link_values(rvvalues.itervalues())
+
+      elif kind == _SEQUENCE:
+         if type(value) is not list:
+            return schema_type.validate(value)
+         vt = st.type
+         if self._info(vt)[2] == _SCALAR:
+            rv = das.types.Sequence(value)
+         else:
+            rv = das.types.Sequence([build(x, vt) for x in value])
+
+      elif kind == _SETTYPE:
+         if type(value) is not set:
+            return schema_type.validate(value)
+         vt = st.type
+         if self._info(vt)[2] == _SCALAR:
+            rv = das.types.Set(value)
+         else:
+            rv = das.types.Set([build(x, vt) for x in value])
+
+      elif kind == _TUPLETYPE:
+         if type(value) is not tuple or len(value) != len(st.types):
+            return schema_type.validate(value)
+         rv = das.types.Tuple([build(x, t) for x, t in zip(value, st.types)])
+
+      elif kind == _DICTTYPE:
+         if type(value) is not dict:
+            return schema_type.validate(value)
+         rv = das.types.Dict()
+         vtype, overrides = st.vtype, st.vtypeOverrides
+         setitem = dict.__setitem__
+         for k, v in value.iteritems():
+            setitem(rv, k, build(v, overrides.get(str(k), vtype) if overrides else vtype))
+         rv._link_values(dict.itervalues(rv))
+
+      else:
+         return schema_type.validate(value)
+
+      rv._set_schema_type(st)
+      if mixins:
+         das.mixin.bind(mixins, rv)
+      return rv
+
+
+def build(value, schema_type):
+   return _Builder().build(value, schema_type)
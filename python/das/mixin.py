@@ -30,7 +30,12 @@ class Mixin(object):
       super(Mixin, self).__init__()
 
 
+# dynamic class -> (class mixin was added to, mixin, original class, bound mixins tuple)
 _DynamicClasses = {}
+# (class, mixin) -> dynamic class
+_DerivedClasses = {}
+# (instance class, schema type id, mixins, reset, force) -> (schema type, registry generation, (class, mixins) or None)
+_BindCache = {}
 _IgnoreMethods = set(["__init__", "__del__"])
 
 def is_method(klass, name):
@@ -67,34 +72,48 @@ def list_methods(klass):
    return filter(lambda x: is_instance_method(klass, x) and x not in _IgnoreMethods, dir(klass))
 
 
+def reset_bind_cache():
+   # Called when registered mixins change
+   _BindCache.clear()
+
+
 def get_bound_mixins(instance):
-   iclass = instance.__class__
-   iclassname = iclass.__name__
-   rv = []
+   info = _DynamicClasses.get(instance.__class__, None)
+   return ([] if info is None else list(info[3]))
 
-   cclassname = iclassname
-   _, b, m = _DynamicClasses.get(cclassname, (None, None, None))
-   while b is not None:
-      rv.append(m)
-      cclassname = b.__name__
-      _, b, m = _DynamicClasses.get(cclassname, (None, None, None))
 
-   rv.reverse()
+def has_bound_mixins(instance):
+   return (instance.__class__ in _DynamicClasses)
 
-   return rv
 
+def _derive(cclass, mixin):
+   # Class adding mixin to cclass, created once
+   klass = _DerivedClasses.get((cclass, mixin), None)
 
-def has_bound_mixins(instance):
-   return (instance.__class__.__name__ in _DynamicClasses)
+   if klass is None:
+      bmeths = set(list_methods(cclass))
+      fmeths = set(list_methods(mixin))
+      for n in bmeths.intersection(fmeths):
+         das.print_once("[das] Method '%s' from mixin '%s' is shadowed" % (n, mixin.__name__))
 
+      cclassname = cclass.__name__ + "_" + mixin.__module__.split(".")[-1] + "_" + mixin.__name__
+      klass = type(cclassname, (cclass, mixin), {})
 
-def bind(mixins, instance, reset=False, verbose=False, force=False):
-   if instance is None or not mixins:
-      return instance
+      _, _, original, bound = _DynamicClasses.get(cclass, (None, None, cclass, ()))
+      _DynamicClasses[klass] = (cclass, mixin, original, bound + (mixin,))
+      _DerivedClasses[(cclass, mixin)] = klass
+
+      # Also add class to the module the mixin is coming from
+      mod = importlib.import_module(mixin.__module__)
+      setattr(mod, klass.__name__, klass)
+      setattr(klass, "__module__", mixin.__module__)
+
+   return klass
 
-   if not isinstance(instance, das.types.TypeBase):
-      raise BindError("Mixin can only be bound to das override types, got %s" % (type(instance).__name__))
 
+def _resolve(mixins, instance, reset=False, verbose=False, force=False):
+   # Returns the class to use for instance and the mixins to initialize, or None if one of the
+   #   mixins is already bound (and reset is not set)
    if not force:
       st = instance._get_schema_type()
       if st is None:
@@ -124,51 +143,43 @@ def bind(mixins, instance, reset=False, verbose=False, force=False):
                raise SchemaTypeError("Schema type mismatch for mixin '%s': Expected '%s', got '%s'" % (mixin.__name__, tst, stn))
 
    # Get the original class in use before any mixin were bound
-   iclass = instance.__class__
-   iclassname = iclass.__name__
-   _, baseclass, addclass = _DynamicClasses.get(iclassname, (None, iclass, None))
-   if not reset and addclass in mixins:
-      if verbose:
-         print("[das] '%s' already bound" % addclass.__name__)
-      return instance
-   if baseclass != instance.__class__:
-      cclass = baseclass
-      while cclass is not None:
-         baseclass = cclass
-         _, cclass, addclass = _DynamicClasses.get(cclass.__name__, (None, None, None))
-         if not reset and addclass in mixins:
+   _, _, baseclass, bound = _DynamicClasses.get(instance.__class__, (None, None, instance.__class__, ()))
+   if not reset:
+      for addclass in reversed(bound):
+         if addclass in mixins:
             if verbose:
                print("[das] '%s' already bound" % addclass.__name__)
-            return instance
-
-   klassname = "_".join([baseclass.__name__] + [x.__module__.split(".")[-1] + "_" + x.__name__ for x in mixins])
+            return None
 
-   klass = _DynamicClasses.get(klassname, (None, None, None))[0]
-
-   if klass is None:
-      cclass = baseclass
-      bmeths = set(list_methods(cclass))
+   klass = baseclass
+   for mixin in mixins:
+      klass = _derive(klass, mixin)
 
-      for mixin in mixins:
-         fmeths = set(list_methods(mixin))
-         i = bmeths.intersection(fmeths)
-         if i:
-            for n in i:
-               das.print_once("[das] Method '%s' from mixin '%s' is shadowed" % (n, mixin.__name__))
-         bmeths = bmeths.union(fmeths)
+   return (klass, mixins)
 
-         cclassname = cclass.__name__ + "_" + mixin.__module__.split(".")[-1] + "_" + mixin.__name__
-         klass = type(cclassname, (cclass, mixin), {})
 
-         _DynamicClasses[cclassname] = (klass, cclass, mixin)
+def bind(mixins, instance, reset=False, verbose=False, force=False):
+   if instance is None or not mixins:
+      return instance
 
-         # Also add class to the module the mixin is coming from
-         mod = importlib.import_module(mixin.__module__)
-         setattr(mod, klass.__name__, klass)
-         setattr(klass, "__module__", mixin.__module__)
+   if not isinstance(instance, das.types.TypeBase):
+      raise BindError("Mixin can only be bound to das override types, got %s" % (type(instance).__name__))
 
-         cclass = klass
+   # Class and mixins to initialize are resolved once for a given instance class, schema type
+   #   and mixins (cache is reset by das.register_mixins and schema types reloads)
+   st = (None if force else instance._get_schema_type())
+   key = (instance.__class__, id(st), (tuple(mixins) if isinstance(mixins, (tuple, list, set)) else mixins), reset, force)
+   entry = _BindCache.get(key, None)
+   if verbose or entry is None or entry[0] is not st or entry[1] != das.SchemaTypesRegistry.instance.generation:
+      rv = _resolve(mixins, instance, reset=reset, verbose=verbose, force=force)
+      entry = (st, das.SchemaTypesRegistry.instance.generation, rv)
+      _BindCache[key] = entry
+
+   rv = entry[2]
+   if rv is None:
+      return instance
 
+   klass, mixins = rv
    instance.__class__ = klass
 
    # Call all mixin __init__ function so they can initialize their internal state (if any)
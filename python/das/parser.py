@@ -0,0 +1,396 @@
+import re
+import codecs
+import string
+
+
+class ParseError(Exception):
+   def __init__(self, msg, line=None, column=None):
+      if line is not None:
+         msg = "%s (line %d, column %d)" % (msg, line, column)
+      super(ParseError, self).__init__(msg)
+      self.line = line
+      self.column = column
+
+
+_Blank = r"\s*(?:#[^\n]*\s*)*"
+_String = (r"[uUbB]?[rR]?(?:" +
+           r"'''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''|" +
+           r'"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""|' +
+           r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'|" +
+           r'"[^"\\\n]*(?:\\.[^"\\\n]*)*")')
+_Number = r"[-+]?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)[lLjJ]?"
+
+
+def _token_pattern(blank):
+   # Each match is made of:
+   #   1: a token (string, number, identifier, identifier followed by '(', opening or closing
+   #      character, or the empty string at end of input)
+   #   2: an optional separator following the token (',', ':' or '=')
+   # Leading blanks are skipped (adjacent string literals are matched as separate tokens)
+   return re.compile(blank + "(" +
+                     _String + "|" +
+                     _Number + "|" +
+                     r"[A-Za-z_]\w*(?:" + blank + r"\()?|" +
+                     r"[][{}()]|" +
+                     r"\Z)" +
+                     blank + "([,:=])?", re.DOTALL)
+
+
+# Skips comments
+_Token = _token_pattern(_Blank)
+
+# Used for sources without any '#' character
+_FastToken = _token_pattern(r"\s*")
+
+# Start of a string literal adjacent to the previous token
+_StringStart = re.compile(r"[uUbB]?[rR]?['\"]")
+
+_StringStarts = frozenset("'\"uUbBrR")
+
+_EscapeSeq = re.compile(r"\\(?:x[0-9a-fA-F]{2}|[0-7]{1,3}|.)", re.DOTALL)
+
+_NonAscii = re.compile(r"[^\x00-\x7f]")
+
+_Constants = {"True": True, "False": False, "None": None}
+
+# Builtin constructors that may appear in das files (pprint writes sets as 'set([...])')
+_Builtins = {"set": set, "frozenset": frozenset}
+
+# Encodings for which any byte lower than 0x80 is an ascii character.
+#   Sources using those can be tokenized without being decoded first
+_AsciiTransparent = set(["ascii", "utf-8", "latin-1", "iso8859-1"])
+
+# Calls kinds when decoding strings
+_PLAIN, _DECODED, _RAW = range(3)
+
+_BuiltinFuncs = set(_Builtins.values())
+
+# Token kinds (from first character)
+_STR, _NUM, _NAME, _OPEN, _CLOSE, _END = range(6)
+
+_TokenKinds = {"": _END, "'": _STR, '"': _STR}
+for _c in string.digits + "-+.":
+   _TokenKinds[_c] = _NUM
+for _c in string.ascii_letters + "_":
+   _TokenKinds[_c] = _NAME
+for _c in "[{(":
+   _TokenKinds[_c] = _OPEN
+for _c in "]})":
+   _TokenKinds[_c] = _CLOSE
+del(_c)
+
+# Container kinds
+_TOP, _LIST, _TUPLE, _DICT, _SET, _CALL = range(6)
+
+_Closers = {_LIST: "]", _TUPLE: ")", _DICT: "}", _SET: "}", _CALL: ")"}
+
+# Container states
+_NEED_ITEM = 0  # after opening character or separator: expect a item or closing character
+_NEED_CLOSE = 1 # after an item with no trailing separator: expect closing character
+_NEED_VALUE = 2 # after a dict key: expect value
+_NEED_KWARG = 3 # after a keyword argument name: expect value
+
+
+def _is_ascii_transparent(encoding):
+   try:
+      name = codecs.lookup(encoding).name
+   except LookupError:
+      raise ParseError("Unknown encoding '%s'" % encoding)
+   return (name in _AsciiTransparent or name.startswith("iso8859-") or name.startswith("cp125"))
+
+
+class Parser(object):
+   # When 'decode' is set (requires 'encoding'), strings are converted while parsing the same way
+   #   das.decode does (ascii strings as str, others as unicode) and 'decode' is applied to
+   #   names values and calls results:
+   #   - dictionary keys are kept as is
+   #   - calls to 'decoded_calls' callables get converted arguments (dictionary keys included)
+   #     and their results are left unchanged
+   #   - calls to other functions get arguments as parsed
+   def __init__(self, names=None, encoding=None, decode=None, decoded_calls=None):
+      super(Parser, self).__init__()
+      self.names = ({} if names is None else names)
+      self.encoding = encoding
+      self.decode = (decode if encoding is not None else None)
+      self.decoded_calls = (set() if decoded_calls is None else decoded_calls)
+      # When set, source is decoded to unicode before tokenization
+      self._decode_source = (encoding is not None and not _is_ascii_transparent(encoding))
+      self._src = None
+
+   def parse(self, s):
+      if self._decode_source and isinstance(s, str):
+         s = s.decode(self.encoding)
+      self._src = s
+      try:
+         return self._parse(s)
+      finally:
+         self._src = None
+
+   def _error(self, msg, pos):
+      line = self._src.count("\n", 0, pos) + 1
+      column = pos - (self._src.rfind("\n", 0, pos) + 1) + 1
+      raise ParseError(msg, line, column)
+
+   def _parse(self, s):
+      # Iterative parser: the current container state is kept in local variables,
+      #   enclosing ones are pushed on 'stack'
+      fast_strings = (not self._decode_source)
+      scan = (_Token if "#" in s else _FastToken).scanner(s).match
+      kinds = _TokenKinds
+      names = self.names
+      decode = self.decode
+      decoding = (decode is not None)
+      decoded_calls = self.decoded_calls
+      decode_string = self._decode_string
+      # Number of enclosing calls getting converted arguments / arguments as parsed
+      dcalls, rcalls = 0, 0
+      stack = []
+      ckind, cur, need, ckey = _TOP, [], _NEED_ITEM, None
+      m = None
+
+      for m in iter(scan, None):
+         tok, sep = m.group(1, 2)
+         kind = kinds[tok[:1]]
+
+         if kind == _STR:
+            if sep is None and s[m.end():m.end()+1] in _StringStarts:
+               v, m = self._strings(s, m, scan)
+               sep = m.group(2)
+            elif fast_strings and not "\\" in tok:
+               if tok[:3] == "'''" or tok[:3] == '"""':
+                  v = tok[3:-3]
+               else:
+                  v = tok[1:-1]
+            else:
+               v = self._string(tok)
+            if decoding and rcalls == 0 and (dcalls > 0 or ckind != _DICT or sep != ":"):
+               v = decode_string(v, m.start(1))
+
+         elif kind == _NUM:
+            if tok.isdigit() and (tok[0] != "0" or len(tok) == 1):
+               v = int(tok)
+            else:
+               v = self._number(tok, m.start(1))
+
+         elif kind == _NAME:
+            c = tok[-1]
+            if c == "(":
+               if sep is not None:
+                  self._error("Unexpected %s" % repr(sep), m.start(2))
+               name = tok[:-1].rstrip()
+               func = names.get(name, _Builtins.get(name, None))
+               if func is None or not callable(func):
+                  self._error("Call to '%s' not allowed" % name, m.start(1))
+               if not decoding or func in _BuiltinFuncs:
+                  mode = _PLAIN
+               elif func in decoded_calls:
+                  mode = _DECODED
+                  dcalls += 1
+               else:
+                  mode = _RAW
+                  rcalls += 1
+               stack.append((ckind, cur, need, ckey))
+               ckind, cur, need, ckey = _CALL, [func, [], {}, m.start(1), mode], _NEED_ITEM, None
+               continue
+            elif c == "'" or c == '"':
+               if sep is None and s[m.end():m.end()+1] in _StringStarts:
+                  v, m = self._strings(s, m, scan)
+                  sep = m.group(2)
+               else:
+                  v = self._string(tok)
+               if decoding and rcalls == 0 and (dcalls > 0 or ckind != _DICT or sep != ":"):
+                  v = decode_string(v, m.start(1))
+            elif sep == "=":
+               if ckind != _CALL or need != _NEED_ITEM:
+                  self._error("Unexpected '='", m.start(2))
+               ckey = str(tok)
+               need = _NEED_KWARG
+               continue
+            elif tok in _Constants:
+               v = _Constants[tok]
+            elif tok in names:
+               v = names[tok]
+               if decoding and rcalls == 0:
+                  v = decode(v)
+            else:
+               self._error("Unknown name '%s'" % tok, m.start(1))
+
+         elif kind == _OPEN:
+            if sep is not None:
+               self._error("Unexpected %s" % repr(sep), m.start(2))
+            stack.append((ckind, cur, need, ckey))
+            if tok == "[":
+               ckind, cur = _LIST, []
+            elif tok == "{":
+               ckind, cur = _DICT, {}
+            else:
+               ckind, cur = _TUPLE, []
+            need, ckey = _NEED_ITEM, None
+            continue
+
+         elif kind == _CLOSE:
+            if _Closers.get(ckind, None) != tok or need > _NEED_CLOSE:
+               self._error("Unexpected %s" % repr(tok), m.start(1))
+            if ckind == _TUPLE:
+               # parenthesized expression: '(value)'
+               if need == _NEED_CLOSE and len(cur) == 1:
+                  v = cur[0]
+               else:
+                  v = tuple(cur)
+            elif ckind == _CALL:
+               func, args, kwargs, callpos, mode = cur
+               try:
+                  v = func(*args, **kwargs)
+               except Exception, e:
+                  self._error("Call failed (%s)" % e, callpos)
+               if mode == _DECODED:
+                  dcalls -= 1
+               elif mode == _RAW:
+                  rcalls -= 1
+                  if rcalls == 0:
+                     v = decode(v)
+            else:
+               v = cur
+            ckind, cur, need, ckey = stack.pop()
+
+         else:
+            break
+
+         # Add value to current container
+         if need == _NEED_CLOSE:
+            self._error("Expected ',' or %s" % (repr(_Closers[ckind]) if ckind in _Closers else "end of input"), m.start(1))
+
+         elif ckind == _DICT:
+            if need == _NEED_VALUE:
+               cur[ckey] = v
+            elif sep == ":":
+               ckey = v
+               need = _NEED_VALUE
+               continue
+            elif not cur:
+               # '{a, b}' set literal
+               ckind, cur = _SET, set([v])
+            else:
+               self._error("Expected ':'", m.start(2) if sep else m.end())
+
+         elif ckind == _LIST or ckind == _TUPLE or ckind == _TOP:
+            cur.append(v)
+
+         elif ckind == _CALL:
+            if need == _NEED_KWARG:
+               cur[2][ckey] = v
+            elif cur[2]:
+               self._error("Non-keyword argument after keyword argument", m.start(1))
+            else:
+               cur[1].append(v)
+
+         else:
+            cur.add(v)
+
+         if sep is None:
+            need = _NEED_CLOSE
+         elif sep == "," and ckind != _TOP:
+            need = _NEED_ITEM
+         else:
+            self._error("Unexpected %s" % repr(sep), m.start(2))
+
+      if m is None or m.group(1) != "":
+         self._error("Invalid syntax", (0 if m is None else m.end()))
+      if stack:
+         self._error("Unexpected end of input", m.end())
+      if not cur:
+         self._error("No value found", m.end())
+      return cur[0]
+
+   def _decode_string(self, s, pos):
+      # Same as das.ascii_or_unicode
+      if _NonAscii.search(s) is None:
+         return (s if isinstance(s, str) else str(s))
+      elif isinstance(s, unicode):
+         return s
+      try:
+         return s.decode(self.encoding)
+      except UnicodeError, e:
+         self._error("String must be 'ascii' or '%s' encoded (%s)" % (self.encoding, e), pos)
+
+   def _number(self, tok, pos):
+      try:
+         if tok.isdigit() and (tok[0] != "0" or len(tok) == 1):
+            return int(tok)
+         c = tok[-1]
+         if c in "lL":
+            return long(tok[:-1], 0)
+         elif c in "jJ":
+            return complex(tok)
+         elif "x" in tok or "X" in tok:
+            return int(tok, 16)
+         elif "." in tok or "e" in tok or "E" in tok:
+            return float(tok)
+         else:
+            # octal
+            return int(tok, 0)
+      except ValueError, e:
+         self._error("Invalid number %s (%s)" % (repr(tok), e), pos)
+
+   def _strings(self, s, m, scan):
+      # Concatenate the string literal matched by 'm' and the ones adjacent to it
+      #   Returns the resulting value and the match of the last literal
+      rv = self._string(m.group(1))
+      while m.group(2) is None and _StringStart.match(s, m.end()):
+         m = scan()
+         rv += self._string(m.group(1))
+      return rv, m
+
+   def _string(self, tok):
+      i = 0
+      while tok[i] != "'" and tok[i] != '"':
+         i += 1
+      prefix = tok[:i].lower()
+      n = (3 if tok[i:i+3] in ("'''", '"""') else 1)
+      body = tok[i+n:-n]
+      isuni = ("u" in prefix)
+      israw = ("r" in prefix)
+
+      if isinstance(body, unicode):
+         # Source was decoded beforehand
+         if isuni:
+            if "\\" not in body:
+               return body
+            return body.encode("raw_unicode_escape").decode("raw_unicode_escape" if israw else "unicode_escape")
+         elif israw or "\\" not in body:
+            return body.encode(self.encoding)
+         else:
+            return self._decode_escapes(body)
+
+      else:
+         if isuni:
+            if self.encoding is not None:
+               if "\\" not in body:
+                  return body.decode(self.encoding)
+               body = body.decode(self.encoding).encode("raw_unicode_escape")
+            # Python assumes latin-1 for non-ascii characters in sources without encoding
+            return body.decode("raw_unicode_escape" if israw else "unicode_escape")
+         elif israw or "\\" not in body:
+            return body
+         else:
+            return body.decode("string_escape")
+
+   def _decode_escapes(self, body):
+      # Process escape sequences in a byte string literal from a decoded source, re-encoding
+      #   literal characters using the source encoding
+      parts = []
+      pos = 0
+      for m in _EscapeSeq.finditer(body):
+         parts.append(body[pos:m.start()].encode(self.encoding))
+         esc = m.group(0)
+         if ord(esc[-1]) > 127:
+            parts.append(esc.encode(self.encoding))
+         else:
+            parts.append(str(esc).decode("string_escape"))
+         pos = m.end()
+      parts.append(body[pos:].encode(self.encoding))
+      return "".join(parts)
+
+
+def parse(s, names=None, encoding=None, decode=None, decoded_calls=None):
+   return Parser(names=names, encoding=encoding, decode=decode, decoded_calls=decoded_calls).parse(s)
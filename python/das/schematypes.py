@@ -1,6 +1,8 @@
 import re
 import das
 import imp
+import time
+import threading
 
 
 class ValidationError(Exception):
@@ -8,8 +10,90 @@ class ValidationError(Exception):
       super(ValidationError, self).__init__(msg)
 
 
+class _ValidationPlan(object):
+   # Schema type data used during validation that doesn't depend on validated values
+   #   Compiled on first use and discarded when schema types registry cache is rebuilt
+   def __init__(self, name):
+      super(_ValidationPlan, self).__init__()
+      self.name = name
+      self.generation = das.SchemaTypesRegistry.instance.generation
+
+
+# Values adapted to das types when set in a das.types.Struct
+_Containers = (dict, list, tuple, set)
+
+
+class ValidationContext(object):
+   # Validation options, active for the current thread while used as a context manager
+   #   (or when passed to TypeValidator.validate)
+   #   compatible: missing struct fields are set to their default value and unknown ones
+   #               are ignored when all fields are set (see das.read 'strict_schema' argument)
+   #   lazy      : struct fields are validated on first access (see das.read 'lazy' argument)
+   #   schema    : name of the schema being loaded, for unqualified schema type names
+   def __init__(self, compatible=False, lazy=False, schema=""):
+      super(ValidationContext, self).__init__()
+      self.compatible = compatible
+      self.lazy = lazy
+      self.schema = schema
+
+   def derive(self, **kwargs):
+      # Copy of this context with some options overridden
+      options = {"compatible": self.compatible, "lazy": self.lazy, "schema": self.schema}
+      options.update(kwargs)
+      return ValidationContext(**options)
+
+   def __enter__(self):
+      _context_state.stack.append(self)
+      return self
+
+   def __exit__(self, type, value, traceback):
+      _context_state.stack.pop()
+      # Always re-raise exception
+      return False
+
+   def __repr__(self):
+      return "ValidationContext(compatible=%s, lazy=%s, schema=%s)" % (self.compatible, self.lazy, repr(self.schema))
+
+
+class _DefaultContext(ValidationContext):
+   # Used when no context is active in the current thread
+   #   Compatibility mode and schema follow the deprecated process wide Struct.CompatibilityMode
+   #   and TypeValidator.CurrentSchema attributes (das itself no longer modifies them)
+   lazy = False
+
+   def __init__(self): # pylint: disable=super-init-not-called
+      pass
+
+   @property
+   def compatible(self):
+      return Struct.CompatibilityMode
+
+   @property
+   def schema(self):
+      return TypeValidator.CurrentSchema
+
+
+class _ContextState(threading.local):
+   def __init__(self):
+      super(_ContextState, self).__init__()
+      # Active contexts, innermost last
+      self.stack = []
+
+
+_context_state = _ContextState()
+
+_default_context = _DefaultContext()
+
+
+def current_context():
+   stack = _context_state.stack
+   return (stack[-1] if stack else _default_context)
+
+
 class TypeValidator(object):
+   # Deprecated: schema name used when no ValidationContext is active (in any thread)
    CurrentSchema = ""
+   _plan = None
 
    def __init__(self, default=None, description=None, editable=True, hidden=False, __properties__=None, **kwargs):
       super(TypeValidator, self).__init__(**kwargs)
@@ -26,6 +110,15 @@ class TypeValidator(object):
       # if not "mixins" in self._properties:
       #    self._properties["mixins"] = []
 
+   def __getstate__(self):
+      # Compiled plan is not pickled
+      state = self.__dict__.copy()
+      state.pop("_plan", None)
+      return state
+
+   def __setstate__(self, state):
+      self.__dict__.update(state)
+
    def has_property(self, name):
       return (name in self._properties)
 
@@ -77,9 +170,29 @@ class TypeValidator(object):
    def is_type_compatible(self, st, key=None, index=None):
       return isinstance(st.real_type(), self.__class__)
 
-   def validate(self, value, key=None, index=None):
+   def _compile(self):
+      return _ValidationPlan(das.get_schema_type_name(self))
+
+   def _get_plan(self):
+      plan = self._plan
+      if plan is None or plan.generation != das.SchemaTypesRegistry.instance.generation:
+         plan = self._compile()
+         self._plan = plan
+      return plan
+
+   def _reset_plan(self):
+      self._plan = None
+
+   def validate(self, value, key=None, index=None, context=None):
+      # 'context': ValidationContext to validate with (defaults to the current thread's one)
+      if context is not None:
+         with context:
+            return self.validate(value, key=key, index=index)
       mixins = (None if not das.has_bound_mixins(value) else das.get_bound_mixins(value))
       rv = self._validate(value, key=key, index=index)
+      if mixins is None and not isinstance(rv, das.types.TypeBase):
+         # Mixins and global validation only apply to das types
+         return rv
       if mixins is not None:
          # Re-bind the same mixins that were found on original value
          das.mixin.bind(mixins, rv, reset=True)
@@ -87,7 +200,7 @@ class TypeValidator(object):
          # Bind registered mixins for return value type if nothing bound yet
          #   (give precedence to registry query as it might hanled the case
          #    schema type objects with yet no mixins bound)
-         stn = das.get_schema_type_name(self)
+         stn = self._get_plan().name
          if stn:
             mixins = das.get_registered_mixins(stn)
          else:
@@ -96,7 +209,8 @@ class TypeValidator(object):
             das.mixin.bind(mixins, rv)
 
       # Try to call custom validation function
-      return das.types.TypeBase.ValidateGlobally(rv)
+      #   (no need to run container validation again, _validate just did it)
+      return das.types.TypeBase.ValidateGlobally(rv, validate_self=False)
 
    def make_default(self):
       if not self.default_validated:
@@ -314,9 +428,18 @@ class Real(TypeValidator):
 
 
 class String(TypeValidator):
-   def __init__(self, default=None, choices=None, matches=None, strict=True, description=None, editable=True, hidden=False, __properties__=None):
+   # Incremented by String.InvalidateAllChoices
+   ChoicesGeneration = 0
+   # Expanded choices: (choices, generation, expiration time or None for static choices, (values list, values frozenset))
+   _choices_cache = None
+   choices_ttl = None
+
+   def __init__(self, default=None, choices=None, matches=None, strict=True, description=None, editable=True, hidden=False, __properties__=None, choices_ttl=None):
+      # choices_ttl: number of seconds the values returned by a 'choices' callable are kept
+      #              (None: called on each validation)
       super(String, self).__init__(default=("" if default is None else default), description=description, editable=editable, hidden=hidden, __properties__=__properties__)
       self.choices = choices
+      self.choices_ttl = choices_ttl
       self.strict = strict
       self.matches = None
       if choices is None and matches is not None:
@@ -327,22 +450,59 @@ class String(TypeValidator):
          else:
             raise Exception("String schema type 'matches' option must be a string or a compiled regular expression")
 
-   def _expand_choices(self, asSet=False):
-      if self.choices is None:
+   def __getstate__(self):
+      state = super(String, self).__getstate__()
+      state.pop("_choices_cache", None)
+      return state
+
+   def invalidate_choices(self):
+      # Call 'choices' again on next validation
+      #   Must also be called after static choices are modified in place
+      self._choices_cache = None
+
+   @classmethod
+   def InvalidateAllChoices(klass):
+      String.ChoicesGeneration += 1
+
+   def _get_choices(self):
+      # Returns (values list, values frozenset)
+      #   Static choices are frozen on first use and converted again only when 'choices' is set to
+      #   a different object (in place modifications require invalidate_choices)
+      choices = self.choices
+      if choices is None:
          return None
-      if callable(self.choices):
-         rv = map(lambda x: das.ascii_or_unicode(x), self.choices())
+      cache = self._choices_cache
+      if callable(choices):
+         ttl = self.choices_ttl
+         if ttl is None:
+            values = map(lambda x: das.ascii_or_unicode(x), choices())
+            return (values, frozenset(values))
+         if cache is not None and cache[0] is choices and cache[1] == String.ChoicesGeneration and time.time() < cache[2]:
+            return cache[3]
+         stamp = time.time() + ttl
+         values = map(lambda x: das.ascii_or_unicode(x), choices())
       else:
-         rv = self.choices
-      return (set(rv) if asSet else rv)
+         stamp = None
+         if cache is not None and cache[0] is choices and cache[1] == String.ChoicesGeneration:
+            return cache[3]
+         values = choices
+      rv = (values, frozenset(values))
+      self._choices_cache = (choices, String.ChoicesGeneration, stamp, rv)
+      return rv
+
+   def _expand_choices(self, asSet=False):
+      rv = self._get_choices()
+      if rv is None:
+         return None
+      return (rv[1] if asSet else rv[0])
 
    def _validate_self(self, value):
       if not isinstance(value, basestring):
          raise ValidationError("Expected a string value, got %s" % type(value).__name__)
       v = das.ascii_or_unicode(value)
       if self.choices is not None and self.strict:
-         choices = self._expand_choices()
-         if not v in choices:
+         choices, choiceset = self._get_choices()
+         if not v in choiceset:
             raise ValidationError("String value must be on of %s, got %s" % (repr(choices), repr(v)))
       if self.matches is not None and not self.matches.match(v):
          raise ValidationError("String value %s doesn't match pattern '%s'" % (repr(value), self.matches.pattern))
@@ -414,6 +574,8 @@ class String(TypeValidator):
             s += "]"
          sep = ", "
          s += "%sstrict=%s" % (sep, self.strict)
+         if self.choices_ttl is not None:
+            s += "%schoices_ttl=%s" % (sep, repr(self.choices_ttl))
       if self.matches is not None:
          s += "%smatches=%s" % (sep, repr(self.matches.pattern))
          sep = ", "
@@ -422,7 +584,7 @@ class String(TypeValidator):
       return s + ")"
 
    def copy(self):
-      return String(default=self.default, choices=self.choices, matches=self.matches, strict=self.strict, description=self.description, editable=self.editable, hidden=self.hidden, __properties__=self.get_properties())
+      return String(default=self.default, choices=self.choices, matches=self.matches, strict=self.strict, description=self.description, editable=self.editable, hidden=self.hidden, __properties__=self.get_properties(), choices_ttl=self.choices_ttl)
 
 
 class Set(TypeValidator):
@@ -717,6 +879,7 @@ class Tuple(TypeValidator):
 
 
 class Struct(TypeValidator, dict):
+   # Deprecated: compatibility mode used when no ValidationContext is active (in any thread)
    CompatibilityMode = False
 
    def __init__(self, __description__=None, __editable__=True, __hidden__=False, __order__=None, __extends__=None, __properties__=None, **kwargs):
@@ -753,7 +916,7 @@ class Struct(TypeValidator, dict):
       for exttype in tmp:
          _exttype = str(exttype)
          if not "." in _exttype:
-            _exttype = self.CurrentSchema + "." + _exttype
+            _exttype = current_context().schema + "." + _exttype
          if not _exttype in exttypes:
             exttypes.append(_exttype)
 
@@ -836,51 +999,93 @@ class Struct(TypeValidator, dict):
       self.default_validated = False
       self.default = None
 
+      self._reset_plan()
+
+   def _compile(self):
+      plan = super(Struct, self)._compile()
+      # Alias fields: (name, aliased field name, deprecated)
+      plan.aliases = []
+      # Other fields: (name, type, deprecated, optional)
+      plan.fields = []
+      # Field name -> (type, deprecated, aliased field name)
+      plan.keys = {}
+      # Fields that cannot be set directly in das.types.Struct internal dictionary
+      plan.reserved = set()
+      # Fields that must be set
+      plan.required = set()
+      for k, v in self.iteritems():
+         deprecated = isinstance(v, Deprecated)
+         aliasname = Alias.Name(v)
+         plan.keys[k] = (v, deprecated, aliasname)
+         if aliasname is not None:
+            plan.aliases.append((k, aliasname, deprecated))
+         else:
+            optional = isinstance(v, Optional)
+            plan.fields.append((k, v, deprecated, optional))
+            if not optional:
+               plan.required.add(k)
+            if hasattr(das.types.Struct, k) or hasattr(dict, k):
+               plan.reserved.add(k)
+      return plan
+
    def _validate_self(self, value):
-      if not isinstance(value, (dict, das.types.Struct)):
+      if isinstance(value, das.types.Struct):
+         # Read from internal dictionary directly
+         values = value._dict
+      elif isinstance(value, dict):
+         values = value
+      else:
          raise ValidationError("Expected a dict value, got %s" % type(value).__name__)
+      plan = self._get_plan()
+      stack = _context_state.stack
+      compat = (stack[-1] if stack else _default_context).compatible
       allfound = True
       aliasvalues = {}
-      for k, v in self.iteritems():
-         aliasname = self._aliases.get(k, None)
-         if aliasname is not None and k in value:
+      for k, aliasname, _ in plan.aliases:
+         if k in values:
             if aliasname in aliasvalues:
-               if aliasvalues[aliasname] != value[k]:
+               if aliasvalues[aliasname] != values[k]:
                   raise ValidationError("Conflicting alias values for '%s'" % aliasname)
             else:
-               aliasvalues[aliasname] = value[k]
-      for k, v in self.iteritems():
-         # Don't check aliases
-         if k in self._aliases:
-            continue
-         if not k in value:
+               aliasvalues[aliasname] = values[k]
+      for k, v, _, optional in plan.fields:
+         if not k in values:
             if k in aliasvalues:
                value[k] = aliasvalues[k]
-            elif not isinstance(v, Optional):
+            elif not optional:
                allfound = False
-               if self.CompatibilityMode:
+               if compat:
                   # das.print_once("[das] Use default value for field '%s'" % k)
                   value[k] = v.make_default()
                else:
                   raise ValidationError("Missing key '%s'" % k)
-         elif k in aliasvalues and value[k] != aliasvalues[k]:
+         elif aliasvalues and k in aliasvalues and values[k] != aliasvalues[k]:
             raise ValidationError("Conflicting alias values for '%s'" % k)
       # Ignore new keys only in compatibility mode if all base keys are fullfilled (forward compatibility)
-      if not self.CompatibilityMode or not allfound:
-         for k, _ in value.iteritems():
-            if not k in self:
+      if not compat or not allfound:
+         for k in values:
+            if not k in plan.keys:
                raise ValidationError("Unknown key '%s'" % k)
       return value
 
+   def _validate_removal(self, value, key):
+      # Check that a valid value remains valid once 'key' is removed from it
+      if current_context().compatible:
+         # Missing keys are set to their default values in compatibility mode
+         return self._validate_self(value)
+      if key in self._get_plan().required:
+         raise ValidationError("Missing key '%s'" % key)
+      return value
+
    def _validate(self, value, key=None, index=None):
+      plan = self._get_plan()
       if key is not None:
-         vtype = self.get(key, None)
-         if vtype is None:
+         entry = plan.keys.get(key, None)
+         if entry is None:
             # return das.adapt_value(value)
             raise ValidationError("Invalid key '%s'" % key)
          else:
-            deprecated = isinstance(vtype, Deprecated)
-            aliasname = Alias.Name(vtype)
+            vtype, deprecated, aliasname = entry
             if aliasname is not None:
                vtype = self[aliasname]
             vv = vtype.validate(value)
@@ -892,33 +1097,49 @@ class Struct(TypeValidator, dict):
             return vv
       else:
          self._validate_self(value)
-         actualkeys = set([item for item in value])
+         if not isinstance(value, das.types.Struct):
+            stack = _context_state.stack
+            if stack and stack[-1].lazy:
+               return das.types.Struct._make_lazy(value, self, stack[-1])
+         values = (value._dict if isinstance(value, das.types.Struct) else value)
          rv = das.types.Struct()
          # don't set schema type just yet
-         for k, v in self.iteritems():
-            # don't add aliases to dictionary
-            deprecated = isinstance(v, Deprecated)
-            aliasname = Alias.Name(v)
-            if aliasname is not None:
-               # Issue warning on deprecated field
-               if deprecated and k in actualkeys:
-                  message = "[das] Field %s is deprecated, use %s instead" % (repr(k), repr(aliasname))
-                  das.print_once(message)
-               continue
-            try:
-               vv = v.validate(value[k])
-               if vv is not None and deprecated:
-                  message = ("[das] Field %s is deprecated" % repr(k) if not v.message else v.message)
-                  das.print_once(message)
-               rv[k] = vv
-            except KeyError, e:
-               if not isinstance(v, Optional):
-                  raise ValidationError("Invalid value for key '%s': %s" % (k, e))
-            except ValidationError, e:
-               raise ValidationError("Invalid value for key '%s': %s" % (k, e))
+         self._validate_fields(values, rv)
          rv._set_schema_type(self)
          return rv
 
+   def _validate_fields(self, values, rv):
+      plan = self._get_plan()
+      rvvalues = rv._dict
+      # don't add aliases to dictionary, just issue warning on deprecated ones
+      for k, aliasname, deprecated in plan.aliases:
+         if deprecated and k in values:
+            message = "[das] Field %s is deprecated, use %s instead" % (repr(k), repr(aliasname))
+            das.print_once(message)
+      for k, v, deprecated, optional in plan.fields:
+         try:
+            vv = v.validate(values[k])
+            if vv is not None and deprecated:
+               message = ("[das] Field %s is deprecated" % repr(k) if not v.message else v.message)
+               das.print_once(message)
+            if k in plan.reserved or (isinstance(vv, _Containers) and not isinstance(vv, das.types.TypeBase)):
+               # Go through das.types.Struct checks and value adaptation
+               rv[k] = vv
+            else:
+               rvvalues[k] = vv
+         except KeyError, e:
+            if not optional:
+               raise ValidationError("Invalid value for key '%s': %s" % (k, e))
+         except ValidationError, e:
+            raise ValidationError("Invalid value for key '%s': %s" % (k, e))
+      rv._link_values(rvvalues.itervalues())
+
+   def _validate_lazy_fields(self, values, rv, context):
+      # Called on first access to a lazily read das.types.Struct (values that are structs stay lazy)
+      #   'context' is the lazy ValidationContext struct was read with
+      with context:
+         self._validate_fields(values, rv)
+
    def _decode(self, encoding):
       super(Struct, self)._decode(encoding)
       for k in self.keys():
@@ -1076,6 +1297,12 @@ class Struct(TypeValidator, dict):
       self.default_validated = False
       self.default = None
 
+      self._reset_plan()
+
+   def __reduce_ex__(self, protocol):
+      # Internal state must be restored before fields (see __setitem__)
+      return (_restore_struct, (self.__class__, self.__getstate__(), dict(self)))
+
    def __setitem__(self, k, v):
       super(Struct, self).__setitem__(k, v)
       self._update_internals()
@@ -1113,6 +1340,13 @@ class Struct(TypeValidator, dict):
                     **kwargs)
 
 
+def _restore_struct(klass, state, fields):
+   rv = klass.__new__(klass)
+   rv.__dict__.update(state)
+   dict.update(rv, fields)
+   return rv
+
+
 class StaticDict(Struct):
    def __init__(self, __description__=None, __editable__=True, __hidden__=False, __order__=None, __properties__=None, **kwargs):
       super(StaticDict, self).__init__(__description__=__description__, __editable__=__editable__, __hidden__=__hidden__, __order__=__order__, __properties__=__properties__, **kwargs)
@@ -1319,6 +1553,102 @@ class Class(TypeValidator):
       return Class(self.klass, default=self.default, description=self.description, editable=self.editable, hidden=self.hidden, __properties__=self.get_properties())
 
 
+def _accepted_types(st, visiting=None):
+   # Python types of the values a schema type may accept (None if it cannot be told), and the
+   #   Struct schema type values are validated with (if any)
+   extra = ()
+   while True:
+      t = type(st)
+      if t is SchemaType:
+         try:
+            st = st._get_plan().type
+         except das.UnknownSchemaError:
+            # Reported when validating with this alternative
+            return (None, None)
+      elif t is Optional:
+         st = st.type
+      elif t is Deprecated:
+         # None is accepted as is
+         extra = (type(None),)
+         st = st.type
+      else:
+         break
+   if t is Boolean:
+      types = (bool, basestring)
+   elif t is Integer:
+      types = ((int, long) if st.enum is None else (int, long, basestring))
+   elif t is Real:
+      types = (int, long, float)
+   elif t is String:
+      types = (basestring,)
+   elif t is Empty:
+      types = (type(None),)
+   elif t is Sequence or t is Set:
+      types = (tuple, list, set)
+   elif t is Tuple:
+      types = (list, tuple)
+   elif t is Struct or t is StaticDict:
+      return ((dict, das.types.Struct) + extra, st)
+   elif t is Dict or t is DynamicDict:
+      types = (dict, das.types.Struct)
+   elif t is Or:
+      if visiting is None:
+         visiting = set()
+      elif id(st) in visiting:
+         # Recursive type
+         return (None, None)
+      visiting.add(id(st))
+      types = ()
+      for typ in st.types:
+         ttypes, _ = _accepted_types(typ, visiting)
+         if ttypes is None:
+            return (None, None)
+         types += ttypes
+   else:
+      return (None, None)
+   return (types + extra, None)
+
+
+class _OrDispatch(object):
+   # Or alternatives that may accept values of a given type
+   def __init__(self, types):
+      super(_OrDispatch, self).__init__()
+      self.types = types
+      self.accepted = [_accepted_types(typ) for typ in types]
+      # value type -> (alternatives, [(alternative, struct schema type), ...] or None)
+      self.candidates = {}
+
+   def get(self, value, strict=True):
+      vt = type(value)
+      entry = self.candidates.get(vt, None)
+      if entry is None:
+         alternatives = []
+         structs = []
+         for typ, (types, st) in zip(self.types, self.accepted):
+            if types is None or issubclass(vt, types):
+               alternatives.append(typ)
+               structs.append((typ, st))
+         entry = (alternatives, (structs if any(st is not None for _, st in structs) else None))
+         self.candidates[vt] = entry
+      alternatives, structs = entry
+      if not strict or structs is None:
+         return alternatives
+      # Skip structs missing a required field or having an unknown one
+      #   (not in compatibility mode where missing fields get default values)
+      values = (value._dict if isinstance(value, das.types.Struct) else value)
+      rv = []
+      for typ, st in structs:
+         if st is not None:
+            plan = st._get_plan()
+            keys = plan.keys
+            if any(not k in keys for k in values):
+               continue
+            if not plan.aliases and any(not k in values for k in plan.required):
+               continue
+         rv.append(typ)
+      return rv
+
+
 class Or(TypeValidator):
    def __init__(self, *types, **kwargs):
       super(Or, self).__init__(default=kwargs.get("default", None), description=kwargs.get("description", None), editable=kwargs.get("editable", True), hidden=kwargs.get("hidden", False), __properties__=kwargs.get("__properties__", None))
@@ -1326,55 +1656,89 @@ class Or(TypeValidator):
          raise Exception("Schema type 'Or' requires at least two types") 
       self.types = types
 
-   def _validate_self(self, value):
+   def _compile(self):
+      plan = super(Or, self)._compile()
+      plan.dispatch = _OrDispatch(self.types)
+      return plan
+
+   def _alternatives(self, value, strict=True):
+      plan = self._get_plan()
+      if plan.dispatch.types is not self.types:
+         self._reset_plan()
+         plan = self._get_plan()
+      return plan.dispatch.get(value, strict=strict)
+
+   def _try_alternatives(self, ctx, value, func, key=None, index=None):
+      # Validate using the first matching alternative, trying only the ones that may accept value
+      #   Returns (True, validated value, None) or (False, None, {alternative id: error message})
+      if key is not None or index is not None:
+         # Value is a container element
+         alternatives = self.types
+         strict_alternatives = self.types
+      else:
+         alternatives = None
+         strict_alternatives = self._alternatives(value)
       # even in compat mode, look for an exact match first
-      if Struct.CompatibilityMode:
+      if ctx.compatible:
          rv = None
-         Struct.CompatibilityMode = False
-         for typ in self.types:
-            try:
-               rv = typ._validate_self(value)
-               break
-            except ValidationError, e:
-               continue
-         Struct.CompatibilityMode = True
+         with ctx.derive(compatible=False):
+            for typ in strict_alternatives:
+               try:
+                  rv = func(typ)
+                  break
+               except ValidationError:
+                  continue
          if rv is not None:
-            return rv
-      emsgs = []
-      for typ in self.types:
+            return (True, rv, None)
+         if alternatives is None:
+            alternatives = self._alternatives(value, strict=False)
+      else:
+         alternatives = strict_alternatives
+      errors = {}
+      for typ in alternatives:
          try:
-            return typ._validate_self(value)
+            return (True, func(typ), None)
          except ValidationError, e:
-            emsgs.append(str(e))
-            continue
-      emsg = "Value of type %s doesn't match any of the allowed types" % type(value).__name__
-      emsg += "".join(["\n  Type %d error: %s" % (x, emsgs[x]) for x in xrange(len(emsgs))])
-      raise ValidationError(emsg)
+            errors[id(typ)] = str(e)
+      return (False, None, errors)
 
-   def _validate(self, value, key=None, index=None):
-      if Struct.CompatibilityMode:
-         rv = None
-         Struct.CompatibilityMode = False
-         for typ in self.types:
-            try:
-               rv = typ.validate(value, key=key, index=index)
-               break
-            except ValidationError, e:
-               continue
-         Struct.CompatibilityMode = True
-         if rv is not None:
-            return rv
+   def _validate_all(self, value, func, errors):
+      # Build error messages once all alternatives that may accept value failed
+      #   Tried alternatives are not validated again: in compatibility mode, Struct validation
+      #   sets missing fields in value and a second pass could then accept the wrong alternative
       emsgs = []
       for typ in self.types:
-         try:
-            return typ.validate(value, key=key, index=index)
-         except ValidationError, e:
-            emsgs.append(str(e))
-            continue
+         emsg = errors.get(id(typ), None)
+         if emsg is None:
+            # Alternative doesn't accept value type
+            try:
+               return func(typ)
+            except ValidationError, e:
+               emsg = str(e)
+         emsgs.append(emsg)
       emsg = "Value of type %s doesn't match any of the allowed types" % type(value).__name__
       emsg += "".join(["\n  Type %d error: %s" % (x, emsgs[x]) for x in xrange(len(emsgs))])
       raise ValidationError(emsg)
 
+   def _validate_self(self, value):
+      stack = _context_state.stack
+      ctx = (stack[-1] if stack else _default_context)
+      func = lambda typ: typ._validate_self(value)
+      found, rv, errors = self._try_alternatives(ctx, value, func)
+      return (rv if found else self._validate_all(value, func, errors))
+
+   def _validate(self, value, key=None, index=None):
+      stack = _context_state.stack
+      ctx = (stack[-1] if stack else _default_context)
+      if ctx.lazy:
+         # Alternatives are fully validated to find the matching one
+         with ctx.derive(lazy=False):
+            return self._validate(value, key=key, index=index)
+      func = lambda typ: typ.validate(value, key=key, index=index)
+      found, rv, errors = self._try_alternatives(ctx, value, func, key=key, index=index)
+      # Error messages are only built once all possible alternatives failed
+      return (rv if found else self._validate_all(value, func, errors))
+
    def is_type_compatible(self, st, key=None, index=None):
       _st = st.real_type()
       if _st is None:
@@ -1638,17 +2002,20 @@ class SchemaType(TypeValidator):
    def __init__(self, name, default=None, description=None, editable=True, hidden=False, __properties__=None):
       super(SchemaType, self).__init__(default=default, description=description, editable=editable, hidden=hidden, __properties__=__properties__)
       if not "." in name:
-         self.name = self.CurrentSchema + "." + name
+         self.name = current_context().schema + "." + name
       else:
          self.name = name
 
+   def _compile(self):
+      plan = super(SchemaType, self)._compile()
+      plan.type = das.get_schema_type(self.name)
+      return plan
+
    def _validate_self(self, value):
-      st = das.get_schema_type(self.name)
-      return st._validate_self(value)
+      return self._get_plan().type._validate_self(value)
 
    def _validate(self, value, key=None, index=None):
-      st = das.get_schema_type(self.name)
-      return st.validate(value, key=key, index=index)
+      return self._get_plan().type.validate(value, key=key, index=index)
 
    def real_type(self, parent=None):
       return das.get_schema_type(self.name).real_type(parent=parent)
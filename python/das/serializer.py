@@ -0,0 +1,218 @@
+import das
+
+
+# Number of buffered strings before output stream is written to
+_ChunkSize = 8192
+
+# Container kinds
+_DICT, _STRUCT, _LIST, _SET = range(4)
+
+# Value types written using repr (tuples and other types are handled in the general case)
+_Reprs = set([int, long, float, bool, complex, type(None)])
+_Strings = set([str, unicode])
+
+
+def _check_key(k):
+   # We assume string keys are 'ascii'
+   if isinstance(k, unicode):
+      try:
+         k.encode("ascii")
+      except:
+         raise Exception("Non-ascii keys are not supported!")
+   elif isinstance(k, str):
+      try:
+         k.decode("ascii")
+      except:
+         raise Exception("Non-ascii keys are not supported!")
+
+
+class Serializer(object):
+   # Produces the same output as the original recursive das.pprint implementation:
+   #   - containers are processed using an explicit stack
+   #   - output is accumulated and written to stream in chunks
+   #   - das.types.Struct key orders are cached per schema type
+   def __init__(self, indent="  ", encoding=None):
+      super(Serializer, self).__init__()
+      self.indent = indent
+      self.encoding = encoding
+      # schema type id -> (schema type, ordered keys, ordered keys set)
+      self._orders = {}
+      # class -> True if das.types.Struct keys and values can be accessed directly
+      self._plain = {}
+      # keys already checked for non-ascii characters
+      self._checked = set()
+
+   def _is_plain_struct(self, klass):
+      # Mixins may override key ordering or item access
+      rv = self._plain.get(klass, None)
+      if rv is None:
+         rv = (klass.ordered_keys.im_func is das.types.Struct.ordered_keys.im_func and
+               klass.__getitem__.im_func is das.types.Struct.__getitem__.im_func)
+         self._plain[klass] = rv
+      return rv
+
+   def _struct_keys(self, d):
+      # Same as das._get_sorted_keys for a das.types.Struct without overrides
+      st = d.__dict__["_schema_type"]
+      dd = d._dict
+      if not isinstance(st, das.schematypes.Struct):
+         keys = sorted(dd)
+      else:
+         entry = self._orders.get(id(st), None)
+         if entry is None or entry[0] is not st:
+            order = st.ordered_keys()
+            entry = (st, list(order), set(order))
+            self._orders[id(st)] = entry
+         keys = [k for k in entry[1] if k in dd]
+         if not keys:
+            keys = [k for k in dd]
+         elif len(keys) != len(dd):
+            oset = entry[2]
+            keys += sorted([k for k in dd if not k in oset])
+      self._check_keys(keys)
+      return keys
+
+   def _check_keys(self, keys):
+      checked = self._checked
+      for k in keys:
+         if not k in checked:
+            _check_key(k)
+            checked.add(k)
+
+   def _string(self, d):
+      if isinstance(d, str):
+         try:
+            d.decode("ascii")
+         except Exception, e:
+            if not self.encoding:
+               raise Exception("Non-ascii string value found but no encoding provided (%s)." % e)
+            try:
+               return repr(d.decode(self.encoding))
+            except Exception, e:
+               raise Exception("Non-ascii string value cannot be decoded to '%s' (%s)." % (self.encoding, e))
+         s = d
+      else:
+         try:
+            s = d.encode("ascii")
+         except:
+            return repr(d)
+      # properly deal with multiline characters
+      # using repr here would solve the problem too but lead to less readable files
+      # -> line1\\nline1 -> eval -> line1\nline2
+      if "\n" in s:
+         return "'''" + s + "'''"
+      else:
+         return repr(s)
+
+   def _open(self, value, tindent, sep, stack, append):
+      # Write container opening characters and push it on stack. Returns False for non-containers
+      if isinstance(value, (dict, das.types.Struct)):
+         if isinstance(value, das.types.Struct):
+            if self._is_plain_struct(value.__class__):
+               kind, keys = _STRUCT, self._struct_keys(value)
+            else:
+               kind, keys = _DICT, das._get_sorted_keys(value)
+         elif type(value) is dict or type(value) is das.types.Dict:
+            kind, keys = _DICT, sorted(value)
+            self._check_keys(keys)
+         else:
+            kind, keys = _DICT, das._get_sorted_keys(value)
+         append("{\n")
+         stack.append((kind, value, keys, len(keys), tindent + self.indent, tindent + "}" + sep))
+      elif isinstance(value, list):
+         append("[\n")
+         stack.append((_LIST, value, iter(value), len(value), tindent + self.indent, tindent + "]" + sep))
+      elif isinstance(value, set):
+         append("set([\n")
+         stack.append((_SET, value, iter(value), len(value), tindent + self.indent, tindent + "])" + sep))
+      else:
+         return False
+      return True
+
+   def serialize(self, d, stream, depth=0, inline=False, eof=True):
+      parts = []
+      append = parts.append
+      string = self._string
+      reprs = _Reprs
+      strs = _Strings
+      # Stack entries: (kind, container, keys or iterator, item count, items indent, closing string)
+      #   Each frame position (next key index or remaining items) is kept in 'positions'
+      stack = []
+      positions = []
+
+      tindent = self.indent * depth
+      if not inline:
+         append(tindent)
+      if not self._open(d, tindent, "", stack, append):
+         if isinstance(d, basestring):
+            append(string(d))
+         else:
+            append(repr(d))
+      positions.append(0)
+
+      while stack:
+         kind, value, keys, n, iindent, closer = stack[-1]
+         i = positions[-1]
+         pushed = False
+
+         if kind == _LIST or kind == _SET:
+            while i < n:
+               v = next(keys)
+               i += 1
+               sep = (",\n" if i < n else "\n")
+               t = type(v)
+               if t in reprs:
+                  append(iindent)
+                  append(repr(v))
+                  append(sep)
+               elif t in strs:
+                  append(iindent)
+                  append(string(v))
+                  append(sep)
+               else:
+                  append(iindent)
+                  if self._open(v, iindent, sep, stack, append):
+                     pushed = True
+                     break
+                  append(string(v) if isinstance(v, basestring) else repr(v))
+                  append(sep)
+
+         else:
+            getitem = (value._dict.__getitem__ if kind == _STRUCT else value.__getitem__)
+            while i < n:
+               k = keys[i]
+               v = getitem(k)
+               i += 1
+               sep = (",\n" if i < n else "\n")
+               append(iindent)
+               append(repr(k))
+               append(": ")
+               t = type(v)
+               if t in reprs:
+                  append(repr(v))
+                  append(sep)
+               elif t in strs:
+                  append(string(v))
+                  append(sep)
+               elif self._open(v, iindent, sep, stack, append):
+                  pushed = True
+                  break
+               else:
+                  append(string(v) if isinstance(v, basestring) else repr(v))
+                  append(sep)
+
+         if pushed:
+            positions[-1] = i
+            positions.append(0)
+         else:
+            append(closer)
+            stack.pop()
+            positions.pop()
+
+         if len(parts) >= _ChunkSize:
+            stream.write("".join(parts))
+            del(parts[:])
+
+      if eof:
+         append("\n")
+      stream.write("".join(parts))
@@ -1,5 +1,6 @@
 import sys
 import das
+import threading
 import traceback
 
 
@@ -48,6 +49,98 @@ class GlobalValidationDisabled(object):
       return False
 
 
+class _BatchState(threading.local):
+   def __init__(self):
+      super(_BatchState, self).__init__()
+      # Active batches, innermost last
+      self.batches = []
+      # Objects already globally validated while a batch is being committed
+      self.validated = None
+
+
+_batch_state = _BatchState()
+
+
+class Batch(object):
+   # Defer container and global validation of modified das values until the
+   #   outermost batch exits. On failure, data is restored from a snapshot taken
+   #   when entering the batch
+   # Note: modified values that are not part of data are also validated on exit
+   #   but are not restored
+   def __init__(self, data):
+      super(Batch, self).__init__()
+      if not isinstance(data, (Struct, Sequence, Set, Dict)):
+         raise Exception("das.batch expects a das Struct, Sequence, Set or Dict value, got %s" % type(data).__name__)
+      self.data = data
+      self.snapshot = None
+      self.touched = {}
+
+   def __enter__(self):
+      self.snapshot = das.copy(self.data)
+      self.touched = {}
+      _batch_state.batches.append(self)
+      return self.data
+
+   def __exit__(self, type, value, traceback):
+      batches = _batch_state.batches
+      batches.pop()
+      if type is None:
+         try:
+            if batches:
+               # Let outer batch validate
+               batches[-1].touched.update(self.touched)
+            else:
+               self._commit()
+         except:
+            ec, ei, tb = sys.exc_info()
+            self._restore()
+            raise ec, ei, tb
+      else:
+         self._restore()
+      self.snapshot = None
+      self.touched = {}
+      # Always re-raise exception
+      return False
+
+   def _touch(self, inst):
+      self.touched[id(inst)] = inst
+
+   def _commit(self):
+      objs = self.touched.values()
+      # Container validation first...
+      for inst in objs:
+         st = inst._get_schema_type()
+         if st is not None:
+            st._validate_self(inst)
+      # ...then global validation, at most once per object
+      _batch_state.validated = set()
+      try:
+         for inst in objs:
+            inst._gvalidate(validate_self=False)
+      finally:
+         _batch_state.validated = None
+
+   def _restore(self):
+      data, snapshot = self.data, self.snapshot
+      if snapshot is None:
+         return
+      if isinstance(data, Struct):
+         data._dict.clear()
+         data._dict.update(snapshot._dict)
+         data._link_values(data._dict.itervalues())
+      elif isinstance(data, Sequence):
+         list.__setslice__(data, 0, len(data), list.__getslice__(snapshot, 0, len(snapshot)))
+         data._link_values(list.__iter__(data))
+      elif isinstance(data, Set):
+         set.clear(data)
+         set.update(data, set.copy(snapshot))
+         data._link_values(set.__iter__(data))
+      else:
+         dict.clear(data)
+         dict.update(data, dict.copy(snapshot))
+         data._link_values(dict.itervalues(data))
+
+
 class TypeBase(object):
    @classmethod
    def TransferGlobalValidator(klass, src, dst):
@@ -56,9 +149,9 @@ class TypeBase(object):
       return dst
 
    @classmethod
-   def ValidateGlobally(klass, inst):
+   def ValidateGlobally(klass, inst, validate_self=True):
       if isinstance(inst, klass):
-         inst._gvalidate()
+         inst._gvalidate(validate_self=validate_self)
       return inst
 
    def __init__(self, *args):
@@ -74,7 +167,20 @@ class TypeBase(object):
       return rv
 
    def _adapt_value(self, value, key=None, index=None):
-      return das.adapt_value(value, schema_type=self._get_schema_type(), key=key, index=index)
+      return self._link_value(das.adapt_value(value, schema_type=self._get_schema_type(), key=key, index=index))
+
+   def _link_value(self, value):
+      # Values stored in a container forward global validation to it
+      #   (link is set once here rather than on each read access)
+      if isinstance(value, TypeBase):
+         value.__dict__["_validate_globally_cb"] = self._gvalidate
+      return value
+
+   def _link_values(self, values):
+      cb = self._gvalidate
+      for value in values:
+         if isinstance(value, TypeBase):
+            value.__dict__["_validate_globally_cb"] = cb
 
    def _validate(self, schema_type=None):
       if schema_type is None:
@@ -83,21 +189,36 @@ class TypeBase(object):
          schema_type.validate(self)
       self._set_schema_type(schema_type)
 
-   def _gvalidate(self):
+   def _gvalidate(self, validate_self=True):
       st = self._get_schema_type()
       if st is not None:
-         # run self validation first (container validation)
-         st._validate_self(self)
-         if hasattr(self, "_is_global_validation_enabled"):
-            if not self._is_global_validation_enabled():
-               # Skip global validaton
+         state = _batch_state
+         if state.batches:
+            # Validation deferred until batch exits (nothing to defer for freshly validated
+            #   values with no global validation)
+            if validate_self or self._get_validate_globally_cb() is not None or hasattr(self.__class__, "_validate_globally"):
+               state.batches[-1]._touch(self)
+            return
+         if state.validated is not None:
+            if id(self) in state.validated:
                return
+            state.validated.add(id(self))
+         # run self validation first (container validation)
+         if validate_self:
+            st._validate_self(self)
+         if not self._is_global_validation_enabled():
+            # Skip global validaton
+            return
          gvcb = self._get_validate_globally_cb()
          if gvcb is not None:
-            gvcb()
-         if hasattr(self, "_validate_globally"):
+            # Modifying a child value cannot invalidate its parent container
+            gvcb(validate_self=False)
+         # _validate_globally is provided by mixin classes
+         #   (check on class to avoid going through Struct.__getattr__)
+         vgfunc = getattr(self.__class__, "_validate_globally", None)
+         if vgfunc is not None:
             try:
-               getattr(self, "_validate_globally")()
+               vgfunc(self)
             except:
                _, ei, tb = sys.exc_info()
                ei = das.ValidationError("Global Validation Failed (%s)" % str(ei))
@@ -128,18 +249,17 @@ class Tuple(TypeBase, tuple):
       # the core of the method, tuple is already created
       # Maybe because tuple is immutable?
       super(Tuple, self).__init__()
+      self._link_values(tuple.__iter__(self))
 
    def __add__(self, y):
       raise das.ValidationError("Expected a tuple of size %d, got %d" % (len(self), len(self) + len(y)))
 
-   def __getitem__(self, i):
-      return TypeBase.TransferGlobalValidator(self, super(Tuple, self).__getitem__(i))
-
 
 class Sequence(TypeBase, list):
    def __init__(self, *args):
       TypeBase.__init__(self)
       list.__init__(self, *args)
+      self._link_values(list.__iter__(self))
 
    def _wrap_index(self, i, n=None, clamp=False):
       if i < 0:
@@ -201,9 +321,6 @@ class Sequence(TypeBase, list):
       super(Sequence, self).__setitem__(i, self._adapt_value(y, index=i))
       self._gvalidate()
 
-   def __getitem__(self, i):
-      return TypeBase.TransferGlobalValidator(self, super(Sequence, self).__getitem__(i))
-
    def __delitem__(self, i):
       ii = self._wrap_index(i, clamp=False)
       item = super(Sequence, self).__getitem__(ii)
@@ -218,10 +335,6 @@ class Sequence(TypeBase, list):
             print("das.types.Sequence.__delitem__: Failed to recover sequence data (%s)" % e)
          raise ec, ei, tb
 
-   def __iter__(self):
-      for item in super(Sequence, self).__iter__():
-         yield TypeBase.TransferGlobalValidator(self, item)
-
    def __setslice__(self, i, j, y):
       oldvals = super(Sequence, self).__getslice__(i, j)
       newvals = [self._adapt_value(x, index=i+k) for k, x in enumerate(y)]
@@ -337,6 +450,7 @@ class Set(TypeBase, set):
    def __init__(self, args):
       TypeBase.__init__(self)
       set.__init__(self, args)
+      self._link_values(set.__iter__(self))
 
    def __iand__(self, y):
       oldvals = super(Set, self).copy()
@@ -442,10 +556,6 @@ class Set(TypeBase, set):
       else:
          return 1
 
-   def __iter__(self):
-      for item in super(Set, self).__iter__():
-         yield TypeBase.TransferGlobalValidator(self, item)
-
    def clear(self):
       oldvals = super(Set, self).copy()
       super(Set, self).clear()
@@ -527,6 +637,7 @@ class Dict(TypeBase, dict):
    def __init__(self, *args, **kwargs):
       TypeBase.__init__(self)
       dict.__init__(self, *args, **kwargs)
+      self._link_values(dict.itervalues(self))
 
    def _adapt_key(self, key):
       st = self._get_schema_type()
@@ -551,7 +662,7 @@ class Dict(TypeBase, dict):
          raise ec, ei, tb
 
    def __getitem__(self, k):
-      return TypeBase.TransferGlobalValidator(self, super(Dict, self).__getitem__(self._adapt_key(k)))
+      return super(Dict, self).__getitem__(self._adapt_key(k))
 
    def __delitem__(self, k):
       _k = self._adapt_key(k)
@@ -672,31 +783,60 @@ class Dict(TypeBase, dict):
             print("das.types.Dict.clear: Failed to recover dict data (%s)" % e)
          raise ec, ei, tb
 
-   def itervalues(self):
-      for v in super(Dict, self).itervalues():
-         yield TypeBase.TransferGlobalValidator(self, v)
 
-   def values(self):
-      return [x for x in self.itervalues()]
+# Held while a lazily read struct is materialized
+_materialize_lock = threading.RLock()
 
-   def iteritems(self):
-      for k, v in super(Dict, self).iteritems():
-         yield k, TypeBase.TransferGlobalValidator(self, v)
 
-   def items(self):
-      return [x for x in self.iteritems()]
+class _LazyDict(object):
+   # Non-data descriptor, only reached when a lazily read struct has no internal dictionary yet
+   #   Note: validation errors raised on first access are hidden by python 2 hasattr (hasattr(s, "field")
+   #   is then False), use "field" in s or _validate() on lazy structs instead
+   def __get__(self, inst, owner):
+      if inst is None:
+         return self
+      return inst._materialize()
 
 
 class Struct(TypeBase):
+   # Structs read in lazy mode (see das.read) validate their raw values on first access
+   _dict = _LazyDict()
+
    def __init__(self, *args, **kwargs):
       TypeBase.__init__(self)
       self.__dict__["_dict"] = {}
       self._update(*args, **kwargs)
 
+   @classmethod
+   def _make_lazy(klass, values, schema_type, context):
+      rv = klass.__new__(klass)
+      TypeBase.__init__(rv)
+      rv.__dict__["_schema_type"] = schema_type
+      rv.__dict__["_lazy_values"] = (values, context)
+      return rv
+
+   def _is_lazy(self):
+      return ("_lazy_values" in self.__dict__)
+
+   def _materialize(self):
+      d = self.__dict__
+      with _materialize_lock:
+         if not "_lazy_values" in d:
+            # Materialized by another thread
+            return d["_dict"]
+         values, context = d["_lazy_values"]
+         # Fields are filled in a separate struct (as das.schematypes.Struct._validate does) so that
+         #   other threads never see a partially filled dictionary
+         tmp = Struct()
+         d["_schema_type"]._validate_lazy_fields(values, tmp, context)
+         self._link_values(tmp._dict.itervalues())
+         d["_dict"] = tmp._dict
+         del(d["_lazy_values"])
+         return d["_dict"]
+
    def __getattr__(self, k):
       try:
-         k = self._get_alias(k)
-         return TypeBase.TransferGlobalValidator(self, self._dict[k])
+         return self._dict[self._get_alias(k)]
       except KeyError:
          if hasattr(self._dict, k):
             # Look for an override method of the same name prefixed by '_' in current class
@@ -723,7 +863,8 @@ class Struct(TypeBase):
          oldval = (self._dict[k] if wasset else None)
          self._dict[k] = self._adapt_value(v, key=k)
          try:
-            self._gvalidate()
+            # key and value were validated by _adapt_value
+            self._gvalidate(validate_self=False)
          except:
             ec, ei, tb = sys.exc_info()
             try:
@@ -740,7 +881,7 @@ class Struct(TypeBase):
       oldval = self._dict.get(k, None)
       self._dict.__delitem__(k)
       try:
-         self._gvalidate()
+         self._gvalidate_removal(k)
       except:
          ec, ei, tb = sys.exc_info()
          # Note: we can reach here only if k was a valid key (otherwise __delitem__(k) would fail)
@@ -751,8 +892,7 @@ class Struct(TypeBase):
          raise ec, ei, tb
 
    def __getitem__(self, k):
-      k = self._get_alias(k)
-      return TypeBase.TransferGlobalValidator(self, self._dict.__getitem__(k))
+      return self._dict[self._get_alias(k)]
 
    def __setitem__(self, k, v):
       k = self._get_alias(k)
@@ -761,7 +901,8 @@ class Struct(TypeBase):
       oldval = (self._dict[k] if wasset else None)
       self._dict.__setitem__(k, self._adapt_value(v, key=k))
       try:
-         self._gvalidate()
+         # key and value were validated by _adapt_value
+         self._gvalidate(validate_self=False)
       except:
          ec, ei, tb = sys.exc_info()
          try:
@@ -779,7 +920,7 @@ class Struct(TypeBase):
       oldval = self._dict.get(k, None)
       self._dict.__delitem__(k)
       try:
-         self._gvalidate()
+         self._gvalidate_removal(k)
       except:
          ec, ei, tb = sys.exc_info()
          # Note: we can reach here only if k was a valid key (otherwise __delitem__(k) would fail)
@@ -833,7 +974,7 @@ class Struct(TypeBase):
       oldval = self._dict.get(k, None)
       retval = self._dict.pop(k, *args)
       try:
-         self._gvalidate()
+         self._gvalidate_removal(k)
       except:
          ec, ei, tb = sys.exc_info()
          try:
@@ -847,7 +988,7 @@ class Struct(TypeBase):
    def _popitem(self):
       k, v = self._dict.popitem()
       try:
-         self._gvalidate()
+         self._gvalidate_removal(k)
       except:
          ec, ei, tb = sys.exc_info()
          try:
@@ -911,7 +1052,8 @@ class Struct(TypeBase):
             self._check_reserved(k)
             self._dict[k] = self._adapt_value(v, key=k)
 
-         self._gvalidate()
+         # keys and values were validated by _adapt_value
+         self._gvalidate(validate_self=False)
 
       except:
          ec, ei, tb = sys.exc_info()
@@ -922,15 +1064,26 @@ class Struct(TypeBase):
             print("das.types.Struct.update: Failed to recover struct data (%s)" % e)
          raise ec, ei, tb
 
-   def _get_alias(self, k):
+   def _gvalidate_removal(self, k):
+      # Only check that key 'k' could be removed rather than re-validating the whole struct
       st = self._get_schema_type()
-      if st is not None and st.has_key(k):
-         aliasname = das.schematypes.Alias.Name(st[k])
-         if aliasname is not None:
+      if st is not None:
+         if _batch_state.batches:
+            # Full check deferred to batch exit
+            self._gvalidate()
+         else:
+            st._validate_removal(self, k)
+            self._gvalidate(validate_self=False)
+
+   def _get_alias(self, k):
+      st = self.__dict__["_schema_type"]
+      if st is not None:
+         entry = st._get_plan().keys.get(k, None)
+         if entry is not None and entry[2] is not None:
             # if isinstance(st[k], das.schematypes.Deprecated):
             #    message = ("[das] Field %s is deprecated, use %s instead" % (repr(k), repr(aliasname)))
             #    das.print_once(message)
-            return aliasname
+            return entry[2]
       return k
 
    def _check_reserved(self, k):
@@ -958,16 +1111,14 @@ class Struct(TypeBase):
       return filter(lambda x: x in self, self._get_schema_type().ordered_keys())
 
    def _itervalues(self):
-      for v in self._dict.itervalues():
-         yield TypeBase.TransferGlobalValidator(self, v)
+      return self._dict.itervalues()
 
    def _values(self):
-      return [x for x in self.itervalues()]
+      return self._dict.values()
 
    def _iteritems(self):
-      for k, v in self._dict.iteritems():
-         yield k, TypeBase.TransferGlobalValidator(self, v)
+      return self._dict.iteritems()
 
    def _items(self):
-      return [x for x in self.iteritems()]
+      return self._dict.items()
 
@@ -4,7 +4,19 @@ import sys
 import imp
 import glob
 import copy
+import time
+import gc
+import hashlib
+import tempfile
+import threading
 import das
+try:
+   import cPickle as pickle
+except ImportError:
+   import pickle
+
+# Direct access to process environment dictionary (os.environ.get is noticeably slower)
+_Environ = getattr(os.environ, "data", os.environ)
 
 
 class UnknownSchemaError(Exception):
@@ -24,6 +36,10 @@ class Schema(object):
       self.location = location
       self.module = None
       self.types = {}
+      # Reverse index: id(validator) -> name
+      #   (built for 'types_indexed' types, a validator may be registered under several names)
+      self.type_names = {}
+      self.types_indexed = 0
       self.master_types = None
       self.version = None
       self.name = das.read_meta(path).get("name", None)
@@ -36,13 +52,73 @@ class Schema(object):
       if not dont_load:
          self.load()
 
+   def _cache_path(self):
+      if not das.__schema_cache__:
+         return None
+      h = hashlib.sha1(os.path.abspath(self.path).replace("\\", "/")).hexdigest()[:16]
+      return os.path.join(das.__schema_cache__, "%s-%s.pickle" % (self.name, h))
+
+   def _cache_key(self):
+      rv = [das.__version__, sys.version_info[:2]]
+      for path in (self.path, os.path.splitext(self.path)[0] + ".py"):
+         try:
+            st = os.stat(path)
+            rv.append((st.st_mtime, st.st_size))
+         except OSError:
+            rv.append(None)
+      return rv
+
+   def _read_cache(self):
+      # Returns (metadata, pickled types) or None
+      cp = self._cache_path()
+      if cp is None or not os.path.isfile(cp):
+         return None
+      try:
+         with open(cp, "rb") as f:
+            key, md, types = pickle.load(f)
+      except Exception, e:
+         if das.__verbose__:
+            print("[das] Failed to read schema cache '%s' (%s)" % (cp, e))
+         return None
+      if key != self._cache_key():
+         return None
+      return (md, types)
+
+   def _write_cache(self, md, types):
+      cp = self._cache_path()
+      if cp is None:
+         return
+      try:
+         # Pickle types first, don't write anything if they can't be
+         data = pickle.dumps((self._cache_key(), md, pickle.dumps(types, 2)), 2)
+         if not os.path.isdir(das.__schema_cache__):
+            os.makedirs(das.__schema_cache__)
+         # Write to a temporary file first as several processes may share the cache
+         fd, tmppath = tempfile.mkstemp(dir=das.__schema_cache__, suffix=".tmp")
+         try:
+            with os.fdopen(fd, "wb") as f:
+               f.write(data)
+            if sys.platform == "win32" and os.path.isfile(cp):
+               os.remove(cp)
+            os.rename(tmppath, cp)
+         except:
+            os.remove(tmppath)
+            raise
+      except Exception, e:
+         if das.__verbose__:
+            print("[das] Failed to write schema cache '%s' (%s)" % (cp, e))
+
    def load(self):
       if not self.path:
          return False
 
       self.unload()
 
-      md, content = das._read_file(self.path)
+      cached = self._read_cache()
+      if cached is not None:
+         md, content = cached
+      else:
+         md, content = das._read_file(self.path)
 
       dmv = md.get("das_minimum_version", None)
       if dmv is not None:
@@ -98,15 +174,31 @@ class Schema(object):
             if das.__verbose__:
                das.print_once("[das] Warning: Schema '%s' defined in %s is unversioned" % (self.name, self.path))
 
-         das.schematypes.TypeValidator.CurrentSchema = self.name
-         rv = das.read_string(content, encoding=md.get("encoding", None), **eval_locals)
-         das.schematypes.TypeValidator.CurrentSchema = ""
+         rv = None
+         if cached is not None:
+            # Schema module has to be loaded before types are unpickled (Class schema types)
+            # Disable garbage collection while creating lots of objects
+            gcenabled = gc.isenabled()
+            gc.disable()
+            try:
+               rv = pickle.loads(content)
+            except Exception, e:
+               if das.__verbose__:
+                  print("[das] Failed to load cached schema types for '%s' (%s)" % (self.path, e))
+               md, content = das._read_file(self.path)
+            finally:
+               if gcenabled:
+                  gc.enable()
+         if rv is None:
+            with das.schematypes.ValidationContext(schema=self.name):
+               rv = das.read_string(content, encoding=md.get("encoding", None), **eval_locals)
+            self._write_cache(md, rv)
          for typename, validator in rv.iteritems():
             k = "%s.%s" % (self.name, typename)
             if SchemaTypesRegistry.instance.has_schema_type(k):
                raise Exception("[das] Schema type '%s' already registered in another schema" % k)
             else:
-               self.types[k] = validator
+               self.add_type(k, validator)
 
          mt = md.get("master_types", None)
          if mt is not None:
@@ -123,7 +215,20 @@ class Schema(object):
          delattr(das.schema, self.module.__name__.split(".")[-1])
          self.module = None
       self.types = {}
+      self.type_names = {}
+      self.types_indexed = 0
       self.master_types = None
+      if self.location is not None:
+         self.location.invalidate_index()
+
+   def add_type(self, name, typ):
+      indexed = (self.types_indexed == len(self.types))
+      self.types[name] = typ
+      self.type_names.setdefault(id(typ), name)
+      if indexed:
+         self.types_indexed = len(self.types)
+      if self.location is not None:
+         self.location.invalidate_index()
 
    def list_types(self, sort=True, masters_only=False):
       rv = self.types.keys()
@@ -142,13 +247,24 @@ class Schema(object):
    def get_type(self, name):
       return self.types.get(name, None)
 
-   def get_type_name(self, typ):
+   def _index_types(self):
+      self.type_names = {}
       for k, v in self.types.iteritems():
-         if type(v) != type(typ):
-            continue
-         if v == typ:
-            return k
-      return ""
+         self.type_names.setdefault(id(v), k)
+      self.types_indexed = len(self.types)
+
+   def get_type_name(self, typ):
+      if self.types_indexed != len(self.types):
+         # types added or removed directly
+         self._index_types()
+      k = self.type_names.get(id(typ), None)
+      if k is not None and self.types.get(k, None) is not typ:
+         # types replaced directly
+         self._index_types()
+         k = self.type_names.get(id(typ), None)
+      if k is None or self.types.get(k, None) is not typ:
+         return ""
+      return k
 
 
 class SchemaLocation(object):
@@ -161,6 +277,8 @@ class SchemaLocation(object):
       else:
          self.path = None
       self.schemas = {}
+      # Lookup indices built from schemas on demand (see _get_index)
+      self.index = None
       if not dont_load:
          self.load_schemas()
 
@@ -180,11 +298,27 @@ class SchemaLocation(object):
          else:
             if schema.load():
                self.schemas[schema.name] = schema
+      self.index = None
 
    def unload_schemas(self):
       for _, schema in self.schemas.iteritems():
          schema.unload()
       self.schemas = {}
+      self.index = None
+
+   def invalidate_index(self):
+      self.index = None
+
+   def _get_index(self):
+      # Returns (name -> validator, id(validator) -> name) dictionaries
+      if self.index is None:
+         ntt, itn = {}, {}
+         for _, schema in self.schemas.iteritems():
+            for tname, ttype in schema.types.iteritems():
+               ntt.setdefault(tname, ttype)
+               itn.setdefault(id(ttype), tname)
+         self.index = (ntt, itn)
+      return self.index
 
    def list_schemas(self, sort=True):
       rv = self.schemas.keys()
@@ -210,25 +344,17 @@ class SchemaLocation(object):
       return rv
 
    def has_schema_type(self, name):
-      for _, schema in self.schemas.iteritems():
-         if schema.has_type(name):
-            return True
-      return False
+      return (name in self._get_index()[0])
 
    def get_schema_type(self, name):
-      for sname, schema in self.schemas.iteritems():
-         if name.startswith(sname+"."):
-            rv = schema.get_type(name)
-            if rv is not None:
-               return rv
-      return None
+      return self._get_index()[0].get(name, None)
 
    def get_schema_type_name(self, typ):
-      for _, schema in self.schemas.iteritems():
-         rv = schema.get_type_name(typ)
-         if rv:
-            return rv
-      return ""
+      ntt, itn = self._get_index()
+      rv = itn.get(id(typ), None)
+      if rv is None or ntt[rv] is not typ:
+         return ""
+      return rv
 
    def __cmp__(self, oth):
       p0 = os.path.abspath(self.path)
@@ -256,13 +382,29 @@ class SchemaTypesRegistry(object):
       self.dyntypes = {}
       self.cache = {"name_to_schema": {},
                     "name_to_type": {},
-                    "type_to_name": {}}
+                    "id_to_name": {}}
+      # Incremented each time the cache is rebuilt (used to invalidate compiled validation plans)
+      self.generation = 0
+      # Set once schemas have been loaded. DAS_SCHEMA_PATH value used for last load is kept
+      #   so that lookups only need a string comparison to detect a change
+      self.loaded = False
+      self.envpath = None
+      # Watcher settings (see watch())
+      #   'polling' is set when lookups can't just compare DAS_SCHEMA_PATH value
+      self.polling = True
+      self.watch_env = True
+      self.watch_interval = None
+      self.watch_stamp = None
+      self.watch_time = 0.0
+      # Held while schemas are loaded, lookups from other threads wait for the load to complete
+      self.lock = threading.RLock()
+      self.loading = 0
       SchemaTypesRegistry.instance = self
 
    def _rebuild_cache(self):
       nts = {}
       ntt = {}
-      ttn = {}
+      itn = {}
       for location in self.locations:
          for sname in location.list_schemas():
             schema = location.get_schema(sname)
@@ -272,19 +414,84 @@ class SchemaTypesRegistry(object):
                ttype = schema.get_type(tname)
                if not tname in ntt:
                   ntt[tname] = ttype
-               if not ttype in ttn:
-                  ttn[ttype] = tname
-      self.cache["name_to_schema"] = nts
-      self.cache["name_to_type"] = ntt
-      self.cache["type_to_name"] = ttn
-      for st in self.cache["type_to_name"]:
+               # Keyed by identity (Struct validators are dictionaries, comparing them is a deep
+               #   comparison). Validator is stored along the name so that stale ids can't match
+               if not id(ttype) in itn:
+                  itn[id(ttype)] = (tname, ttype)
+      # Replaced as a whole, lookups not waiting for the lock may still use the previous one
+      self.cache = {"name_to_schema": nts,
+                    "name_to_type": ntt,
+                    "id_to_name": itn}
+      self.generation += 1
+      for _, st in itn.itervalues():
          if isinstance(st, das.schematypes.Struct):
             st.load_extensions()
 
+   def _location_stamp(self):
+      # Modification times of schema directories and files, used to detect changes on disk
+      rv = []
+      for location in self.locations:
+         try:
+            rv.append((location.path, os.stat(location.path).st_mtime))
+         except OSError:
+            rv.append((location.path, None))
+         for sf in sorted(glob.glob(location.path + "/*.schema") + glob.glob(location.path + "/*.py")):
+            try:
+               st = os.stat(sf)
+               rv.append((sf, st.st_mtime, st.st_size))
+            except OSError:
+               pass
+      rv.sort()
+      return rv
+
+   def _check_loaded(self):
+      # Called by lookup methods
+      with self.lock:
+         self._check_loaded_locked()
+
+   def _check_loaded_locked(self):
+      if not self.loaded:
+         self.load_schemas()
+      elif self.watch_env and _Environ.get("DAS_SCHEMA_PATH", "") != self.envpath:
+         self.load_schemas()
+      elif self.watch_interval is not None:
+         t = time.time()
+         if t >= self.watch_time:
+            self.watch_time = t + self.watch_interval
+            if self._location_stamp() != self.watch_stamp:
+               if das.__verbose__:
+                  print("[das] Schema files changed, reload")
+               self.load_schemas(force=True)
+
+   def watch(self, env=True, interval=None):
+      # env     : reload schemas on lookup when DAS_SCHEMA_PATH has changed (default behaviour)
+      #           When disabled, load_schemas() must be called explicitely after modifying it
+      # interval: when set, also reload schemas when schema directories content has changed,
+      #           checking at most once every 'interval' seconds
+      self.watch_env = env
+      self.watch_interval = interval
+      self.watch_time = 0.0
+      self.polling = (not self.loaded or interval is not None)
+      if interval is not None and self.loaded:
+         self.watch_stamp = self._location_stamp()
+
    def load_schemas(self, paths=None, incremental=False, force=False):
+      with self.lock:
+         # Lookups go through _check_loaded until schemas are loaded
+         self.loading += 1
+         self.polling = True
+         try:
+            self._load_schemas(paths, force)
+         finally:
+            self.loading -= 1
+            self.polling = (self.loading > 0 or self.watch_interval is not None)
+
+   def _load_schemas(self, paths, force):
       incremental = (paths is not None)
+      self.loaded = True
       if not incremental:
          path = os.environ.get("DAS_SCHEMA_PATH", "")
+         self.envpath = path
          # Keep in mind paths added incrementally
          if self.addedpath:
             if path:
@@ -308,7 +515,7 @@ class SchemaTypesRegistry(object):
 
       self.cache = {"name_to_schema": {},
                     "name_to_type": {},
-                    "type_to_name": {}}
+                    "id_to_name": {}}
 
       if not incremental:
          locations = set()
@@ -364,10 +571,17 @@ class SchemaTypesRegistry(object):
                   location.load_schemas()
 
       self.path = path
+      if self.watch_interval is not None:
+         self.watch_stamp = self._location_stamp()
 
       # re register dynamically added schema types
       if len(self.dyntypes):
+         # schemas lookup is required to re register them
+         self._rebuild_cache()
          for k, v in self.dyntypes.iteritems():
+            if self.cache["name_to_type"].get(k, None) is v:
+               # schema wasn't reloaded
+               continue
             try:
                if not self._add_schema_type(k, v):
                   print("Failed to re register dynamically added type '%s' (already registered)" % k)
@@ -377,7 +591,7 @@ class SchemaTypesRegistry(object):
       self._rebuild_cache()
 
    def list_locations(self, sort=True):
-      self.load_schemas()
+      self._check_loaded()
       rv = [x.path for x in self.locations]
       if sort:
          rv.sort()
@@ -392,21 +606,21 @@ class SchemaTypesRegistry(object):
          return os.path.samefile(path0, path1)
 
    def get_location(self, path):
-      self.load_schemas()
+      self._check_loaded()
       for location in self.locations:
          if self._samepath(path, location.path):
             return location
       return None
 
    def list_schemas(self, sort=True):
-      self.load_schemas()
+      self._check_loaded()
       rv = self.cache["name_to_schema"].keys()
       if sort:
          rv.sort()
       return rv
 
    def list_schema_types(self, schema=None, sort=True, masters_only=False):
-      self.load_schemas()
+      self._check_loaded()
       if schema is None:
          rv = self.cache["name_to_type"].keys()
       else:
@@ -423,7 +637,7 @@ class SchemaTypesRegistry(object):
       return (name in self.cache["name_to_schema"])
 
    def get_schema(self, name):
-      self.load_schemas()
+      self._check_loaded()
       schema = self.cache["name_to_schema"].get(name)
       if schema is None:
          raise UnknownSchemaError(name)
@@ -433,15 +647,26 @@ class SchemaTypesRegistry(object):
       return (name in self.cache["name_to_type"])
 
    def get_schema_type(self, name):
-      self.load_schemas()
-      stype = self.cache["name_to_type"].get(name, None)
+      # Cache is read before 'polling': when a load has started since, 'polling' is set and
+      #   the lookup waits for the load to complete
+      cache = self.cache
+      if self.polling or _Environ.get("DAS_SCHEMA_PATH", "") != self.envpath:
+         self._check_loaded()
+         cache = self.cache
+      stype = cache["name_to_type"].get(name, None)
       if stype is None:
          raise UnknownSchemaError(name)
       return stype
 
    def get_schema_type_name(self, typ):
-      self.load_schemas()
-      return self.cache["type_to_name"].get(typ, "")
+      cache = self.cache
+      if self.polling or _Environ.get("DAS_SCHEMA_PATH", "") != self.envpath:
+         self._check_loaded()
+         cache = self.cache
+      entry = cache["id_to_name"].get(id(typ), None)
+      if entry is None or entry[1] is not typ:
+         return ""
+      return entry[0]
 
    def _add_schema_type(self, name, typ):
       if self.has_schema_type(name):
@@ -451,7 +676,7 @@ class SchemaTypesRegistry(object):
          if len(spl) != 2:
             raise Exception("Invalid schema type name '%s'" % name)
          schema = self.get_schema(spl[0])
-         schema.types[name] = typ
+         schema.add_type(name, typ)
          self.dyntypes[name] = typ
          return True
 
@@ -508,13 +733,13 @@ class SchemaTypesRegistry(object):
       return self.get_schema_type(_schema_type_name).make(*args, **kwargs)
 
    def get_schema_path(self, name):
-      self.load_schemas()
+      self._check_loaded()
       if "." in name:
          name = name.split(".")[0]
       return self.get_schema(name).path
 
    def get_schema_module(self, name):
-      self.load_schemas()
+      self._check_loaded()
       if "." in name:
          name = name.split(".")[0]
       return self.get_schema(name).module
@@ -0,0 +1,813 @@
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+import subprocess
+import multiprocessing
+
+thisdir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.join(thisdir, "..", "python"))
+
+import das # pylint: disable=import-error
+
+try:
+   import resource
+except ImportError:
+   resource = None
+
+
+Benchmarks = []
+Children = {}
+
+
+def benchmark(func):
+   Benchmarks.append(func)
+   return func
+
+
+def child(func):
+   Children[func.__name__] = func
+   return func
+
+
+def peak_memory():
+   # Peak resident set size of current process in KB (0 if not available)
+   #   On Linux, ru_maxrss is kept across fork and exec (children would report the benchmark
+   #   process peak once it is larger than theirs), use the memory map high water mark instead
+   try:
+      with open("/proc/self/status", "rb") as f:
+         for line in f:
+            if line.startswith("VmHWM:"):
+               return int(line.split()[1])
+   except (IOError, ValueError):
+      pass
+   if resource is None:
+      return 0
+   rv = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   return (rv / 1024 if sys.platform == "darwin" else rv)
+
+
+def timeit(func, *args, **kwargs):
+   # Best of 3
+   best = None
+   for _ in xrange(3):
+      t0 = time.time()
+      func(*args, **kwargs)
+      t1 = time.time() - t0
+      if best is None or t1 < best:
+         best = t1
+   return best
+
+
+def run_child(name, *args):
+   # Run a child function in a separate process so that peak memory is measured independently
+   #   Child functions print a single '<seconds> <kilobytes>' line
+   cmd = [sys.executable, os.path.abspath(__file__), "--child", name] + [str(x) for x in args]
+   out = subprocess.check_output(cmd)
+   t, m = out.strip().split("\n")[-1].split()
+   return float(t), int(m)
+
+
+def report(title, rows):
+   print("=== %s" % title)
+   for row in rows:
+      print("  " + row)
+
+
+def generate_records(count, seed=0):
+   rng = random.Random(seed)
+   rv = []
+   for i in xrange(count):
+      rv.append({"name": "item%06d" % i,
+                 "description": "Generated item '%d'\nwith a multi-line description" % i,
+                 "value": rng.random() * 1000.0,
+                 "count": rng.randint(0, 1000000),
+                 "enabled": (i % 2 == 0),
+                 "tags": ["tag%d" % rng.randint(0, 20) for _ in xrange(4)],
+                 "range": (rng.randint(0, 100), rng.randint(100, 200)),
+                 "extra": None})
+   return rv
+
+
+BenchSchema = """# version: 1.0
+{
+   "Record": Struct(name=String(),
+                    label=Alias("name"),
+                    description=String(),
+                    value=Real(),
+                    count=Integer(min=0),
+                    enabled=Boolean(),
+                    tags=Sequence(String()),
+                    range=Tuple(Integer(), Integer()),
+                    extra=Empty(),
+                    notes=Optional(String())),
+   "Records": Sequence(SchemaType("Record")),
+   "Row": Struct(name=String(),
+                 description=String(),
+                 value=Real(),
+                 count=Integer(min=0),
+                 enabled=Boolean(),
+                 tags=Sequence(String()),
+                 notes=Optional(String()),
+                 extra=Dict(String(), Integer())),
+   "Circle": Struct(center=Tuple(Real(), Real()), radius=Real()),
+   "Square": Struct(corner=Tuple(Real(), Real()), side=Real()),
+   "Polygon": Struct(points=Sequence(Tuple(Real(), Real())), closed=Boolean()),
+   "Shape": Or(SchemaType("Circle"), SchemaType("Square"), SchemaType("Polygon"), String(), Integer()),
+   "Shapes": Sequence(SchemaType("Shape"))
+}
+"""
+
+
+def setup_schema():
+   # Write benchmark schema to a temporary directory and point DAS_SCHEMA_PATH to it
+   tmpdir = tempfile.mkdtemp()
+   with open(os.path.join(tmpdir, "bench.schema"), "wb") as f:
+      f.write(BenchSchema)
+   os.environ["DAS_SCHEMA_PATH"] = tmpdir
+   das.load_schemas()
+   return tmpdir
+
+
+def cleanup_schema(tmpdir):
+   os.remove(os.path.join(tmpdir, "bench.schema"))
+   os.rmdir(tmpdir)
+
+
+def write_records(path, count):
+   with open(path, "wb") as f:
+      das.pprint(generate_records(count), stream=f)
+
+
+# ---
+
+@child
+def parse_engine(engine, path):
+   with open(path, "rb") as f:
+      src = f.read()
+   t0 = time.time()
+   das.read_string(src, engine=engine)
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@benchmark
+def parse(count=20000):
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      write_records(path, count)
+      rows = ["file size: %.1f MB" % (os.path.getsize(path) / (1024.0 * 1024.0))]
+      for engine in ("eval", "literal"):
+         # Best of 3
+         t, m = min(run_child("parse_engine", engine, path) for _ in xrange(3))
+         rows.append("%-8s: %.3f s, peak memory %d KB" % (engine, t, m))
+      report("das.read_string engines (%d records)" % count, rows)
+   finally:
+      os.remove(path)
+
+
+@benchmark
+def read_meta(count=2000, records=200):
+   # Small header followed by a large body, as written by das.write
+   tmpdir = tempfile.mkdtemp()
+   try:
+      with open(os.path.join(tmpdir, "body.das"), "wb") as f:
+         das.pprint(generate_records(records), stream=f)
+      with open(os.path.join(tmpdir, "body.das"), "rb") as f:
+         body = f.read()
+      paths = []
+      for i in xrange(count):
+         path = os.path.join(tmpdir, "file%05d.das" % i)
+         with open(path, "wb") as f:
+            f.write("# version: %s\n# schema_type: bench.Record\n# encoding: ascii\n" % das.__version__)
+            f.write(body)
+         paths.append(path)
+      def _read_all():
+         for path in paths:
+            das.read_meta(path)
+      def _scan_all(workers, cache):
+         for _ in das.scan_meta(paths, workers=workers, cache=cache):
+            pass
+      rows = []
+      t = timeit(_read_all)
+      rows.append("%-26s: %.3f s, %.1f us per file" % ("read_meta", t, t * 1000000.0 / count))
+      for workers in (1, 4):
+         t = timeit(_scan_all, workers, False)
+         rows.append("%-26s: %.3f s, %.1f us per file" % ("scan_meta (%d workers)" % workers, t, t * 1000000.0 / count))
+      for workers in (1, 4):
+         das.clear_meta_cache()
+         _scan_all(workers, True)
+         t = timeit(_scan_all, workers, True)
+         rows.append("%-26s: %.3f s, %.1f us per file" % ("scan_meta (%d workers, warm)" % workers, t, t * 1000000.0 / count))
+      report("das.read_meta (%d files, %.1f KB each)" % (count, len(body) / 1024.0), rows)
+   finally:
+      for name in os.listdir(tmpdir):
+         os.remove(os.path.join(tmpdir, name))
+      os.rmdir(tmpdir)
+
+
+@benchmark
+def validate(count=100000):
+   tmpdir = setup_schema()
+   try:
+      records = generate_records(count)
+      st = das.get_schema_type("bench.Records")
+      t0 = time.time()
+      st.validate(records)
+      t = time.time() - t0
+      report("validate sequence of %d structs" % count,
+             ["total: %.3f s, %.2f us per struct" % (t, t * 1000000.0 / count)])
+   finally:
+      cleanup_schema(tmpdir)
+
+
+@benchmark
+def mutate(count=50000):
+   tmpdir = setup_schema()
+   try:
+      records = generate_records(count)
+      rows = []
+      seq = das.make_default("bench.Records")
+      t0 = time.time()
+      for r in records:
+         seq.append(r)
+      t = time.time() - t0
+      rows.append("%-20s: %.3f s, %.2f us per call" % ("Sequence.append", t, t * 1000000.0 / count))
+      rec = seq[0]
+      t0 = time.time()
+      for i in xrange(count):
+         rec.count = i
+      t = time.time() - t0
+      rows.append("%-20s: %.3f s, %.2f us per call" % ("Struct.__setattr__", t, t * 1000000.0 / count))
+      t0 = time.time()
+      for i in xrange(count):
+         rec.notes = "note"
+         del(rec.notes)
+      t = time.time() - t0
+      rows.append("%-20s: %.3f s, %.2f us per call" % ("Struct set/del", t, t * 1000000.0 / count))
+      report("container mutations (%d)" % count, rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+
+@benchmark
+def write(count=50000):
+   tmpdir = setup_schema()
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      records = generate_records(count)
+      data = das.validate(records, "bench.Records")
+      def _pprint():
+         with open(path, "wb") as f:
+            das.pprint(records, stream=f)
+      rows = []
+      for name, func in (("das.pprint (raw)", _pprint),
+                         ("das.write", lambda: das.write(data, path)),
+                         ("das.write (atomic)", lambda: das.write(data, path, atomic=True, fsync=True)),
+                         ("das.write (no validation)", lambda: das.write(data, path, validate=False))):
+         t = timeit(func)
+         size = os.path.getsize(path) / (1024.0 * 1024.0)
+         rows.append("%-25s: %.3f s, %.1f MB/s" % (name, t, size / t))
+      report("serialize %d records (%.1f MB)" % (count, size), rows)
+   finally:
+      os.remove(path)
+      cleanup_schema(tmpdir)
+
+
+def traverse(d):
+   # Visit all values of a das value
+   if isinstance(d, das.types.Struct):
+      for k in d:
+         traverse(d[k])
+   elif isinstance(d, das.types.Dict):
+      for _, v in d.iteritems():
+         traverse(v)
+   elif isinstance(d, (das.types.Sequence, das.types.Tuple, das.types.Set)):
+      for v in d:
+         traverse(v)
+
+
+@benchmark
+def read(count=20000):
+   tmpdir = setup_schema()
+   try:
+      data = das.validate(generate_records(count), "bench.Records")
+      rows = []
+      t = timeit(traverse, data)
+      rows.append("%-20s: %.3f s" % ("generic traversal", t))
+      def _attributes():
+         for r in data:
+            r.name, r.description, r.value, r.count, r.enabled, r.extra
+            for tag in r.tags:
+               pass
+            r.range[0], r.range[1]
+      t = timeit(_attributes)
+      rows.append("%-20s: %.3f s" % ("attribute access", t))
+      report("read access (%d records)" % count, rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+
+@benchmark
+def lookup(count=200000, types=500):
+   tmpdir = setup_schema()
+   try:
+      # Additional schema with many struct types
+      with open(os.path.join(tmpdir, "many.schema"), "wb") as f:
+         f.write("{\n")
+         for i in xrange(types):
+            f.write("   \"Type%d\": Struct(name=String(), value=Integer(), items=Sequence(String())),\n" % i)
+         f.write("}\n")
+      das.load_schemas(force=True)
+      st = das.get_schema_type("bench.Record")
+      def _get_type():
+         for _ in xrange(count):
+            das.get_schema_type("bench.Record")
+      def _get_name():
+         for _ in xrange(count):
+            das.get_schema_type_name(st)
+      rows = []
+      for name, func in (("get_schema_type", _get_type), ("get_schema_type_name", _get_name)):
+         t = timeit(func)
+         rows.append("%-20s: %.3f s, %.2f us per call" % (name, t, t * 1000000.0 / count))
+      report("schema registry lookups (%d)" % count, rows)
+      # Lookups scanning schemas
+      n = count / 100
+      schema = das.get_schema("many")
+      location = das.SchemaTypesRegistry.instance.get_location(tmpdir)
+      last = das.get_schema_type("many.Type%d" % (types - 1))
+      unknown = das.schematypes.Struct(name=das.schematypes.String())
+      def _repeat(func, *args):
+         for _ in xrange(n):
+            func(*args)
+      rows = []
+      for name, func, arg in (("Schema.get_type_name", schema.get_type_name, last),
+                              ("Schema.get_type_name (unknown)", schema.get_type_name, unknown),
+                              ("SchemaLocation.get_schema_type", location.get_schema_type, "many.Type%d" % (types - 1)),
+                              ("SchemaLocation.has_schema_type", location.has_schema_type, "many.Type%d" % (types - 1)),
+                              ("SchemaLocation.get_schema_type_name", location.get_schema_type_name, last),
+                              ("das.get_schema_type_name (unknown)", das.get_schema_type_name, unknown)):
+         t = timeit(_repeat, func, arg)
+         rows.append("%-36s: %.3f s, %.2f us per call" % (name, t, t * 1000000.0 / n))
+      report("schema lookups with %d struct types (%d)" % (types, n), rows)
+   finally:
+      os.remove(os.path.join(tmpdir, "many.schema"))
+      cleanup_schema(tmpdir)
+
+
+def parse_and_decode(src, encoding):
+   # Decode as a second pass over parsed data
+   return das.decode(das.parser.parse(src, encoding=encoding), encoding)
+
+
+@benchmark
+def decode(count=20000):
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      write_records(path, count)
+      with open(path, "rb") as f:
+         # Half of the strings are not ascii
+         src = f.read().replace("Generated", "G\xc3\xa9n\xc3\xa9r\xc3\xa9").replace("'tag1", "'t\xc3\xa0g1")
+   finally:
+      os.remove(path)
+   rows = []
+   t = timeit(parse_and_decode, src, "utf8")
+   rows.append("%-20s: %.3f s" % ("parse + das.decode", t))
+   t = timeit(das.read_string, src, encoding="utf8", engine="literal")
+   rows.append("%-20s: %.3f s" % ("single pass", t))
+   report("das.read_string with encoding (%d records)" % count, rows)
+
+
+@child
+def load_schemas_child(path, cachedir):
+   os.environ["DAS_SCHEMA_PATH"] = path
+   das.__schema_cache__ = ("" if cachedir == "-" else cachedir)
+   t0 = time.time()
+   das.load_schemas()
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@benchmark
+def schema_load(schemas=20, types=50):
+   tmpdir = tempfile.mkdtemp()
+   cachedir = os.path.join(tmpdir, "cache")
+   try:
+      for i in xrange(schemas):
+         with open(os.path.join(tmpdir, "load%02d.schema" % i), "wb") as f:
+            f.write("# version: 1.0\n{\n")
+            for j in xrange(types):
+               f.write("   \"Type%d\": Struct(name=String(), label=Alias(\"name\"), value=Real(min=0.0), count=Optional(Integer(min=0)),\n" % j)
+               f.write("                     mode=String(choices=[\"a\", \"b\", \"c\"]), tags=Sequence(String()), range=Tuple(Integer(), Integer()),\n")
+               f.write("                     data=Dict(String(), Or(Integer(), String())), parent=Optional(SchemaType(\"Type0\"))),\n")
+            f.write("}\n")
+      rows = []
+      for name, cd in (("no cache", "-"), ("cold cache", cachedir), ("warm cache", cachedir)):
+         t, m = run_child("load_schemas_child", tmpdir, cd)
+         rows.append("%-10s: %.3f s, peak memory %d KB" % (name, t, m))
+      report("das.load_schemas (%d schemas, %d struct types each)" % (schemas, types), rows)
+   finally:
+      for dirpath, _, filenames in os.walk(tmpdir, topdown=False):
+         for filename in filenames:
+            os.remove(os.path.join(dirpath, filename))
+         os.rmdir(dirpath)
+
+
+class UniqueNames(das.Mixin):
+   # Global validation visiting the whole sequence
+   @classmethod
+   def get_schema_type(klass):
+      return "bench.Records"
+
+   def _validate_globally(self):
+      if len(set([x.name for x in self])) != len(self):
+         raise Exception("Duplicate names")
+
+
+class RecordLabel(das.Mixin):
+   @classmethod
+   def get_schema_type(klass):
+      return "bench.Record"
+
+   def label(self):
+      return "%s (%d)" % (self.name, self.count)
+
+
+class RecordRange(das.Mixin):
+   @classmethod
+   def get_schema_type(klass):
+      return "bench.Record"
+
+   def __init__(self, *args, **kwargs):
+      super(RecordRange, self).__init__()
+
+   def span(self):
+      return self.range[1] - self.range[0]
+
+
+@benchmark
+def mixins(count=50000):
+   tmpdir = setup_schema()
+   try:
+      records = generate_records(count)
+      st = das.get_schema_type("bench.Records")
+      rows = []
+      t = timeit(st.validate, records)
+      rows.append("%-10s: %.3f s, %.2f us per struct" % ("no mixin", t, t * 1000000.0 / count))
+      das.register_mixins(RecordLabel, RecordRange)
+      t = timeit(st.validate, records)
+      rows.append("%-10s: %.3f s, %.2f us per struct" % ("2 mixins", t, t * 1000000.0 / count))
+      data = st.validate(records)
+      t0 = time.time()
+      for r in data:
+         das.mixin.bind([RecordLabel, RecordRange], r, reset=True)
+      t = time.time() - t0
+      rows.append("%-10s: %.3f s, %.2f us per struct" % ("re-bind", t, t * 1000000.0 / count))
+      report("validate sequence of %d structs with registered mixins" % count, rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+
+def generate_shapes(count, seed=0):
+   rng = random.Random(seed)
+   rv = []
+   for i in xrange(count):
+      k = i % 5
+      if k == 0:
+         rv.append({"center": (rng.random(), rng.random()), "radius": rng.random()})
+      elif k == 1:
+         rv.append({"corner": (rng.random(), rng.random()), "side": rng.random()})
+      elif k == 2:
+         rv.append({"points": [(rng.random(), rng.random()) for _ in xrange(3)], "closed": True})
+      elif k == 3:
+         rv.append("shape%d" % i)
+      else:
+         rv.append(i)
+   return rv
+
+
+@benchmark
+def or_validate(count=50000):
+   tmpdir = setup_schema()
+   try:
+      shapes = generate_shapes(count)
+      st = das.get_schema_type("bench.Shapes")
+      rows = []
+      t = timeit(st.validate, shapes)
+      rows.append("%-13s: %.3f s, %.2f us per value" % ("strict", t, t * 1000000.0 / count))
+      with das.ValidationContext(compatible=True):
+         t = timeit(st.validate, shapes)
+      rows.append("%-13s: %.3f s, %.2f us per value" % ("compatibility", t, t * 1000000.0 / count))
+      report("validate %d values of Or(Struct, Struct, Struct, String, Integer) type" % count, rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+
+ChoiceNames = ["asset%04d" % i for i in xrange(500)]
+
+
+def asset_names():
+   return ChoiceNames
+
+
+@benchmark
+def choices(count=10000):
+   values = [ChoiceNames[i % len(ChoiceNames)] for i in xrange(count)]
+   rows = []
+   for name, st in (("static", das.schematypes.String(choices=ChoiceNames)),
+                    ("callable", das.schematypes.String(choices=asset_names)),
+                    ("callable, ttl", das.schematypes.String(choices=asset_names, choices_ttl=60))):
+      seq = das.schematypes.Sequence(st)
+      t = timeit(seq.validate, values)
+      rows.append("%-9s: %.3f s, %.2f us per value" % (name, t, t * 1000000.0 / count))
+   report("validate %d strings with %d choices" % (count, len(ChoiceNames)), rows)
+
+
+@benchmark
+def batch(count=2000):
+   tmpdir = setup_schema()
+   try:
+      das.register_mixins(UniqueNames)
+      records = generate_records(count)
+      rows = []
+      seq = das.make_default("bench.Records")
+      t0 = time.time()
+      for r in records:
+         seq.append(r)
+      t = time.time() - t0
+      rows.append("%-12s: %.3f s" % ("no batch", t))
+      seq = das.make_default("bench.Records")
+      t0 = time.time()
+      with das.batch(seq):
+         for r in records:
+            seq.append(r)
+      t = time.time() - t0
+      rows.append("%-12s: %.3f s" % ("das.batch", t))
+      report("append %d records with O(n) global validation" % count, rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+@benchmark
+def binary(count=20000):
+   tmpdir = setup_schema()
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      data = das.validate(generate_records(count), "bench.Records")
+      rows = []
+      for name, wfunc, rfunc in (("text", das.write, das.read),
+                                 ("binary", das.write_binary, das.read_binary)):
+         t = timeit(wfunc, data, path)
+         size = os.path.getsize(path) / (1024.0 * 1024.0)
+         rows.append("%-28s: %.3f s (%.1f MB)" % ("das.write" if name == "text" else "das.write_binary", t, size))
+         t = timeit(rfunc, path)
+         rows.append("%-28s: %.3f s" % ("das.read" if name == "text" else "das.read_binary", t))
+      t = timeit(das.read_binary, path, validate=False)
+      rows.append("%-28s: %.3f s" % ("das.read_binary (no validation)", t))
+      report("text vs binary files (%d records)" % count, rows)
+   finally:
+      os.remove(path)
+      cleanup_schema(tmpdir)
+
+@child
+def write_records_child(path, count):
+   t0 = time.time()
+   das.write(das.validate(generate_records(int(count)), "bench.Records"), path)
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@child
+def lazy_read_child(lazy, path):
+   t0 = time.time()
+   data = das.read(path, lazy=(lazy == "lazy"))
+   # Read-mostly tool access pattern (dasget)
+   data[0].name, data[-1].count
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@benchmark
+def lazy_read(count=20000):
+   tmpdir = setup_schema()
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      # Write file from a child process so that memory used by records isn't inherited by readers
+      run_child("write_records_child", path, count)
+      rows = []
+      for mode in ("eager", "lazy"):
+         t, m = run_child("lazy_read_child", mode, path)
+         rows.append("%-6s: %.3f s, peak memory %d KB" % (mode, t, m))
+      report("das.read and access 2 fields (%d records)" % count, rows)
+   finally:
+      os.remove(path)
+      cleanup_schema(tmpdir)
+
+@benchmark
+def read_many(count=200, records=100, workers=4):
+   tmpdir = setup_schema()
+   try:
+      data = das.validate(generate_records(records), "bench.Records")
+      paths = []
+      for i in xrange(count):
+         path = os.path.join(tmpdir, "file%05d.das" % i)
+         das.write(data, path)
+         paths.append(path)
+      def _loop():
+         for path in paths:
+            das.read(path)
+      def _read_many(mode, ordered):
+         for _, _, error in das.read_many(paths, workers=workers, mode=mode, ordered=ordered):
+            if error is not None:
+               raise error
+      rows = []
+      t = timeit(_loop)
+      rows.append("%-30s: %.3f s, %.2f ms per file" % ("das.read loop", t, t * 1000.0 / count))
+      for mode in ("thread", "process"):
+         for ordered in (True, False):
+            t = timeit(_read_many, mode, ordered)
+            name = "%s (%d workers%s)" % (mode, workers, ("" if ordered else ", unordered"))
+            rows.append("%-30s: %.3f s, %.2f ms per file" % (name, t, t * 1000.0 / count))
+      report("das.read_many (%d files, %d records each, %d cpus)" % (count, records, multiprocessing.cpu_count()), rows)
+   finally:
+      for name in os.listdir(tmpdir):
+         if name.endswith(".das"):
+            os.remove(os.path.join(tmpdir, name))
+      cleanup_schema(tmpdir)
+
+
+@benchmark
+def copy(count=20000):
+   tmpdir = setup_schema()
+   fd, path = tempfile.mkstemp(suffix=".das")
+   os.close(fd)
+   try:
+      data = das.validate(generate_records(count), "bench.Records")
+      das.write(data, path)
+      rows = []
+      t = timeit(das.copy, data)
+      rows.append("%-24s: %.3f s" % ("das.copy", t))
+      t = timeit(das.check, data, "bench.Records")
+      rows.append("%-24s: %.3f s" % ("das.check", t))
+      lazy = das.read(path, lazy=True)
+      t = timeit(das.copy, lazy)
+      rows.append("%-24s: %.3f s" % ("das.copy (lazy read)", t))
+      report("copy %d records" % count, rows)
+   finally:
+      os.remove(path)
+      cleanup_schema(tmpdir)
+
+def count_nodes(d):
+   # Number of das containers and values
+   if isinstance(d, das.types.Struct):
+      return 1 + sum(count_nodes(d[k]) for k in d)
+   elif isinstance(d, das.types.Dict):
+      return 1 + sum(count_nodes(v) for v in d.itervalues())
+   elif isinstance(d, (das.types.Sequence, das.types.Tuple, das.types.Set)):
+      return 1 + sum(count_nodes(v) for v in d)
+   else:
+      return 1
+
+
+@benchmark
+def clone(counts="2000,20000,100000"):
+   tmpdir = setup_schema()
+   try:
+      rows = []
+      for count in map(int, counts.split(",")):
+         records = generate_records(count)
+         t0 = time.time()
+         data = das.validate(records, "bench.Records")
+         tv = time.time() - t0
+         nodes = count_nodes(data)
+         t = timeit(das.clone, data)
+         rows.append("%6d records, %7d nodes: das.clone %.3f s (%.2f us/node), das.validate %.3f s" % (count, nodes, t, 1000000.0 * t / nodes, tv))
+         data, records = None, None
+      report("clone validated data", rows)
+   finally:
+      cleanup_schema(tmpdir)
+
+
+def generate_rows(count, seed=0):
+   # bench.Row values (spanning 4 csv lines each)
+   rv = []
+   for i, r in enumerate(generate_records(count, seed=seed)):
+      rv.append({"name": r["name"],
+                 "description": r["description"].replace("\n", " "),
+                 "value": r["value"],
+                 "count": r["count"],
+                 "enabled": r["enabled"],
+                 "tags": r["tags"],
+                 "extra": {"low": r["range"][0], "high": r["range"][1]}})
+   return rv
+
+
+def write_csv_rows(path, count, block=100):
+   # Write 'block' rows with das.write_csv and repeat its lines up to 'count' rows
+   das.write_csv([das.validate(r, "bench.Row") for r in generate_rows(block)], path)
+   with open(path, "rb") as f:
+      lines = f.read().split("\n")
+   with open(path, "wb") as f:
+      f.write(lines[0])
+      for _ in xrange(count // block):
+         for l in lines[1:]:
+            f.write("\n")
+            f.write(l)
+
+
+@benchmark
+def read_csv(counts="2500,25000"):
+   tmpdir = setup_schema()
+   path = os.path.join(tmpdir, "rows.csv")
+   try:
+      rows = []
+      for count in map(int, counts.split(",")):
+         write_csv_rows(path, count)
+         with open(path, "rb") as f:
+            lines = f.read().count("\n")
+         t0 = time.time()
+         data = das.read_csv(path)
+         t = time.time() - t0
+         assert len(data) == count
+         rows.append("%6d rows (%6d lines): %.3f s (%.1f us/line)" % (count, lines, t, 1000000.0 * t / lines))
+      report("das.read_csv", rows)
+   finally:
+      if os.path.isfile(path):
+         os.remove(path)
+      cleanup_schema(tmpdir)
+
+
+@child
+def write_csv_rows_child(path, count):
+   t0 = time.time()
+   write_csv_rows(path, int(count))
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@child
+def iter_csv_child(mode, path):
+   t0 = time.time()
+   n = 0
+   if mode == "iter_csv":
+      for d in das.iter_csv(path):
+         n += 1
+   else:
+      n = len(das.read_csv(path))
+   t1 = time.time() - t0
+   print("%f %d" % (t1, peak_memory()))
+
+
+@benchmark
+def iter_csv(count=25000):
+   tmpdir = setup_schema()
+   path = os.path.join(tmpdir, "rows.csv")
+   try:
+      run_child("write_csv_rows_child", path, count)
+      rows = ["file size: %.1f MB" % (os.path.getsize(path) / (1024.0 * 1024.0))]
+      for mode in ("read_csv", "iter_csv"):
+         t, m = run_child("iter_csv_child", mode, path)
+         rows.append("%-8s: %.3f s, peak memory %d KB" % (mode, t, m))
+      report("read all data from csv file (%d rows)" % count, rows)
+   finally:
+      if os.path.isfile(path):
+         os.remove(path)
+      cleanup_schema(tmpdir)
+
+
+@benchmark
+def write_csv(counts="500,2000,10000"):
+   tmpdir = setup_schema()
+   path = os.path.join(tmpdir, "rows.csv")
+   try:
+      rows = []
+      for count in map(int, counts.split(",")):
+         data = [das.validate(r, "bench.Row") for r in generate_rows(count)]
+         t0 = time.time()
+         das.write_csv(data, path)
+         t = time.time() - t0
+         rows.append("%6d rows: %.3f s (%.1f us/row)" % (count, t, 1000000.0 * t / count))
+      report("das.write_csv", rows)
+   finally:
+      if os.path.isfile(path):
+         os.remove(path)
+      cleanup_schema(tmpdir)
+
+
+if __name__ == "__main__":
+   args = sys.argv[1:]
+
+   if len(args) >= 2 and args[0] == "--child":
+      Children[args[1]](*args[2:])
+      sys.exit(0)
+
+   for func in Benchmarks:
+      if args and not func.__name__ in args:
+         continue
+      func()
@@ -0,0 +1,95 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   TestDir = None
+   OutputFile = None
+
+   @classmethod
+   def setUpClass(cls):
+      cls.TestDir = os.path.abspath(os.path.dirname(__file__))
+      cls.OutputFile = cls.TestDir + "/out.data"
+      os.environ["DAS_SCHEMA_PATH"] = cls.TestDir
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.OutputFile):
+         os.remove(self.OutputFile)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _compare(self, s, encoding=None, **funcs):
+      a = das.read_string(s, encoding=encoding, engine="literal", **funcs)
+      b = das.read_string(s, encoding=encoding, engine="eval", **funcs)
+      self.assertEqual(a, b)
+      self.assertEqual(type(a), type(b))
+      return a
+
+   # Test functions
+
+   def testLiterals(self):
+      self._compare("{'a': 1, 'b': -2.5e3, 'c': 0x1F, 'd': 010, 'e': 12L, 'f': None, 'g': True, 'h': False}")
+      self._compare("[1, (2,), (3), (), [], {}, set([1, 2]), {1, 2}]")
+      self._compare("""# comment
+{
+   "multi": '''line 1
+line 2''', # trailing comment
+   "concat": 'a' "b" 'c',
+   "escapes": 'tab\\tnewline\\n\\x41\\101',
+   "raw": r'\\d+',
+   "unicode": u'caf\\xe9',
+}
+""")
+
+   def testAdjacentStrings(self):
+      # Sources with and without comments are tokenized differently
+      for src in ("{'a' 'b': 'c'\n  'd', 'e': u'x' r'\\d' U\"y\", 'f': ['g' 'h'], 'i': {'j' \"k\"}}",
+                  "{'a' 'b': 'c' # comment\n  'd', 'e': u'x' r'\\d' U\"y\", 'f': ['g' 'h'], 'i': {'j' \"k\"}}",
+                  "['#' 'a', 'b' '''c\nd''' \"e\"]"):
+         self._compare(src)
+      self.assertEqual(self._compare("[Value('a' 'b', b='c' 'd')]", Value=lambda a, b="": a + b), ["abcd"])
+      with self.assertRaises(das.ParseError):
+         das.read_string("['a' b]", engine="literal")
+
+   def testEncoding(self):
+      v = self._compare("{'name': 'café', 'uname': u'café'}", encoding="utf8")
+      self.assertEqual(v["uname"], u"caf\xe9")
+
+   def testNames(self):
+      v = self._compare("[Value(1, b=2), Value(3)]", Value=lambda a, b=0: a + b)
+      self.assertEqual(v, [3, 3])
+
+   def testUnsafeCall(self):
+      with self.assertRaises(das.ParseError):
+         das.read_string("__import__('os').getcwd()", engine="literal")
+      with self.assertRaises(das.ParseError):
+         das.read_string("open('/dev/null')", engine="literal")
+
+   def testSyntaxError(self):
+      with self.assertRaises(das.ParseError) as cm:
+         das.read_string("{\n   'a': 1\n   'b': 2\n}", engine="literal")
+      self.assertEqual(cm.exception.line, 3)
+      with self.assertRaises(das.ParseError):
+         das.read_string("[1, 2", engine="literal")
+
+   def testRoundTrip(self):
+      d = das.make_default("literal.Record")
+      d.name = "hello"
+      d.values = [1.5, 2.0]
+      d.flags = set(["a", "b"])
+      das.write(d, self.OutputFile)
+      self.assertEqual(das.read(self.OutputFile, engine="literal"), das.read(self.OutputFile, engine="eval"))
+
+   def testUnknownEngine(self):
+      with self.assertRaises(Exception):
+         das.read_string("1", engine="unknown")
@@ -0,0 +1,70 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   TestDir = None
+   OutputFile = None
+
+   @classmethod
+   def setUpClass(cls):
+      cls.TestDir = os.path.abspath(os.path.dirname(__file__))
+      cls.OutputFile = cls.TestDir + "/out.data"
+      os.environ["DAS_SCHEMA_PATH"] = cls.TestDir
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.OutputFile):
+         os.remove(self.OutputFile)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _writeFile(self, content):
+      with open(self.OutputFile, "wb") as f:
+         f.write(content)
+
+   # Test functions
+
+   def testReadMeta(self):
+      self._writeFile("# version: 0.1\n# schema_type: header.Item\n#comment\n{\n   'name': 'a',\n}\n")
+      md = das.read_meta(self.OutputFile)
+      self.assertEqual(md, {"version": "0.1", "schema_type": "header.Item"})
+
+   def testHeaderOnly(self):
+      self._writeFile("# version: 0.1\n# schema_type: header.Item\n")
+      md, content = das._read_file(self.OutputFile)
+      self.assertEqual(md["schema_type"], "header.Item")
+      self.assertEqual(content, "")
+
+   def testCRLF(self):
+      self._writeFile("# encoding: ascii\r\n# schema_type: header.Item\r\n{\r\n   'name': 'a', # comment\r\n   'count': 2\r\n}\r\n")
+      self.assertEqual(das.read_meta(self.OutputFile)["encoding"], "ascii")
+      d = das.read(self.OutputFile)
+      self.assertEqual(d.name, "a")
+      self.assertEqual(d.count, 2)
+
+   def testMultilineString(self):
+      # Trailing spaces are kept (lines used to be right stripped)
+      self._writeFile("# schema_type: header.Item\n{\n   'name': \'\'\'a  \r\nb\t\n c \'\'\',   \n   'count': 2\n}\n")
+      for engine in ("literal", "eval"):
+         self.assertEqual(das.read(self.OutputFile, engine=engine).name, "a  \nb\t\n c ")
+
+   def testRoundTrip(self):
+      d = das.make_default("header.Item")
+      d.name = "hello"
+      d.count = 10
+      das.write(d, self.OutputFile)
+      self.assertEqual(das.read_meta(self.OutputFile)["schema_type"], "header.Item")
+      self.assertEqual(das.read(self.OutputFile), d)
+
+   def testMissingFile(self):
+      self.assertEqual(das.read_meta(self.TestDir + "/missing.data"), {})
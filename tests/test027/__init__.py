@@ -0,0 +1,84 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import multiprocessing.pool
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   TestDir = None
+   OutputDir = None
+
+   @classmethod
+   def setUpClass(cls):
+      cls.TestDir = os.path.abspath(os.path.dirname(__file__))
+      cls.OutputDir = cls.TestDir + "/out"
+      os.environ["DAS_SCHEMA_PATH"] = cls.TestDir
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      das.clear_meta_cache()
+      if not os.path.isdir(self.OutputDir):
+         os.makedirs(self.OutputDir)
+      self.paths = []
+      for i in xrange(20):
+         d = das.make_default("scan.Item")
+         d.name = "item%d" % i
+         path = self.OutputDir + "/item%02d.data" % i
+         das.write(d, path)
+         self.paths.append(path)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      das.clear_meta_cache()
+      if os.path.isdir(self.OutputDir):
+         for name in os.listdir(self.OutputDir):
+            os.remove(os.path.join(self.OutputDir, name))
+         os.rmdir(self.OutputDir)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testGlob(self):
+      rv = dict(das.scan_meta(self.OutputDir + "/*.data", workers=4))
+      self.assertEqual(sorted(rv.keys()), self.paths)
+      for md in rv.itervalues():
+         self.assertEqual(md["schema_type"], "scan.Item")
+         self.assertEqual(md["schema_version"], "1.0")
+
+   def testSequential(self):
+      rv = list(das.scan_meta(self.paths, workers=1))
+      self.assertEqual([x[0] for x in rv], self.paths)
+      self.assertEqual(rv[0][1], das.read_meta(self.paths[0]))
+
+   def testMissing(self):
+      rv = list(das.scan_meta([self.paths[0], self.OutputDir + "/missing.data", self.paths[0]]))
+      self.assertEqual(len(rv), 1)
+
+   def testCachedSkipPool(self):
+      list(das.scan_meta(self.paths))
+      tp = multiprocessing.pool.ThreadPool
+      def _fail(*args, **kwargs):
+         raise Exception("No thread pool should be created when all files are cached")
+      multiprocessing.pool.ThreadPool = _fail
+      try:
+         rv = dict(das.scan_meta(self.paths, workers=4))
+      finally:
+         multiprocessing.pool.ThreadPool = tp
+      self.assertEqual(sorted(rv.keys()), self.paths)
+
+   def testCache(self):
+      path = self.paths[0]
+      md = dict(das.scan_meta(path))[path]
+      md["schema_type"] = "modified"
+      self.assertEqual(dict(das.scan_meta(path))[path]["schema_type"], "scan.Item")
+      with open(path, "wb") as f:
+         f.write("# schema_type: other.Item\n{}\n")
+      st = os.stat(path)
+      os.utime(path, (st.st_atime, st.st_mtime + 10))
+      self.assertEqual(dict(das.scan_meta(path))[path]["schema_type"], "other.Item")
@@ -0,0 +1,70 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      # Discard any dynamic schema type modification
+      das.load_schemas(force=True)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testValidate(self):
+      v = das.validate([{"name": "a"}, {"label": "b", "count": 2}], "plan.Items")
+      self.assertEqual(v[0].name, "a")
+      self.assertEqual(v[1].name, "b")
+      self.assertEqual(v[1].count, 2)
+      with self.assertRaises(das.ValidationError):
+         das.validate([{"name": "a", "label": "b"}], "plan.Items")
+      with self.assertRaises(das.ValidationError):
+         das.validate([{"count": 1}], "plan.Items")
+      with self.assertRaises(das.ValidationError):
+         das.validate([{"name": "a", "unknown": 1}], "plan.Items")
+
+   def testKeyValidation(self):
+      st = das.get_schema_type("plan.Item")
+      self.assertEqual(st.validate("a", key="label"), "a")
+      with self.assertRaises(das.ValidationError):
+         st.validate(1, key="label")
+      with self.assertRaises(das.ValidationError):
+         st.validate(1, key="unknown")
+
+   def testSchemaTypeChange(self):
+      st = das.get_schema_type("plan.Item")
+      das.validate({"name": "a"}, "plan.Item")
+      st["value"] = das.schematypes.Real()
+      with self.assertRaises(das.ValidationError):
+         das.validate([{"name": "a"}], "plan.Items")
+      v = das.validate([{"name": "a", "value": 1.0}], "plan.Items")
+      self.assertEqual(v[0].value, 1.0)
+      del(st["value"])
+      das.validate([{"name": "a"}], "plan.Items")
+
+   def testRegistryReload(self):
+      st = das.get_schema_type("plan.Items")
+      st.validate([{"name": "a"}])
+      plan = st._get_plan()
+      gen = das.SchemaTypesRegistry.instance.generation
+      das.load_schemas(force=True)
+      self.assertNotEqual(das.SchemaTypesRegistry.instance.generation, gen)
+      self.assertIsNot(st._get_plan(), plan)
+      # SchemaType references resolve to newly loaded types
+      st = das.get_schema_type("plan.Items")
+      self.assertIs(st.type._get_plan().type, das.get_schema_type("plan.Item"))
+      self.assertIs(st.validate([{"name": "a"}])[0]._get_schema_type(), das.get_schema_type("plan.Item"))
@@ -0,0 +1,80 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      das.schematypes.Struct.CompatibilityMode = False
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testRemoveRequired(self):
+      v = das.make("delta.Item", name="a", count=1)
+      with self.assertRaises(das.ValidationError):
+         del(v.name)
+      self.assertEqual(v.name, "a")
+      with self.assertRaises(das.ValidationError):
+         v._pop("label")
+      self.assertEqual(v.name, "a")
+      v2 = das.make("delta.Item", name="b")
+      with self.assertRaises(das.ValidationError):
+         v2._popitem()
+      self.assertEqual(v2, {"name": "b"})
+      with self.assertRaises(das.ValidationError):
+         v._clear()
+      self.assertEqual(v, {"name": "a", "count": 1})
+
+   def testRemoveOptional(self):
+      v = das.make("delta.Item", name="a", count=1)
+      del(v["count"])
+      self.assertFalse("count" in v)
+      v.count = 2
+      v._pop("count")
+      self.assertFalse("count" in v)
+
+   def testSet(self):
+      v = das.make("delta.Item", name="a")
+      v.label = "b"
+      self.assertEqual(v.name, "b")
+      v._update(count=3, label="c")
+      self.assertEqual(v, {"name": "c", "count": 3})
+      with self.assertRaises(das.ValidationError):
+         v.unknown = 1
+      with self.assertRaises(das.ValidationError):
+         v._update(name="d", count="e")
+      self.assertEqual(v, {"name": "c", "count": 3})
+
+   def testCompatibilityMode(self):
+      v = das.make("delta.Item", name="a")
+      das.schematypes.Struct.CompatibilityMode = True
+      del(v.name)
+      # default value set back
+      self.assertEqual(v.name, "")
+
+   def testSequenceSize(self):
+      v = das.make_default("delta.Items")
+      for i in xrange(3):
+         v.append({"name": "item%d" % i})
+      with self.assertRaises(das.ValidationError):
+         v.append({"name": "item3"})
+      self.assertEqual(len(v), 3)
+      with self.assertRaises(das.ValidationError):
+         v[0].count = "a"
+      v[0].count = 1
+      self.assertEqual(v[0].count, 1)
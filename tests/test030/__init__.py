@@ -0,0 +1,101 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.doc = das.make_default("batch.Doc")
+      self.mixin = das.get_schema_module("batch").DocValidator
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      pass
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testCommit(self):
+      self.mixin.Calls = 0
+      with das.batch(self.doc) as doc:
+         for i in xrange(100):
+            doc.items.append({"name": "item%d" % i})
+         doc.tags.add("a")
+         doc.values["a"] = 1
+         doc.items[0].count = 10
+      self.assertEqual(self.mixin.Calls, 1)
+      self.assertEqual(len(self.doc.items), 100)
+      self.assertEqual(self.doc.items[0].count, 10)
+      self.assertEqual(self.doc.tags, set(["a"]))
+      self.assertEqual(self.doc.values, {"a": 1})
+
+   def testDeferredGlobalValidation(self):
+      with self.assertRaises(das.ValidationError):
+         with das.batch(self.doc) as doc:
+            doc.items.append({"name": "a"})
+            doc.items.append({"name": "b"})
+            doc.items.append({"name": "a"})
+      self.assertEqual(len(self.doc.items), 0)
+      # Fixing conflict before exit is fine
+      with das.batch(self.doc) as doc:
+         doc.items.append({"name": "a"})
+         doc.items.append({"name": "a"})
+         doc.items[1].name = "b"
+      self.assertEqual([x.name for x in self.doc.items], ["a", "b"])
+
+   def testDeferredContainerValidation(self):
+      self.doc.items.append({"name": "a", "count": 1})
+      with self.assertRaises(das.ValidationError):
+         with das.batch(self.doc) as doc:
+            del(doc.items[0].name)
+      self.assertEqual(self.doc.items[0].name, "a")
+      with das.batch(self.doc) as doc:
+         del(doc.items[0].name)
+         doc.items[0].name = "b"
+      self.assertEqual(self.doc.items[0].name, "b")
+
+   def testInvalidValue(self):
+      # Values are still checked when set
+      with self.assertRaises(das.ValidationError):
+         with das.batch(self.doc) as doc:
+            doc.items.append({"name": "a"})
+            doc.items.append({"name": 1})
+      self.assertEqual(len(self.doc.items), 0)
+
+   def testException(self):
+      self.doc.tags.add("a")
+      with self.assertRaises(RuntimeError):
+         with das.batch(self.doc) as doc:
+            doc.tags.add("b")
+            doc.values["b"] = 2
+            raise RuntimeError("abort")
+      self.assertEqual(self.doc.tags, set(["a"]))
+      self.assertEqual(self.doc.values, {})
+
+   def testNested(self):
+      self.mixin.Calls = 0
+      with das.batch(self.doc) as doc:
+         doc.items.append({"name": "a"})
+         try:
+            with das.batch(doc.items) as items:
+               items.append({"name": "b"})
+               raise RuntimeError("abort")
+         except RuntimeError:
+            pass
+         self.assertEqual(len(doc.items), 1)
+         with das.batch(doc.items) as items:
+            items.append({"name": "c"})
+         self.assertEqual(self.mixin.Calls, 0)
+      self.assertEqual(self.mixin.Calls, 1)
+      self.assertEqual([x.name for x in self.doc.items], ["a", "c"])
@@ -0,0 +1,22 @@
+import das # pylint: disable=import-error
+
+class DocValidator(das.Mixin):
+   Calls = 0
+
+   @classmethod
+   def get_schema_type(klass):
+      return "batch.Doc"
+
+   def __init__(self, *args, **kwargs):
+      super(DocValidator, self).__init__(*args, **kwargs)
+
+   def _validate_globally(self):
+      DocValidator.Calls += 1
+      names = set()
+      for item in self.items:
+         if item.name in names:
+            raise Exception("Duplicate item name '%s'" % item.name)
+         names.add(item.name)
+
+
+das.register_mixins(DocValidator)
@@ -0,0 +1,84 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.das")
+      self.mixin = das.get_schema_module("link").DocValidator
+      self.doc = das.make_default("link.Doc")
+      self.doc.items = [{"name": "a"}, {"name": "b"}]
+      self.doc.named = {"a": {"name": "a"}}
+      self.doc.pair = ({"name": "a"}, {"name": "b"})
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _parent(self, value):
+      cb = value.__dict__.get("_validate_globally_cb", None)
+      return (None if cb is None else cb.__self__)
+
+   # Test functions
+
+   def testLinkedOnAdapt(self):
+      items = dict.__getitem__(self.doc._dict, "items")
+      self.assertIs(self._parent(items), self.doc)
+      for item in list.__iter__(items):
+         self.assertIs(self._parent(item), items)
+      named = dict.__getitem__(self.doc._dict, "named")
+      self.assertIs(self._parent(dict.__getitem__(named, "a")), named)
+      pair = dict.__getitem__(self.doc._dict, "pair")
+      for item in tuple.__iter__(pair):
+         self.assertIs(self._parent(item), pair)
+
+   def testReadDoesNotRelink(self):
+      item = self.doc.items[0]
+      item.__dict__["_validate_globally_cb"] = None
+      self.doc.items[0]
+      for _ in self.doc.items:
+         pass
+      self.assertIsNone(item.__dict__["_validate_globally_cb"])
+
+   def testGlobalValidation(self):
+      self.mixin.Calls = 0
+      self.doc.items[1].count = 1
+      self.assertEqual(self.mixin.Calls, 1)
+      with self.assertRaises(das.ValidationError):
+         self.doc.items[0].count = -1
+      self.doc.named["a"].count = 2
+      self.doc.pair[0].count = 3
+      self.assertEqual(self.mixin.Calls, 4)
+
+   def testReadFile(self):
+      das.write(self.doc, self.output)
+      doc = das.read(self.output)
+      self.mixin.Calls = 0
+      items = dict.__getitem__(doc._dict, "items")
+      item = list.__getitem__(items, 0)
+      self.assertIs(self._parent(item), items)
+      with self.assertRaises(das.ValidationError):
+         item.count = -1
+      self.assertEqual(self.mixin.Calls, 1)
+
+   def testCopy(self):
+      doc = das.copy(self.doc)
+      self.mixin.Calls = 0
+      doc.items.append({"name": "c"})
+      doc.items[-1].count = 1
+      self.assertEqual(self.mixin.Calls, 2)
+      self.assertEqual(len(self.doc.items), 2)
@@ -0,0 +1,20 @@
+import das # pylint: disable=import-error
+
+class DocValidator(das.Mixin):
+   Calls = 0
+
+   @classmethod
+   def get_schema_type(klass):
+      return "link.Doc"
+
+   def __init__(self, *args, **kwargs):
+      super(DocValidator, self).__init__(*args, **kwargs)
+
+   def _validate_globally(self):
+      DocValidator.Calls += 1
+      for item in self.items:
+         if "count" in item and item.count < 0:
+            raise Exception("Negative count for item '%s'" % item.name)
+
+
+das.register_mixins(DocValidator)
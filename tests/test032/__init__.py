@@ -0,0 +1,81 @@
+# -*- coding: utf8 -*-
+import os
+import shutil
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.extradir = os.path.join(self.testdir, "extra")
+      os.environ["DAS_SCHEMA_PATH"] = self.testdir
+      das.get_schema_type("watch.Item")
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      das.watch_schemas()
+      os.environ["DAS_SCHEMA_PATH"] = self.testdir
+      if os.path.isdir(self.extradir):
+         shutil.rmtree(self.extradir)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _write_extra(self, content):
+      if not os.path.isdir(self.extradir):
+         os.makedirs(self.extradir)
+      with open(os.path.join(self.extradir, "watchextra.schema"), "w") as f:
+         f.write(content)
+
+   # Test functions
+
+   def testLookupsKeepGeneration(self):
+      gen = das.SchemaTypesRegistry.instance.generation
+      for _ in xrange(10):
+         das.get_schema_type("watch.Item")
+         das.get_schema_type_name(das.get_schema_type("watch.Item"))
+         das.list_schemas()
+      self.assertEqual(das.SchemaTypesRegistry.instance.generation, gen)
+
+   def testEnvChange(self):
+      self._write_extra("{\"Other\": Integer()}\n")
+      gen = das.SchemaTypesRegistry.instance.generation
+      os.environ["DAS_SCHEMA_PATH"] = os.pathsep.join([self.testdir, self.extradir])
+      self.assertTrue(isinstance(das.get_schema_type("watchextra.Other"), das.schematypes.Integer))
+      self.assertTrue(das.SchemaTypesRegistry.instance.generation > gen)
+
+   def testEnvNotWatched(self):
+      self._write_extra("{\"Other\": Integer()}\n")
+      das.watch_schemas(env=False)
+      os.environ["DAS_SCHEMA_PATH"] = os.pathsep.join([self.testdir, self.extradir])
+      self.assertFalse(das.has_schema_type("watchextra.Other"))
+      with self.assertRaises(das.UnknownSchemaError):
+         das.get_schema_type("watchextra.Other")
+      das.load_schemas()
+      self.assertTrue(isinstance(das.get_schema_type("watchextra.Other"), das.schematypes.Integer))
+
+   def testDirectoryChange(self):
+      self._write_extra("{\"Other\": Integer()}\n")
+      os.environ["DAS_SCHEMA_PATH"] = os.pathsep.join([self.testdir, self.extradir])
+      das.get_schema_type("watchextra.Other")
+      # Not watched by default
+      self._write_extra("{\"Other\": Integer(), \"Added\": String()}\n")
+      with self.assertRaises(das.UnknownSchemaError):
+         das.get_schema_type("watchextra.Added")
+      das.watch_schemas(interval=0)
+      self._write_extra("{\"Other\": Integer(), \"Added\": String(), \"Last\": Boolean()}\n")
+      self.assertTrue(isinstance(das.get_schema_type("watchextra.Last"), das.schematypes.Boolean))
+      self.assertTrue(isinstance(das.get_schema_type("watchextra.Added"), das.schematypes.String))
+      # New schema file
+      with open(os.path.join(self.extradir, "watchnew.schema"), "w") as f:
+         f.write("{\"New\": Real()}\n")
+      self.assertTrue(isinstance(das.get_schema_type("watchnew.New"), das.schematypes.Real))
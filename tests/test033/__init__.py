@@ -0,0 +1,96 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.schema = das.get_schema("index")
+      self.location = das.SchemaTypesRegistry.instance.get_location(os.path.dirname(__file__))
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      # Don't re register dynamic type when loading other tests schemas
+      das.SchemaTypesRegistry.instance.dyntypes.pop("index.Added", None)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testNames(self):
+      for name in ("index.A", "index.B", "index.C"):
+         st = das.get_schema_type(name)
+         self.assertEqual(das.get_schema_type_name(st), name)
+         self.assertEqual(self.schema.get_type_name(st), name)
+         self.assertEqual(self.location.get_schema_type_name(st), name)
+         self.assertIs(self.location.get_schema_type(name), st)
+         self.assertTrue(self.location.has_schema_type(name))
+
+   def testEqualValidators(self):
+      # E1 and E2 validators are equal, names are resolved by identity
+      e1 = das.get_schema_type("index.E1")
+      e2 = das.get_schema_type("index.E2")
+      self.assertEqual(e1, e2)
+      for st, name in ((e1, "index.E1"), (e2, "index.E2")):
+         self.assertEqual(self.schema.get_type_name(st), name)
+         self.assertEqual(self.location.get_schema_type_name(st), name)
+         self.assertEqual(das.get_schema_type_name(st), name)
+      self.assertEqual(das.get_schema_type_name(das.schematypes.Struct()), "")
+
+   def testUnknown(self):
+      unknown = das.schematypes.Struct(name=das.schematypes.String())
+      self.assertEqual(das.get_schema_type_name(unknown), "")
+      self.assertEqual(self.schema.get_type_name(unknown), "")
+      self.assertEqual(self.location.get_schema_type_name(unknown), "")
+      self.assertEqual(das.get_schema_type_name(das.schematypes.Integer()), "")
+      self.assertIsNone(self.location.get_schema_type("index.Unknown"))
+      self.assertFalse(self.location.has_schema_type("index.Unknown"))
+
+   def testAddSchemaType(self):
+      st = das.schematypes.Struct(value=das.schematypes.Integer())
+      self.assertTrue(das.add_schema_type("index.Added", st))
+      self.assertEqual(das.get_schema_type_name(st), "index.Added")
+      self.assertEqual(self.schema.get_type_name(st), "index.Added")
+      self.assertEqual(self.location.get_schema_type_name(st), "index.Added")
+      self.assertIs(self.location.get_schema_type("index.Added"), st)
+      # Still registered after a forced reload
+      das.load_schemas(force=True)
+      schema = das.get_schema("index")
+      self.assertEqual(das.get_schema_type_name(st), "index.Added")
+      self.assertEqual(schema.get_type_name(st), "index.Added")
+      # Reloaded validators replace previous ones
+      old = self.schema.types["index.A"]
+      new = das.get_schema_type("index.A")
+      self.assertIsNot(old, new)
+      self.assertEqual(das.get_schema_type_name(old), "")
+      self.assertEqual(das.get_schema_type_name(new), "index.A")
+
+   def testSharedValidator(self):
+      schema = das.validation.Schema(None, self.schema.path, dont_load=True)
+      st = das.schematypes.Struct(name=das.schematypes.String())
+      schema.add_type("index.First", st)
+      schema.add_type("index.Second", st)
+      self.assertEqual(schema.get_type_name(st), "index.First")
+      # Index is not rebuilt on each lookup
+      names = schema.type_names
+      self.assertEqual(schema.get_type_name(das.schematypes.Struct()), "")
+      self.assertIs(schema.type_names, names)
+      # Direct modifications
+      other = das.schematypes.Struct()
+      schema.types["index.First"] = other
+      self.assertEqual(schema.get_type_name(st), "index.Second")
+      self.assertEqual(schema.get_type_name(other), "index.First")
+      del(schema.types["index.Second"])
+      self.assertEqual(schema.get_type_name(st), "")
+      schema.types["index.Third"] = st
+      self.assertEqual(schema.get_type_name(st), "index.Third")
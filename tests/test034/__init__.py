@@ -0,0 +1,107 @@
+# -*- coding: utf8 -*-
+import os
+import shutil
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.cachedir = os.path.join(self.testdir, "cache")
+      self.extradir = os.path.join(self.testdir, "extra")
+      self.schema_cache = das.__schema_cache__
+      self.read_string = das.read_string
+      self.reads = 0
+      das.__schema_cache__ = self.cachedir
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      das.__schema_cache__ = self.schema_cache
+      das.read_string = self.read_string
+      os.environ["DAS_SCHEMA_PATH"] = self.testdir
+      for d in (self.cachedir, self.extradir):
+         if os.path.isdir(d):
+            shutil.rmtree(d)
+      das.load_schemas(force=True)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _count_reads(self):
+      def _read_string(*args, **kwargs):
+         self.reads += 1
+         return self.read_string(*args, **kwargs)
+      das.read_string = _read_string
+
+   def _check_types(self):
+      v = das.make_default("cached.Item")
+      v.name = "hello"
+      self.assertEqual(v.label, "hello")
+      v.range = das.get_schema_module("cached").Range(1, 2)
+      v.mode = "b"
+      v.items.append({"value": "text"})
+      v.items[0].count = 2
+      with self.assertRaises(das.ValidationError):
+         v.name = "hello world"
+      with self.assertRaises(das.ValidationError):
+         v.mode = "c"
+      with self.assertRaises(das.ValidationError):
+         v.items[0].count = -1
+      self.assertEqual(das.list_schema_types("cached", masters_only=True), ["cached.Item"])
+
+   # Test functions
+
+   def testCold(self):
+      self._count_reads()
+      das.load_schemas(force=True)
+      self.assertEqual(self.reads, 1)
+      self.assertEqual(len(os.listdir(self.cachedir)), 1)
+      self._check_types()
+
+   def testWarm(self):
+      das.load_schemas(force=True)
+      self._count_reads()
+      das.load_schemas(force=True)
+      self.assertEqual(self.reads, 0)
+      self._check_types()
+
+   def testInvalidation(self):
+      os.makedirs(self.extradir)
+      path = os.path.join(self.extradir, "cachedextra.schema")
+      with open(path, "w") as f:
+         f.write("{\"Value\": Integer()}\n")
+      os.environ["DAS_SCHEMA_PATH"] = os.pathsep.join([self.testdir, self.extradir])
+      das.load_schemas(force=True)
+      self.assertTrue(isinstance(das.get_schema_type("cachedextra.Value"), das.schematypes.Integer))
+      # Size and modification time are checked
+      with open(path, "w") as f:
+         f.write("{\"Value\": String()}\n")
+      self._count_reads()
+      das.load_schemas(force=True)
+      self.assertEqual(self.reads, 1)
+      self.assertTrue(isinstance(das.get_schema_type("cachedextra.Value"), das.schematypes.String))
+
+   def testCorrupted(self):
+      das.load_schemas(force=True)
+      for name in os.listdir(self.cachedir):
+         with open(os.path.join(self.cachedir, name), "wb") as f:
+            f.write("not a pickle")
+      self._count_reads()
+      das.load_schemas(force=True)
+      self.assertEqual(self.reads, 1)
+      self._check_types()
+
+   def testDisabled(self):
+      das.__schema_cache__ = ""
+      das.load_schemas(force=True)
+      self.assertFalse(os.path.isdir(self.cachedir))
+      self._check_types()
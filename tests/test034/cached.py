@@ -0,0 +1,17 @@
+import das # pylint: disable=import-error
+
+__all__ = ["Range", "dynamic_choices"]
+
+
+class Range(object):
+   def __init__(self, low=0, high=0):
+      super(Range, self).__init__()
+      self.low = low
+      self.high = high
+
+   def copy(self):
+      return Range(self.low, self.high)
+
+
+def dynamic_choices():
+   return ["a", "b"]
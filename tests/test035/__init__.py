@@ -0,0 +1,102 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import StringIO
+import das # pylint: disable=import-error
+
+
+def make_doc():
+   doc = das.make_default("golden.Doc")
+   doc.title = u"Caf\xe9 menu"
+   doc.text = "first line\nsecond line\n\n'quoted' \"text\""
+   for i in xrange(3):
+      doc.items.append({"name": "item%d" % i,
+                        "value": i * 1.5,
+                        "tags": set(["t%d" % j for j in xrange(i)]),
+                        "range": (i, i * 10)})
+   doc.items[1].notes = u"multi\nline unicode"
+   doc.named["first"] = doc.items[0]
+   doc.named[u"second"] = {"name": "x", "value": -1e-10, "tags": set(), "range": (0, 0)}
+   doc.data = {"int": 10, "real": 0.1, "str": "text", "bool": True, "none": None, "long": 10 ** 20, "unicode": u"€"}
+   doc.flags = set([3, 1, 2])
+   return doc
+
+
+def make_values():
+   return {"plain": {"b": [1, 2.5, None, (1, "a", u"b")], "a": {}},
+           "empty": [[], {}, set(), ()],
+           "sets": set(["a", "b", "c"]),
+           "nested": [[[["deep", {"k": ["v\nw"]}]]]],
+           "keys": {1: "int", (1, 2): "tuple", u"u": "unicode", "s": "str"},
+           "strings": ["", "'", '"', "\\", "\t", "a\nb", u"\xe9", "\xc3\xa9", u"a\nb"]}
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.output = os.path.join(self.testdir, "test.das")
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _golden(self, name):
+      with open(os.path.join(self.testdir, name), "rb") as f:
+         return f.read()
+
+   def _pprint(self, d, **kwargs):
+      s = StringIO.StringIO()
+      das.pprint(d, stream=s, **kwargs)
+      return s.getvalue()
+
+   # Test functions
+
+   def testStruct(self):
+      self.assertEqual(self._pprint(make_doc(), encoding="utf8"), self._golden("doc.golden"))
+
+   def testValues(self):
+      self.assertEqual(self._pprint(make_values(), encoding="utf8"), self._golden("values.golden"))
+
+   def testArguments(self):
+      d = make_values()
+      out = (self._pprint(d["plain"], indent="\t", depth=2, inline=True, eof=False) + "\n" +
+             self._pprint(d["nested"], indent="    ", depth=1) +
+             self._pprint("scalar", depth=3) +
+             self._pprint(1.0, inline=True, eof=False))
+      self.assertEqual(out, self._golden("arguments.golden"))
+
+   def testWrite(self):
+      das.write(make_doc(), self.output)
+      with open(self.output, "rb") as f:
+         lines = f.read().split("\n")
+      # Skip author and date
+      lines = filter(lambda x: not x.startswith("# author:") and not x.startswith("# date:"), lines)
+      self.assertEqual("\n".join(lines), self._golden("write.golden"))
+      self.assertEqual(das.read(self.output), make_doc())
+
+   def testNonAscii(self):
+      with self.assertRaises(Exception):
+         self._pprint({"\xc3\xa9": 1})
+      with self.assertRaises(Exception):
+         self._pprint({u"\xe9": 1})
+      with self.assertRaises(Exception):
+         self._pprint(["\xc3\xa9"])
+
+   def testDeep(self):
+      d = []
+      for _ in xrange(5000):
+         d = [d]
+      out = self._pprint(d, indent="")
+      self.assertEqual(out, "[\n" * 5000 + "[\n]" + "\n]" * 5000 + "\n")
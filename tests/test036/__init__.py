@@ -0,0 +1,92 @@
+# -*- coding: utf8 -*-
+import os
+import stat
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.output = os.path.join(self.testdir, "test.das")
+      self.item = das.make("atomic.Item", name="item", count=1, tags=["a", "b"])
+      self.fsync = os.fsync
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _content(self):
+      with open(self.output, "rb") as f:
+         return f.read()
+
+   def _temp_files(self):
+      return [x for x in os.listdir(self.testdir) if x.endswith(".tmp")]
+
+   # Test functions
+
+   def testAtomic(self):
+      das.write(self.item, self.output, atomic=True)
+      self.assertEqual(das.read(self.output), self.item)
+      das.write(self.item, self.output, atomic=True, fsync=True)
+      self.assertEqual(das.read(self.output), self.item)
+      self.assertEqual(self._temp_files(), [])
+
+   def testFailure(self):
+      das.write(self.item, self.output)
+      content = self._content()
+      # Non-ascii byte string fails during serialization
+      self.item._dict["name"] = "\xc3\xa9"
+      with self.assertRaises(Exception):
+         das.write(self.item, self.output, encoding="ascii", atomic=True, validate=False)
+      self.assertEqual(self._content(), content)
+      self.assertEqual(self._temp_files(), [])
+      # Previous behaviour: file is truncated
+      with self.assertRaises(Exception):
+         das.write(self.item, self.output, encoding="ascii", validate=False)
+      self.assertNotEqual(self._content(), content)
+
+   def testSyncFailure(self):
+      das.write(self.item, self.output)
+      content = self._content()
+
+      def fsync(fd):
+         raise OSError(5, "Input/output error")
+
+      self.item.name = "other"
+      das.os.fsync = fsync
+      try:
+         with self.assertRaises(OSError):
+            das.write(self.item, self.output, atomic=True, fsync=True)
+      finally:
+         das.os.fsync = self.fsync
+      self.assertEqual(self._content(), content)
+      self.assertEqual(self._temp_files(), [])
+
+   def testPermissions(self):
+      das.write(self.item, self.output)
+      os.chmod(self.output, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP)
+      das.write(self.item, self.output, atomic=True)
+      self.assertEqual(os.stat(self.output).st_mode & 0777, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP)
+
+   def testSkipValidation(self):
+      # Modify data without validation
+      self.item._dict["count"] = -1
+      with self.assertRaises(das.ValidationError):
+         das.write(self.item, self.output)
+      self.assertFalse(os.path.isfile(self.output))
+      das.write(self.item, self.output, validate=False)
+      with self.assertRaises(das.ValidationError):
+         das.read(self.output)
@@ -0,0 +1,176 @@
+# -*- coding: utf8 -*-
+import os
+import glob
+import unittest
+import das # pylint: disable=import-error
+
+
+# Types of other tests schemas without a valid default value
+NoDefault = set(["asset.Token", "asset.TokenStringValue", "choices.Static", "choices.Timed"])
+
+# Types with values das.write can't write or das.read can't read back
+#   cached.Item: 'range' is a Class value written using its repr
+#   many.Values: value schema type is an unnamed Or alternative, not written in header
+NotWritable = set(["cached.Item", "many.Values"])
+
+# Non default values of other tests schemas types: test directory -> [(type name, fields)]
+Samples = {"test038": [("lazy.Group", {"title": "group",
+                                       "main": {"name": "main", "count": 1},
+                                       "items": [{"name": "a", "count": 2}, {"name": "b", "count": 3}],
+                                       "named": {"c": {"name": "c", "count": 4}},
+                                       "shape": {"radius": 2.0},
+                                       "note": "note"})],
+           "test042": [("table.Sheet", {"name": "sheet",
+                                        "note": u"caf\xe9",
+                                        "scale": 0.5,
+                                        "visible": False,
+                                        "rows": [[{"text": "a", "size": 1, "tags": ["x", "y"]}], []],
+                                        "named": {"first": {"text": "d", "tags": ["u"]}},
+                                        "lookup": {"k1": [1, 2, 3], "k2": []}})],
+           "test047": [("many.Doc", {"title": "doc",
+                                     "items": [{"name": "item", "count": 3, "label": "l"}],
+                                     "shape": {"side": 1.5},
+                                     "tags": set(["a", "b"]),
+                                     "pair": (1, "p"),
+                                     "extra": {"w": 0.5}})]}
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.output = os.path.join(self.testdir, "test.dasb")
+      self.text_output = os.path.join(self.testdir, "test.das")
+      self.doc = das.make_default("binary.Doc")
+      self.doc.title = u"caf\xe9"
+      self.doc.size = 2 ** 70
+      self.doc.flag = True
+      self.doc.items = [{"name": "a", "count": 2, "weight": 0.5}, {"name": "b", "weight": 2.0}]
+      self.doc.named = {"a": {"name": "a", "count": -1, "weight": 1.0}}
+      self.doc.tags = set(["x", "y"])
+      self.doc.pair = (-3, "three")
+      self.doc.value = "ten"
+      self.doc.extra = {"values": [1.5, -2.25, 1e300]}
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      for path in (self.output, self.text_output):
+         if os.path.isfile(path):
+            os.remove(path)
+      if os.environ["DAS_SCHEMA_PATH"] != self.testdir:
+         os.environ["DAS_SCHEMA_PATH"] = self.testdir
+         das.load_schemas()
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _check_round_trip(self, value, name):
+      # Binary format reads back the same data das.write/das.read does
+      das.write(value, self.text_output)
+      expected = das.read(self.text_output)
+      das.write_binary(value, self.output)
+      for validate in (True, False):
+         rv = das.read_binary(self.output, validate=validate)
+         self.assertEqual(rv, expected, "%s (validate=%s)" % (name, validate))
+         self.assertIs(type(rv), type(expected), "%s (validate=%s)" % (name, validate))
+         if isinstance(rv, das.types.TypeBase):
+            self.assertEqual(rv._get_schema_type(), expected._get_schema_type())
+
+   # Test functions
+
+   def testRoundTrip(self):
+      self._check_round_trip(self.doc, "binary.Doc")
+      rv = das.read_binary(self.output)
+      self.assertEqual(rv.title, u"caf\xe9")
+      self.assertEqual(rv.size, 2 ** 70)
+      self.assertEqual(rv.extra["values"], [1.5, -2.25, 1e300])
+      self.assertIsInstance(rv.pair, das.types.Tuple)
+      self.assertIsInstance(rv.tags, das.types.Set)
+
+   def testMeta(self):
+      das.write_binary(self.doc, self.output)
+      md = das.read_meta(self.output)
+      self.assertEqual(md["schema_type"], "binary.Doc")
+      self.assertEqual(md["schema_version"], "1.0")
+      self.assertEqual(md["encoding"], "utf8")
+      self.assertEqual(md["version"], das.__version__)
+
+   def testMixins(self):
+      mixin = das.get_schema_module("binary").ItemMixin
+      das.write_binary(self.doc, self.output)
+      for validate in (True, False):
+         rv = das.read_binary(self.output, validate=validate)
+         self.assertIsInstance(rv.items[0], mixin)
+         self.assertIsInstance(rv.named["a"], mixin)
+         self.assertEqual(rv.items[0].total(), 1.0)
+
+   def testSkipValidation(self):
+      self.doc.items[0]._dict["count"] = "two"
+      das.write_binary(self.doc, self.output, validate=False)
+      with self.assertRaises(das.ValidationError):
+         das.read_binary(self.output)
+      rv = das.read_binary(self.output, validate=False)
+      self.assertEqual(rv.items[0].count, "two")
+      # Data read using another schema type is validated
+      item = das.make("binary.Item", name="a", count=2, weight=0.5)
+      das.write_binary(item, self.output)
+      for schema_type in ("binary.Counted", das.get_schema_type("binary.Counted")):
+         with self.assertRaises(das.ValidationError):
+            das.read_binary(self.output, schema_type=schema_type, validate=False)
+      self.assertEqual(das.read_binary(self.output, schema_type=das.get_schema_type("binary.Item"), validate=False), item)
+
+   def testInvalidData(self):
+      das.write_binary(self.doc, self.output)
+      with open(self.output, "rb") as f:
+         content = f.read()
+      for data in (content[:-3], content + "N", content.replace("DASB1\nd", "DASB1\nz")):
+         with open(self.output, "wb") as f:
+            f.write(data)
+         with self.assertRaises(das.ParseError):
+            das.read_binary(self.output)
+      # Text das files are not binary files
+      das.write(self.doc, self.text_output)
+      with self.assertRaises(das.ParseError):
+         das.read_binary(self.text_output)
+
+   def testDeprecated(self):
+      old = das.make("binary.Old", name="old", former={"name": "f", "weight": 0.5}, legacy={"a": 1}, parent={"name": "p", "weight": 2.0})
+      self._check_round_trip(old, "binary.Old")
+      rv = das.read_binary(self.output, validate=False)
+      self.assertIsInstance(rv.former, das.get_schema_module("binary").ItemMixin)
+      self.assertEqual(rv.former._get_schema_type(), das.get_schema_type("binary.Item"))
+      self.assertEqual(rv.legacy._get_schema_type(), das.get_schema_type("binary.Old")["legacy"].type)
+      # Deprecated fields accept None
+      st = das.get_schema_type("binary.Old")
+      value = {"name": "old", "former": None, "legacy": None}
+      self.assertEqual(das.binary.build(value, st), das.validate(value, "binary.Old"))
+
+   def testSchemas(self):
+      # Round trip default values of all test schemas types, and some other data
+      count = 0
+      for testdir in sorted(glob.glob(os.path.join(os.path.dirname(self.testdir), "test*"))):
+         if not os.path.isdir(testdir) or not glob.glob(os.path.join(testdir, "*.schema")):
+            continue
+         os.environ["DAS_SCHEMA_PATH"] = testdir
+         das.load_schemas()
+         for name in das.list_schema_types():
+            if name in NoDefault:
+               with self.assertRaises(das.ValidationError):
+                  das.make_default(name)
+               continue
+            value = das.make_default(name)
+            if not isinstance(value, das.types.TypeBase) or name in NotWritable:
+               continue
+            self._check_round_trip(value, name)
+            count += 1
+         for name, args in Samples.get(os.path.basename(testdir), []):
+            self._check_round_trip(das.make(name, **args), name)
+            count += 1
+      self.assertTrue(count > 50)
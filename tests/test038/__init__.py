@@ -0,0 +1,151 @@
+# -*- coding: utf8 -*-
+import os
+import sys
+import threading
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.das")
+      self.output2 = os.path.join(os.path.dirname(__file__), "test2.das")
+      self.group = das.make_default("lazy.Group")
+      self.group.title = "group"
+      self.group.main = {"name": "main", "count": 1}
+      self.group.items = [{"name": "a", "count": 2}, {"name": "b", "count": 3}]
+      self.group.named = {"c": {"name": "c", "count": 4}}
+      self.group.shape = {"side": 2.0}
+      das.write(self.group, self.output)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      for path in (self.output, self.output2):
+         if os.path.isfile(path):
+            os.remove(path)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _write_invalid(self):
+      # Negative count in second sequence item
+      with open(self.output, "rb") as f:
+         content = f.read()
+      with open(self.output, "wb") as f:
+         f.write(content.replace("'count': 3L", "'count': -3L"))
+
+   # Test functions
+
+   def testLazy(self):
+      g = das.read(self.output, lazy=True)
+      self.assertIsInstance(g, das.types.Struct)
+      self.assertTrue(g._is_lazy())
+      self.assertEqual(g.title, "group")
+      self.assertFalse(g._is_lazy())
+      # Struct values are only validated when accessed
+      self.assertTrue(g.main._is_lazy())
+      self.assertIsInstance(g.items, das.types.Sequence)
+      self.assertTrue(all(x._is_lazy() for x in g.items))
+      self.assertEqual(g.items[1].count, 3)
+      self.assertFalse(g.items[1]._is_lazy())
+      self.assertTrue(g.items[0]._is_lazy())
+      self.assertIsInstance(g.named, das.types.Dict)
+      self.assertTrue(g.named["c"]._is_lazy())
+      self.assertEqual(g, das.read(self.output))
+
+   def testMixins(self):
+      g = das.read(self.output, lazy=True)
+      self.assertEqual(g.main.label(), "main:1")
+      self.assertEqual([x.label() for x in g.items], ["a:2", "b:3"])
+
+   def testDeferredValidation(self):
+      self._write_invalid()
+      with self.assertRaises(das.ValidationError):
+         das.read(self.output)
+      g = das.read(self.output, lazy=True)
+      self.assertEqual(g.items[0].count, 2)
+      with self.assertRaises(das.ValidationError):
+         g.items[1].count
+      # Failed materialization is retried on next access
+      self.assertTrue(g.items[1]._is_lazy())
+      with self.assertRaises(das.ValidationError):
+         g.items[1].name
+
+   def testForceValidation(self):
+      self._write_invalid()
+      g = das.read(self.output, lazy=True)
+      with self.assertRaises(das.ValidationError):
+         g._validate()
+      g = das.read(self.output, lazy=True)
+      with self.assertRaises(das.ValidationError):
+         das.write(g, self.output2)
+      g = das.read(self.output, lazy=True, schema_type="lazy.Group")
+      g.items[0]._validate()
+      self.assertFalse(g.items[0]._is_lazy())
+
+   def testModify(self):
+      g = das.read(self.output, lazy=True)
+      g.items[0].count = 10
+      g.main = {"name": "other", "count": 5}
+      with self.assertRaises(das.ValidationError):
+         g.items[1].count = -1
+      das.write(g, self.output2)
+      g2 = das.read(self.output2)
+      self.assertEqual(g2.items[0].count, 10)
+      self.assertEqual(g2.main.name, "other")
+      self.assertEqual(g2.items[1].count, 3)
+
+   def testOr(self):
+      g = das.read(self.output, lazy=True)
+      self.assertEqual(g.shape.side, 2.0)
+      self.assertFalse(g.shape._is_lazy())
+
+   def testCompatibility(self):
+      # File saved using an older schema version without 'note' and 'main.count' fields
+      with open(self.output, "rb") as f:
+         content = f.read()
+      content = content.replace("# schema_version: 1.1", "# schema_version: 1.0")
+      self.assertTrue("'note'" in content)
+      content = content.replace("  'note': 'none',\n", "")
+      self.assertFalse("'note'" in content)
+      content = content.replace("    'count': 1L,\n", "")
+      with open(self.output, "wb") as f:
+         f.write(content)
+      g = das.read(self.output, lazy=True)
+      self.assertEqual(g.note, "none")
+      self.assertEqual(g.main.count, 0)
+      self.assertEqual(g, das.read(self.output))
+
+   def testThreads(self):
+      # Concurrent first accesses materialize the struct once, none sees a partial dictionary
+      self.group.items = [{"name": "i%d" % i, "count": i} for i in xrange(2000)]
+      das.write(self.group, self.output)
+      results = []
+
+      def run(g):
+         try:
+            results.append((len(g.items), g.note))
+         except Exception, e:
+            results.append(e)
+
+      interval = sys.getcheckinterval()
+      sys.setcheckinterval(1)
+      try:
+         for _ in xrange(5):
+            g = das.read(self.output, lazy=True)
+            threads = [threading.Thread(target=run, args=(g,)) for _ in xrange(4)]
+            for thread in threads:
+               thread.start()
+            for thread in threads:
+               thread.join()
+      finally:
+         sys.setcheckinterval(interval)
+      self.assertEqual(results, [(2000, "none")] * 20)
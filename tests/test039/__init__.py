@@ -0,0 +1,127 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.das")
+      self.mod = das.get_schema_module("copy")
+      self.group = das.make_default("copy.Group")
+      self.group.title = "group"
+      self.group.main = {"name": "main", "count": 1, "tags": ["a"], "range": (0, 1), "flags": set(["x"]), "extra": {"w": 1.0}}
+      self.group.items = [{"name": "a", "count": 2, "tags": [], "range": (1, 2), "flags": set(), "extra": {}},
+                          {"name": "b", "count": 3, "tags": ["b", "c"], "range": (2, 3), "flags": set(["y"]), "extra": {"h": 2.0}}]
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _parent(self, value):
+      cb = value.__dict__.get("_validate_globally_cb", None)
+      return (None if cb is None else cb.__self__)
+
+   # Test functions
+
+   def testCopy(self):
+      c = das.copy(self.group)
+      self.assertEqual(c, self.group)
+      self.assertIs(c.__class__, self.group.__class__)
+      self.assertIsInstance(c, self.mod.GroupMixin)
+      self.assertIs(c._get_schema_type(), self.group._get_schema_type())
+      self.assertIs(c.items[1].range._get_schema_type(), self.group.items[1].range._get_schema_type())
+      self.assertIsInstance(c.items[1].flags, das.types.Set)
+      self.assertIsInstance(c.main.extra, das.types.Dict)
+      # No shared containers
+      self.assertIsNot(c.items, self.group.items)
+      self.assertIsNot(c.items[1], self.group.items[1])
+      self.assertIsNot(c.items[1].tags, self.group.items[1].tags)
+      self.assertIsNot(c.main.extra, self.group.main.extra)
+
+   def testIndependent(self):
+      c = das.copy(self.group)
+      c.items[1].tags.append("d")
+      c.main.extra["z"] = 3.0
+      c.items[0].name = "c"
+      self.assertEqual(self.group.items[1].tags, ["b", "c"])
+      self.assertEqual(self.group.main.extra, {"w": 1.0})
+      self.assertEqual(self.group.items[0].name, "a")
+      self.group.items[1].flags.add("z")
+      self.assertEqual(c.items[1].flags, set(["y"]))
+
+   def testLinks(self):
+      c = das.copy(self.group)
+      self.assertIs(self._parent(c.items), c)
+      self.assertIs(self._parent(c.items[0]), c.items)
+      self.assertIs(self._parent(c.items[0].tags), c.items[0])
+      # Global validation goes through the copy
+      with self.assertRaises(das.ValidationError):
+         c.items[1].name = "a"
+      self.group.items[1].name = "d"
+
+   def testLazy(self):
+      das.write(self.group, self.output)
+      g = das.read(self.output, lazy=True)
+      # Group global validation accessed items but not main
+      self.assertTrue(g.main._is_lazy())
+      c = das.copy(g.main)
+      # Parsed values are shared until accessed
+      self.assertTrue(c._is_lazy())
+      g.main.name = "other"
+      g.main.tags.append("d")
+      self.assertEqual(c.name, "main")
+      self.assertEqual(c.tags, ["a"])
+      self.assertEqual(c, self.group.main)
+      c.count = 10
+      self.assertEqual(g.main.count, 1)
+      c = das.copy(g)
+      self.assertIsInstance(c, self.mod.GroupMixin)
+      self.assertEqual(c.items, self.group.items)
+
+   def testLazyShared(self):
+      n = das.make_default("copy.Node")
+      n.name = "root"
+      n.children = [{"name": "child", "children": []}]
+      das.write(n, self.output)
+      n = das.read(self.output, lazy=True)
+      self.assertTrue(n._is_lazy())
+      for c in (das.copy(n), das.clone(n)):
+         # Parsed values are shared, neither struct is materialized
+         self.assertIs(c.__dict__["_lazy_values"], n.__dict__["_lazy_values"])
+         self.assertTrue(n._is_lazy())
+         self.assertTrue(c._is_lazy())
+         self.assertNotIn("_dict", n.__dict__)
+         self.assertNotIn("_dict", c.__dict__)
+
+   def testClass(self):
+      h = das.make_default("copy.Holder")
+      h.value = self.mod.Value(2)
+      h.node = {"name": "root", "children": [{"name": "child", "children": []}]}
+      das.write(h, self.output)
+      h = das.read(self.output, lazy=True)
+      c = das.copy(h)
+      # Class values are not shared
+      self.assertFalse(c._is_lazy())
+      self.assertEqual(c.value, h.value)
+      self.assertIsNot(c.value, h.value)
+      # Recursive types without Class values are shared
+      n = das.read(self.output, lazy=True).node
+      self.assertTrue(das.copy(n)._is_lazy())
+      self.assertEqual(das.copy(n), n)
+
+   def testShallow(self):
+      c = das.copy(self.group, deep=False)
+      self.assertIs(c.items, self.group.items)
@@ -0,0 +1,41 @@
+import das # pylint: disable=import-error
+
+__all__ = ["Value"]
+
+
+class Value(object):
+   def __init__(self, v=0):
+      super(Value, self).__init__()
+      self.v = v
+
+   def copy(self):
+      return Value(self.v)
+
+   def __eq__(self, oth):
+      return (isinstance(oth, Value) and self.v == oth.v)
+
+   def __ne__(self, oth):
+      return not self.__eq__(oth)
+
+   def __repr__(self):
+      return "Value(%d)" % self.v
+
+
+class GroupMixin(das.Mixin):
+   Calls = 0
+
+   @classmethod
+   def get_schema_type(klass):
+      return "copy.Group"
+
+   def __init__(self, *args, **kwargs):
+      super(GroupMixin, self).__init__(*args, **kwargs)
+
+   def _validate_globally(self):
+      GroupMixin.Calls += 1
+      names = [x.name for x in self.items]
+      if len(set(names)) != len(names):
+         raise Exception("Duplicate item names")
+
+
+das.register_mixins(GroupMixin)
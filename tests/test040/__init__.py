@@ -0,0 +1,102 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.mixin = das.get_schema_module("clone").ItemMixin
+      self.doc = das.make_default("clone.Doc")
+      item = {"name": "a", "count": 2, "tags": ["x", "y"], "range": (0, 1), "flags": set(["f"]), "extra": {"w": 1.0}}
+      self.doc.items = [item, dict(item, name="b")]
+      self.doc.named = {"c": dict(item, name="c")}
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      pass
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _parent(self, value):
+      cb = value.__dict__.get("_validate_globally_cb", None)
+      return (None if cb is None else cb.__self__)
+
+   # Test functions
+
+   def testClone(self):
+      c = das.clone(self.doc)
+      self.assertEqual(c, self.doc)
+      self.assertIs(c._get_schema_type(), self.doc._get_schema_type())
+      for a, b in ((c.items, self.doc.items), (c.items[0], self.doc.items[0]), (c.named["c"].range, self.doc.named["c"].range),
+                   (c.items[1].flags, self.doc.items[1].flags), (c.named, self.doc.named), (c.items[0].extra, self.doc.items[0].extra)):
+         self.assertIsNot(a, b)
+         self.assertIs(a.__class__, b.__class__)
+         self.assertIs(a._get_schema_type(), b._get_schema_type())
+      c.items[0].tags.append("z")
+      c.named["c"].extra["h"] = 2.0
+      self.assertEqual(self.doc.items[0].tags, ["x", "y"])
+      self.assertEqual(self.doc.named["c"].extra, {"w": 1.0})
+
+   def testMixins(self):
+      inits = self.mixin.Inits
+      c = das.clone(self.doc)
+      self.assertIsInstance(c.items[0], self.mixin)
+      self.assertIsInstance(c.named["c"], self.mixin)
+      self.assertEqual(c.items[1].total(), 4)
+      # Mixins are not bound again
+      self.assertEqual(self.mixin.Inits, inits)
+
+   def testMixinState(self):
+      log = das.make_default("clone.Log")
+      log.record("a")
+      c = das.clone(log)
+      self.assertEqual(c.history, [1])
+      self.assertIsNot(c.history, log.history)
+      c.record("b")
+      self.assertEqual(log.history, [1])
+      self.assertEqual(log, ["a"])
+
+   def testForwarding(self):
+      item = das.make_default("clone.Item")
+      item._dict["keys"] = 1
+      item._check_reserved("keys")
+      c = das.clone(item)
+      self.assertIs(c._keys.__self__, c._dict)
+
+   def testLinks(self):
+      c = das.clone(self.doc)
+      self.assertIsNone(self._parent(c))
+      self.assertIs(self._parent(c.items), c)
+      self.assertIs(self._parent(c.items[0]), c.items)
+      self.assertIs(self._parent(c.named["c"]), c.named)
+      self.assertIs(self._parent(c.items[0].range), c.items[0])
+      with self.assertRaises(das.ValidationError):
+         c.items[0].count = -1
+
+   def testState(self):
+      self.doc.items[0]._enable_global_validation(False)
+      c = das.clone(self.doc)
+      self.assertFalse(c.items[0]._is_global_validation_enabled())
+      self.assertTrue(c.items[1]._is_global_validation_enabled())
+
+   def testNoValidation(self):
+      # Data is assumed to be valid
+      self.doc.items[0]._dict["count"] = -1
+      c = das.clone(self.doc)
+      self.assertEqual(c.items[0].count, -1)
+      with self.assertRaises(das.ValidationError):
+         c._validate()
+
+   def testValues(self):
+      self.assertEqual(das.clone(1), 1)
+      self.assertEqual(das.clone([1, {"a": 2}]), [1, {"a": 2}])
@@ -0,0 +1,32 @@
+import das # pylint: disable=import-error
+
+class ItemMixin(das.Mixin):
+   Inits = 0
+
+   @classmethod
+   def get_schema_type(klass):
+      return "clone.Item"
+
+   def __init__(self, *args, **kwargs):
+      super(ItemMixin, self).__init__(*args, **kwargs)
+      ItemMixin.Inits += 1
+
+   def total(self):
+      return self.count * len(self.tags)
+
+
+class LogMixin(das.Mixin):
+   @classmethod
+   def get_schema_type(klass):
+      return "clone.Log"
+
+   def __init__(self, *args, **kwargs):
+      super(LogMixin, self).__init__(*args, **kwargs)
+      self.history = []
+
+   def record(self, msg):
+      self.append(msg)
+      self.history.append(len(self))
+
+
+das.register_mixins(ItemMixin, LogMixin)
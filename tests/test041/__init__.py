@@ -0,0 +1,90 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.das")
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _check_types(self, a, b):
+      self.assertIs(type(a), type(b), "%s / %s" % (repr(a), repr(b)))
+      if isinstance(a, dict):
+         self.assertEqual(sorted(map(repr, a.keys())), sorted(map(repr, b.keys())))
+         for k in a:
+            self._check_types(a[k], b[k])
+      elif isinstance(a, (list, tuple)):
+         for x, y in zip(a, b):
+            self._check_types(x, y)
+      elif isinstance(a, set):
+         self.assertEqual(sorted(map(repr, a)), sorted(map(repr, b)))
+
+   # Test functions
+
+   def testValues(self):
+      src = "{'a': 'caf\xc3\xa9', 'caf\xc3\xa9': u'abc', 'b': [u'd\xc3\xa9j\xc3\xa0', ('x', 'y\xc3\xa9'), set(['\xc3\xa0', 'b'])], 'c': {'d': [{'e': r'\\\\\xc3\xa9'}]}, 'f': 1}"
+      rv = das.read_string(src, encoding="utf8", engine="literal")
+      # Same result as parsing then decoding
+      expected = das.decode(das.parser.parse(src, encoding="utf8"), "utf8")
+      self.assertEqual(rv, expected)
+      self._check_types(rv, expected)
+      self._check_types(rv, das.read_string(src, encoding="utf8", engine="eval"))
+      self.assertEqual(rv["a"], u"caf\xe9")
+      self.assertIs(type(rv["caf\xc3\xa9"]), str)
+      self.assertEqual(rv["b"][1][1], u"y\xe9")
+      self.assertEqual(rv["b"][2], set([u"\xe0", "b"]))
+      self.assertEqual(rv["c"]["d"][0]["e"], u"\\\\\xe9")
+      # No encoding, no decoding
+      self.assertEqual(das.read_string(src, engine="literal")["a"], "caf\xc3\xa9")
+
+   def testInvalidEncoding(self):
+      with self.assertRaises(das.ParseError):
+         das.read_string("['\xe9']", encoding="utf8", engine="literal")
+
+   def testSchema(self):
+      item = das.make_default("decoding.Item")
+      self.assertEqual(item.name, u"\xe9l\xe9ment")
+      self.assertEqual(item.kind, u"carr\xe9")
+      self.assertEqual(item.tags, [u"\xe9t\xe9", "hiver"])
+      self.assertIs(type(item.tags[1]), str)
+      self.assertEqual(item.pair, (u"\xe0", "b"))
+      self.assertEqual(item.extra["cle"], u"valeur \xe9")
+      st = das.get_schema_type("decoding.Item")
+      self.assertEqual(st["name"].description, u"Nom de l'\xe9l\xe9ment")
+      self.assertEqual(st["kind"].choices, [u"carr\xe9", u"cercle", "triangle"])
+      self.assertIs(type(st["kind"].choices[2]), str)
+      item.code = u"\xe91"
+      with self.assertRaises(das.ValidationError):
+         item.code = "a12"
+      mode = das.get_schema_type("decoding.Mode")
+      self.assertEqual(sorted(mode.enum.keys()), [u"arr\xeat", "marche"])
+      self.assertEqual(mode.description, "Mode de fonctionnement")
+      item.mode = u"arr\xeat"
+      self.assertEqual(item.mode, 0)
+
+   def testReadWrite(self):
+      item = das.make_default("decoding.Item")
+      item.name = u"\xe0 \xe9"
+      item.tags.append(u"automne \xe9")
+      das.write(item, self.output)
+      for engine in ("literal", "eval"):
+         rv = das.read(self.output, engine=engine)
+         self.assertEqual(rv, item)
+         self._check_types(rv._dict, item._dict)
@@ -0,0 +1,115 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.csv")
+      self.sheet = das.make_default("table.Sheet")
+      self.sheet.name = "sheet \"one\""
+      self.sheet.scale = 0.5
+      self.sheet.rows = [[{"text": "a", "size": 1, "tags": ["x", "y"]}, {"text": "b", "tags": []}],
+                         [],
+                         [{"text": "c", "size": 3, "tags": ["z"]}]]
+      self.sheet.named = {"first": {"text": "d", "tags": ["u", "v", "w"]}, "second": {"text": "e", "size": 0, "tags": []}}
+      self.sheet.lookup = {"k1": [1, 2, 3], "k2": [], "k3": [4]}
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testRoundTrip(self):
+      das.write_csv(self.sheet, self.output)
+      rv = das.read_csv(self.output)
+      self.assertEqual(len(rv), 1)
+      self.assertEqual(rv[0], self.sheet)
+      self.assertEqual(rv[0].name, "sheet \"one\"")
+      self.assertFalse("note" in rv[0])
+      self.assertIsInstance(rv[0].rows[0][1], das.types.Struct)
+      self.assertEqual(rv[0]._get_schema_type(), das.get_schema_type("table.Sheet"))
+
+   def testDelimiters(self):
+      for delimiter, newline in ((",", "\r\n"), (";", "\n"), ("::", "\n"), ("\t", "\r")):
+         das.write_csv(self.sheet, self.output, delimiter=delimiter, newline=newline)
+         self.assertEqual(das.read_csv(self.output, delimiter=delimiter, newline=newline), [self.sheet])
+
+   def testCells(self):
+      item = das.make_default("table.Item")
+      item.name = "a\rb" + "x" * 200000
+      item.value = 3
+      das.write_csv([item], self.output)
+      self.assertEqual(das.read_csv(self.output), [item])
+      # Delimiter is a regular expression
+      das.write_csv([item], self.output, delimiter="|")
+      self.assertEqual(das.read_csv(self.output, delimiter="[|]"), [item])
+      das.write_csv([item], self.output, delimiter="\t ")
+      self.assertEqual(das.read_csv(self.output, delimiter="\t *"), [item])
+      das.write_csv([item], self.output, newline="\r\n")
+      self.assertEqual(das.read_csv(self.output, newline="\r?\n"), [item])
+
+   def testManyBlocks(self):
+      items = []
+      for i in xrange(500):
+         item = das.make_default("table.Item")
+         item.name = "item%d" % i
+         item.value = i
+         items.append(item)
+      das.write_csv(items + [self.sheet], self.output, alias={"table.Item": "i"})
+      rv = das.read_csv(self.output)
+      self.assertEqual(rv[:-1], items)
+      self.assertEqual(rv[-1], self.sheet)
+
+   def testTable(self):
+      table = [["<schematype>", "table.Item.name", "table.Item.value"],
+               ["table.Item", "a", "1"],
+               ["table.Item", "b", ""],
+               ["", "", "3"]]
+      rv = das.read_csv_table(table)
+      self.assertEqual([(x.name, x.value) for x in rv], [("a", 1), ("b", 3)])
+      # Input table is left untouched
+      self.assertEqual(len(table), 4)
+
+   def testLayout(self):
+      self.sheet.name = "s\"1\""
+      self.sheet.rows = [[{"text": "a", "size": 1, "tags": ["x", "y"]}], [], [{"text": "c", "tags": []}, {"text": "d", "tags": ["z"]}]]
+      self.sheet.named = {}
+      self.sheet.lookup = {"k": [1, 2]}
+      item = das.make_default("table.Item")
+      item.name = "i"
+      das.write_csv([self.sheet, item], self.output, alias={"table.Item": "i"})
+      with open(self.output, "rb") as f:
+         lines = [l.split("\t") for l in f.read().split("\n")]
+      self.assertEqual(lines, [["<schematype>", "table.Sheet.lookup{key}", "table.Sheet.lookup{value}[index]", "table.Sheet.lookup{value}[value]",
+                                "table.Sheet.name", "table.Sheet.rows[index]", "table.Sheet.rows[value][index]", "table.Sheet.rows[value][value].size",
+                                "table.Sheet.rows[value][value].tags[index]", "table.Sheet.rows[value][value].tags[value]",
+                                "table.Sheet.rows[value][value].text", "table.Sheet.scale", "table.Sheet.visible", "i.name", "i.value"],
+                               ["table.Sheet", "k", "0", "1", "s\\\"1\\\"", "0", "0", "1", "0", "x", "a", "0.5", "true", "", ""],
+                               ["", "k", "1", "2", "", "0", "0", "", "1", "y", "", "", "", "", ""],
+                               ["", "", "", "", "", "1", "", "", "", "", "", "", "", "", ""],
+                               ["", "", "", "", "", "2", "0", "", "", "", "c", "", "", "", ""],
+                               ["", "", "", "", "", "2", "1", "", "0", "z", "d", "", "", "", ""],
+                               ["table.Item as i", "", "", "", "", "", "", "", "", "", "", "", "", "i", "0"]])
+      self.assertEqual(das.read_csv(self.output), [self.sheet, item])
+
+   def testInvalid(self):
+      with open(self.output, "wb") as f:
+         f.write("<schematype>\ttable.Item.name\ttable.Item.value\ntable.Item\ta\n")
+      with self.assertRaises(Exception):
+         das.read_csv(self.output)
+      self.assertEqual(das.read_csv(self.output + ".missing"), [])
@@ -0,0 +1,77 @@
+# -*- coding: utf8 -*-
+import os
+import types
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.output = os.path.join(os.path.dirname(__file__), "test.csv")
+      self.data = []
+      for i in xrange(20):
+         e = das.make_default("stream.Entry")
+         e.name = "entry%d" % i
+         e.values = range(i % 4)
+         e.attrs = dict(("k%d" % j, "v%d" % j) for j in xrange(i % 3))
+         self.data.append(e)
+         if i % 5 == 0:
+            n = das.make_default("stream.Note")
+            n.text = "note %d" % i
+            self.data.append(n)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isfile(self.output):
+         os.remove(self.output)
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testIter(self):
+      das.write_csv(self.data, self.output, alias={"stream.Note": "n"})
+      it = das.iter_csv(self.output)
+      self.assertIsInstance(it, types.GeneratorType)
+      rv = list(it)
+      self.assertEqual(rv, self.data)
+      self.assertEqual(das.read_csv(self.output), self.data)
+      self.assertEqual(rv[1]._get_schema_type(), das.get_schema_type("stream.Note"))
+
+   def testIncremental(self):
+      das.write_csv(self.data, self.output)
+      with open(self.output, "ab") as f:
+         f.write("\nbroken")
+      it = das.iter_csv(self.output)
+      # Data are read before reaching the invalid line
+      self.assertEqual(next(it), self.data[0])
+      self.assertEqual(next(it), self.data[1])
+      with self.assertRaises(Exception):
+         list(it)
+      with self.assertRaises(Exception):
+         das.read_csv(self.output)
+
+   def testDelimiters(self):
+      for delimiter, newline in (("::", "\r\n"), ("\t", "|\n"), (",", "\n")):
+         das.write_csv(self.data, self.output, delimiter=delimiter, newline=newline)
+         self.assertEqual(list(das.iter_csv(self.output, delimiter=delimiter, newline=newline)), self.data)
+      # Files exported on Windows
+      das.write_csv(self.data, self.output, newline="\r\n")
+      self.assertEqual(das.read_csv(self.output), self.data)
+
+   def testEmpty(self):
+      self.assertEqual(list(das.iter_csv(self.output)), [])
+      with open(self.output, "wb") as f:
+         pass
+      self.assertEqual(list(das.iter_csv(self.output)), [])
+      das.write_csv([], self.output)
+      self.assertEqual(list(das.iter_csv(self.output)), [])
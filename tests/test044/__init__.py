@@ -0,0 +1,89 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+def make_mixin(schema_type, method, result):
+   # Mixin classes with the same name and module
+   class Helper(das.Mixin):
+      Inits = 0
+
+      @classmethod
+      def get_schema_type(klass):
+         return schema_type
+
+      def __init__(self, *args, **kwargs):
+         Helper.Inits += 1
+
+   setattr(Helper, method, lambda self: result)
+   return Helper
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      das.load_schemas()
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      pass
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   # Test functions
+
+   def testSameName(self):
+      m1 = make_mixin("bind.Point", "kind", "point")
+      m2 = make_mixin("bind.Size", "kind", "size")
+      self.assertEqual((m1.__name__, m1.__module__), (m2.__name__, m2.__module__))
+      p = das.mixin.bind(m1, das.make_default("bind.Point"))
+      s = das.mixin.bind(m2, das.make_default("bind.Size"))
+      self.assertEqual(p.kind(), "point")
+      self.assertEqual(s.kind(), "size")
+      self.assertIsNot(p.__class__, s.__class__)
+      self.assertEqual(das.get_bound_mixins(p), [m1])
+      self.assertEqual(das.get_bound_mixins(s), [m2])
+
+   def testCache(self):
+      m1 = make_mixin("bind.Point", "kind", "point")
+      m2 = make_mixin("bind.Point", "other", "other")
+      p1 = das.mixin.bind([m1, m2], das.make_default("bind.Point"))
+      p2 = das.mixin.bind([m1, m2], das.make_default("bind.Point"))
+      self.assertIs(p1.__class__, p2.__class__)
+      # Mixins are initialized on each bind
+      self.assertEqual((m1.Inits, m2.Inits), (2, 2))
+      # Already bound
+      das.mixin.bind(m1, p1)
+      self.assertEqual(m1.Inits, 2)
+      das.mixin.bind(m1, p1, reset=True)
+      self.assertEqual(m1.Inits, 3)
+      self.assertEqual(das.get_bound_mixins(p1), [m1])
+      self.assertFalse(hasattr(p1, "other"))
+      with self.assertRaises(das.SchemaTypeError):
+         das.mixin.bind(m1, das.make_default("bind.Size"))
+
+   def testRegister(self):
+      m1 = make_mixin("bind.Point", "kind", "point")
+      m2 = make_mixin("bind.Point", "other", "other")
+      das.register_mixins(m1)
+      pts = das.validate([{"x": 0.0, "y": 1.0}], "bind.Points")
+      self.assertEqual(das.get_bound_mixins(pts[0]), [m1])
+      # Registering mixins changes the classes of newly validated values
+      das.register_mixins(m2)
+      pts.append({"x": 1.0, "y": 2.0})
+      self.assertEqual(set(das.get_bound_mixins(pts[1])), set([m1, m2]))
+      self.assertEqual(pts[1].other(), "other")
+      self.assertEqual(pts[1].kind(), "point")
+      # Reloading schemas drops registered mixins
+      das.load_schemas()
+      p = das.make_default("bind.Point")
+      self.assertFalse(das.has_bound_mixins(p))
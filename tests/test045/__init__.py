@@ -0,0 +1,118 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      pass
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _type_name(self, value):
+      return das.get_schema_type_name(value._get_schema_type())
+
+   # Test functions
+
+   def testDispatch(self):
+      st = das.get_schema_type("dispatch.Value")
+      self.assertEqual(self._type_name(st.validate({"radius": 1.0})), "dispatch.Circle")
+      self.assertEqual(self._type_name(st.validate({"side": 1.0, "label": "a"})), "dispatch.Square")
+      self.assertEqual(self._type_name(st.validate({"title": "a"})), "dispatch.Named")
+      self.assertEqual(st.validate("one"), 1)
+      self.assertEqual(st.validate("three"), "three")
+      self.assertIsInstance(st.validate(1), long)
+      # Not an enum value
+      self.assertIsInstance(st.validate(3), float)
+      self.assertIsInstance(st.validate(3.5), float)
+      self.assertIsNone(st.validate(None))
+      self.assertIsInstance(das.validate(2, "dispatch.Number"), long)
+      self.assertIsInstance(das.validate(2.0, "dispatch.Number"), float)
+      # das types
+      c = st.validate({"radius": 1.0})
+      self.assertEqual(self._type_name(st.validate(c)), "dispatch.Circle")
+
+   def testErrors(self):
+      st = das.get_schema_type("dispatch.Value")
+      with self.assertRaises(das.ValidationError) as cm:
+         st.validate({"radius": 1.0, "side": 2.0})
+      msg = str(cm.exception)
+      self.assertTrue(msg.startswith("Value of type dict doesn't match any of the allowed types"))
+      for i in xrange(7):
+         self.assertTrue("Type %d error:" % i in msg)
+      self.assertTrue("Unknown key 'side'" in msg)
+      with self.assertRaises(das.ValidationError) as cm:
+         st.validate([1])
+      self.assertTrue("Type 6 error: Expected None, got list" in str(cm.exception))
+
+   def testCompatibility(self):
+      st = das.get_schema_type("dispatch.Value")
+      with self.assertRaises(das.ValidationError):
+         st.validate({"label": "a"})
+      with das.ValidationContext(compatible=True):
+         # Exact match first, then first alternative accepting the value in compatibility mode
+         self.assertEqual(self._type_name(st.validate({"side": 1.0})), "dispatch.Square")
+         self.assertEqual(self._type_name(st.validate({"label": "a"})), "dispatch.Circle")
+         self.assertEqual(st.validate("two"), 2)
+
+   def testCompatibilityKeys(self):
+      # Unknown keys and conflicting alias values are not accepted by any alternative
+      for s in ("{'x': 'q', 'y': 'r'}", "{'a': 'x'}"):
+         with self.assertRaises(das.ValidationError) as cm:
+            das.read_string(s, schema_type="dispatch.Compat", strict_schema=False)
+         self.assertTrue("doesn't match any of the allowed types" in str(cm.exception))
+      rv = das.read_string("{'b': 'q'}", schema_type="dispatch.Compat", strict_schema=False)
+      self.assertEqual(self._type_name(rv), "dispatch.A")
+      self.assertEqual(rv, {"a": 0, "b": "q"})
+      rv = das.read_string("{'y': 'q'}", schema_type="dispatch.Compat", strict_schema=False)
+      self.assertEqual(self._type_name(rv), "dispatch.C")
+
+   def testUnknownAlternative(self):
+      st = das.get_schema_type("dispatch.Partial")
+      self.assertEqual(st.validate(1), 1)
+      # Reported by the unknown alternative
+      with self.assertRaises(das.UnknownSchemaError):
+         st.validate("a")
+
+   def testRecursive(self):
+      st = das.get_schema_type("dispatch.Tree")
+      self.assertEqual(st.validate([1, [2, [3]], []]), [1, [2, [3]], []])
+      with self.assertRaises(das.ValidationError):
+         st.validate([1, ["a"]])
+
+   def testContainer(self):
+      doc = das.make_default("dispatch.Doc")
+      doc.values = [{"radius": 2.0}, "one", None]
+      doc.values.append({"side": 3.0})
+      doc.values[0] = 4.0
+      self.assertEqual(doc.values, [4.0, 1, None, {"side": 3.0}])
+      self.assertEqual(self._type_name(doc.values[3]), "dispatch.Square")
+      with self.assertRaises(das.ValidationError):
+         doc.values.append({"side": 3.0, "radius": 1.0})
+      doc.tree = [[1], 2]
+
+   def testModified(self):
+      st = das.get_schema_type("dispatch.Value")
+      self.assertEqual(self._type_name(st.validate({"radius": 1.0})), "dispatch.Circle")
+      # Alternatives are looked up again when schema types change
+      circle = das.get_schema_type("dispatch.Circle")
+      circle["side"] = das.schematypes.Optional(das.schematypes.Real())
+      circle._update_internals()
+      circle._reset_plan()
+      try:
+         self.assertEqual(self._type_name(st.validate({"side": 1.0, "radius": 1.0})), "dispatch.Circle")
+      finally:
+         das.load_schemas()
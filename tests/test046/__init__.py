@@ -0,0 +1,183 @@
+# -*- coding: utf8 -*-
+import os
+import re
+import sys
+import shutil
+import threading
+import unittest
+import multiprocessing.pool
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.outdir = os.path.join(self.testdir, "data")
+      if not os.path.isdir(self.outdir):
+         os.makedirs(self.outdir)
+      self.paths = []
+      for i in xrange(24):
+         doc = das.make_default("threads.Doc")
+         doc.title = "doc%d" % i
+         doc.items = [{"name": "item%d" % j, "count": j, "label": "none"} for j in xrange(20 + i % 7)]
+         doc.shape = ({"radius": float(i)} if i % 2 else {"side": float(i)})
+         path = os.path.join(self.outdir, "doc%d.das" % i)
+         das.write(doc, path)
+         if i % 3 != 0:
+            # Files saved using an older schema version without items 'label' field are read in
+            #   compatibility mode, others are read in strict mode
+            with open(path, "rb") as f:
+               content = f.read()
+            content = re.sub(r"\n *'label': 'none',", "", content)
+            if i % 3 == 1:
+               content = content.replace("# schema_version: 1.1", "# schema_version: 1.0")
+            with open(path, "wb") as f:
+               f.write(content)
+         self.paths.append(path)
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isdir(self.outdir):
+         shutil.rmtree(self.outdir)
+      if os.environ["DAS_SCHEMA_PATH"] != self.testdir:
+         os.environ["DAS_SCHEMA_PATH"] = self.testdir
+         das.load_schemas()
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _read(self, path, lazy=False):
+      try:
+         rv = das.read(path, lazy=lazy)
+         rv._validate()
+         return ("ok", rv)
+      except das.ValidationError, e:
+         return ("error", str(e))
+
+   def _value(self, label=None):
+      item = {"name": "a", "count": 1}
+      if label is not None:
+         item["label"] = label
+      return {"title": "doc", "items": [item], "shape": {"side": 1.0}}
+
+   def _read_all(self, lazy=False, workers=8):
+      # Switch threads as often as possible
+      interval = sys.getcheckinterval()
+      sys.setcheckinterval(1)
+      pool = multiprocessing.pool.ThreadPool(workers)
+      try:
+         return pool.map(lambda x: self._read(x, lazy=lazy), self.paths * 3, chunksize=1)
+      finally:
+         pool.close()
+         pool.join()
+         sys.setcheckinterval(interval)
+
+   # Test functions
+
+   def testRead(self):
+      expected = [self._read(x) for x in self.paths]
+      self.assertEqual(expected[1][1].items[0].label, "none")
+      self.assertTrue("Missing key 'label'" in expected[2][1])
+      self.assertEqual(expected[4][1].items[-1].label, "none")
+      for _ in xrange(2):
+         self.assertEqual(self._read_all(), expected * 3)
+
+   def testLazyRead(self):
+      expected = [self._read(x) for x in self.paths]
+      for _ in xrange(2):
+         self.assertEqual(self._read_all(lazy=True), expected * 3)
+
+   def testFirstLoad(self):
+      expected = [self._read(x) for x in self.paths]
+      # Schemas are loaded by the first lookup of any thread, others wait for it
+      os.environ["DAS_SCHEMA_PATH"] = self.outdir
+      das.load_schemas()
+      os.environ["DAS_SCHEMA_PATH"] = self.testdir
+      self.assertEqual(self._read_all(), expected * 3)
+
+   def testContext(self):
+      st = das.get_schema_type("threads.Doc")
+      with self.assertRaises(das.ValidationError):
+         st.validate(self._value())
+      self.assertEqual(st.validate(self._value(), context=das.ValidationContext(compatible=True)).items[0].label, "none")
+      self.assertEqual(das.validate(self._value(), "threads.Doc", context=das.ValidationContext(compatible=True)).items[0].label, "none")
+      with das.ValidationContext(compatible=True):
+         self.assertEqual(st.validate(self._value()).items[0].label, "none")
+         # Innermost context applies
+         with self.assertRaises(das.ValidationError):
+            st.validate(self._value(), context=das.ValidationContext())
+      with self.assertRaises(das.ValidationError):
+         st.validate(self._value())
+      with das.ValidationContext(lazy=True):
+         self.assertTrue(st.validate(self._value(label="a"))._is_lazy())
+      self.assertFalse(st.validate(self._value(label="a"))._is_lazy())
+      with das.ValidationContext(schema="threads"):
+         self.assertEqual(das.schematypes.SchemaType("Item").name, "threads.Item")
+      # Deprecated process wide schema name, used when no context is active
+      das.schematypes.TypeValidator.CurrentSchema = "threads"
+      try:
+         self.assertEqual(das.schematypes.current_context().schema, "threads")
+         self.assertEqual(das.schematypes.SchemaType("Item").name, "threads.Item")
+         with das.ValidationContext(schema="other"):
+            self.assertEqual(das.schematypes.SchemaType("Item").name, "other.Item")
+      finally:
+         das.schematypes.TypeValidator.CurrentSchema = ""
+
+   def testLookupDuringLoad(self):
+      # Lookups from other threads never see a partially loaded registry
+      das.get_schema_type("threads.Doc")
+      done = threading.Event()
+      errors = []
+
+      def run():
+         try:
+            for _ in xrange(200):
+               das.load_schemas(force=True)
+         finally:
+            done.set()
+
+      interval = sys.getcheckinterval()
+      sys.setcheckinterval(1)
+      thread = threading.Thread(target=run)
+      thread.start()
+      try:
+         while not done.is_set():
+            try:
+               das.get_schema_type("threads.Doc")
+            except das.UnknownSchemaError, e:
+               errors.append(e)
+      finally:
+         thread.join()
+         sys.setcheckinterval(interval)
+      self.assertEqual(errors, [])
+
+   def testThreadContext(self):
+      # Contexts only apply to the thread they are active in
+      st = das.get_schema_type("threads.Doc")
+      entered, done = threading.Event(), threading.Event()
+      results = []
+
+      def run():
+         with das.ValidationContext(compatible=True):
+            entered.set()
+            done.wait(10)
+            results.append(st.validate(self._value()).items[0].label)
+
+      thread = threading.Thread(target=run)
+      thread.start()
+      try:
+         entered.wait(10)
+         with self.assertRaises(das.ValidationError):
+            st.validate(self._value())
+      finally:
+         done.set()
+         thread.join()
+      self.assertEqual(results, ["none"])
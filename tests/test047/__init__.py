@@ -0,0 +1,166 @@
+# -*- coding: utf8 -*-
+import os
+import re
+import shutil
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.testdir = os.path.abspath(os.path.dirname(__file__))
+      self.outdir = os.path.join(self.testdir, "data")
+      if not os.path.isdir(self.outdir):
+         os.makedirs(self.outdir)
+      self.mixin = das.get_schema_module("many").ItemMixin
+      self.paths = []
+      for i in xrange(12):
+         doc = das.make_default("many.Doc")
+         doc.title = u"doc%d \xe9" % i
+         doc.items = [{"name": "item%d" % j, "count": j, "label": "none"} for j in xrange(i % 4)]
+         doc.shape = ({"radius": float(i)} if i % 2 else {"side": float(i)})
+         doc.tags = set(["t%d" % i, "all"])
+         doc.pair = (i, "p%d" % i)
+         doc.extra = {"w": i * 0.5}
+         path = self._path("doc%02d.das" % i)
+         das.write(doc, path)
+         if i % 3 == 1:
+            # Older schema version without items 'label' field (read in compatibility mode)
+            self._edit(path, lambda x: re.sub(r"\n *'label': 'none',", "", x.replace("# schema_version: 1.1", "# schema_version: 1.0")))
+         self.paths.append(path)
+      # Invalid value
+      self.paths.insert(3, self._path("invalid.das"))
+      das.write(doc, self.paths[3])
+      self._edit(self.paths[3], lambda x: x.replace("'count': 2L", "'count': -2L"))
+      # Syntax error
+      self.paths.insert(6, self._path("syntax.das"))
+      das.write(doc, self.paths[6])
+      self._edit(self.paths[6], lambda x: x.replace("'title':", "'title'::"))
+      # Unknown schema type
+      self.paths.insert(9, self._path("unknown.das"))
+      das.write(doc, self.paths[9])
+      self._edit(self.paths[9], lambda x: x.replace("# schema_type: many.Doc", "# schema_type: many.Unknown"))
+      # Missing file
+      self.paths.append(self._path("missing.das"))
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      if os.path.isdir(self.outdir):
+         shutil.rmtree(self.outdir)
+      if das.SchemaTypesRegistry.instance.addedpath:
+         das.SchemaTypesRegistry.instance.addedpath = ""
+         das.load_schemas()
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def _path(self, name):
+      return os.path.join(self.outdir, name)
+
+   def _edit(self, path, func):
+      with open(path, "rb") as f:
+         content = f.read()
+      with open(path, "wb") as f:
+         f.write(func(content))
+
+   def _expected(self, paths=None):
+      rv = []
+      for path in (self.paths if paths is None else paths):
+         try:
+            rv.append((path, das.read(path), None))
+         except Exception, e:
+            rv.append((path, None, e))
+      return rv
+
+   def _check(self, results, expected):
+      self.assertEqual(len(results), len(expected))
+      for (path, data, error), (epath, edata, eerror) in zip(results, expected):
+         self.assertEqual(path, epath)
+         self.assertEqual(data, edata, path)
+         self.assertIs(type(error), type(eerror), path)
+         self.assertEqual(str(error), str(eerror))
+         if eerror is None:
+            self.assertIs(data._get_schema_type(), edata._get_schema_type())
+            self.assertIs(type(data.items), das.types.Sequence)
+            self.assertIs(type(data.pair), das.types.Tuple)
+            self.assertIs(type(data.tags), das.types.Set)
+            for item in data.items:
+               self.assertIsInstance(item, self.mixin)
+               self.assertEqual(item.total(), item.count * 2)
+            # Values are linked to their parent for global validation
+            with self.assertRaises(das.ValidationError):
+               data.shape = {"side": 1.0, "radius": 1.0}
+
+   # Test functions
+
+   def testErrors(self):
+      results = self._expected()
+      errors = dict((os.path.basename(path), error) for path, _, error in results if error is not None)
+      self.assertEqual(sorted(errors.keys()), ["invalid.das", "missing.das", "syntax.das", "unknown.das"])
+      self.assertIsInstance(errors["invalid.das"], das.ValidationError)
+      self.assertIsInstance(errors["unknown.das"], das.UnknownSchemaError)
+      # (SyntaxError with 'eval' parse engine)
+      self.assertIsInstance(errors["syntax.das"], (das.ParseError, SyntaxError))
+      self.assertIsInstance(errors["missing.das"], (das.ParseError, SyntaxError))
+      self.assertEqual(results[2][1].items[1].label, "none")
+
+   def testSequential(self):
+      self._check(list(das.read_many(self.paths, workers=1)), self._expected())
+
+   def testThreads(self):
+      expected = self._expected()
+      self._check(list(das.read_many(self.paths, workers=3)), expected)
+      results = sorted(das.read_many(self.paths, workers=3, ordered=False))
+      self._check(results, sorted(expected))
+
+   def testProcesses(self):
+      expected = self._expected()
+      self._check(list(das.read_many(self.paths, workers=3, mode="process")), expected)
+      results = sorted(das.read_many(self.paths, workers=3, mode="process", ordered=False))
+      self._check(results, sorted(expected))
+      # Exception attributes are kept
+      syntax = [error for path, _, error in results if path.endswith("syntax.das")][0]
+      for attr in ("line", "column", "lineno", "offset"):
+         self.assertEqual(getattr(syntax, attr, None), getattr(expected[6][2], attr, None))
+
+   def testAddedPaths(self):
+      das.load_schemas(paths=[os.path.join(self.testdir, "extra")])
+      thing = das.make_default("manyextra.Thing")
+      thing.name = "thing"
+      path = self._path("thing.das")
+      das.write(thing, path)
+      for mode in ("thread", "process"):
+         results = list(das.read_many([path, self.paths[0]], workers=2, mode=mode))
+         self.assertEqual([x[2] for x in results], [None, None])
+         self.assertEqual(results[0][1], thing)
+         self.assertIs(results[0][1]._get_schema_type(), das.get_schema_type("manyextra.Thing"))
+
+   def testUnnamedSchemaType(self):
+      # Data schema type is an Or alternative
+      paths = [self._path("values%d.das" % i) for i in xrange(2)]
+      for path, value in zip(paths, ("[1, 2]", "'one'")):
+         with open(path, "wb") as f:
+            f.write("# schema_type: many.Values\n%s\n" % value)
+      rvs = [[x[1] for x in das.read_many(paths, workers=2, mode=mode)] for mode in ("thread", "process")]
+      self.assertEqual(rvs[0], [[1, 2], "one"])
+      self.assertEqual(rvs[1], rvs[0])
+      self.assertEqual([type(x) for x in rvs[1]], [type(x) for x in rvs[0]])
+      self.assertIs(type(rvs[1][0]), das.types.Sequence)
+      self.assertIs(rvs[1][0]._get_schema_type(), rvs[0][0]._get_schema_type())
+
+   def testSchemaType(self):
+      paths = self.paths[:3]
+      for mode in ("thread", "process"):
+         for schema_type in ("many.Doc", das.get_schema_type("many.Doc")):
+            results = list(das.read_many(paths, workers=2, mode=mode, schema_type=schema_type, ignore_meta=True, strict_schema=False))
+            self.assertEqual([x[1] for x in results], [x[1] for x in self._expected(paths)])
+      with self.assertRaises(Exception):
+         list(das.read_many(paths, mode="other"))
@@ -0,0 +1,15 @@
+import das # pylint: disable=import-error
+
+class ItemMixin(das.Mixin):
+   @classmethod
+   def get_schema_type(klass):
+      return "many.Item"
+
+   def __init__(self, *args, **kwargs):
+      super(ItemMixin, self).__init__(*args, **kwargs)
+
+   def total(self):
+      return self.count * 2
+
+
+das.register_mixins(ItemMixin)
@@ -0,0 +1,132 @@
+# -*- coding: utf8 -*-
+import os
+import unittest
+import das # pylint: disable=import-error
+
+
+class TestCase(unittest.TestCase):
+   @classmethod
+   def setUpClass(cls):
+      os.environ["DAS_SCHEMA_PATH"] = os.path.abspath(os.path.dirname(__file__))
+
+   def setUp(self):
+      self.addCleanup(self.cleanUp)
+      self.mod = das.get_schema_module("choices")
+      self.calls = self.mod.Calls
+      for name in ("Names", "Types", "Timed"):
+         das.get_schema_type("choices.%s" % name).invalidate_choices()
+      self.calls["names"] = 0
+      self.calls["types"] = 0
+      self.timemod = das.schematypes.time
+      self.now = 1000.0
+
+   def tearDown(self):
+      pass
+
+   def cleanUp(self):
+      self.mod.Names = ["chair", "table", u"caf\xe9"]
+      das.schematypes.time = self.timemod
+
+   @classmethod
+   def tearDownClass(cls):
+      del(os.environ["DAS_SCHEMA_PATH"])
+
+   def time(self):
+      # Replaces time module in das.schematypes (see testTTL)
+      return self.now
+
+   # Test functions
+
+   def testStatic(self):
+      st = das.get_schema_type("choices.Static")
+      self.assertEqual(st.validate("red"), "red")
+      self.assertEqual(st.validate(u"bleu \xe9"), u"bleu \xe9")
+      self.assertEqual(st._expand_choices(), ["red", "green", u"bleu \xe9"])
+      self.assertEqual(st._expand_choices(asSet=True), frozenset(["red", "green", u"bleu \xe9"]))
+      with self.assertRaises(das.ValidationError) as cm:
+         st.validate("blue")
+      self.assertEqual(str(cm.exception), "String value must be on of ['red', 'green', u'bleu \\xe9'], got 'blue'")
+      # Choices can be replaced
+      st = st.copy()
+      st.choices = ["blue"]
+      self.assertEqual(st.validate("blue"), "blue")
+      with self.assertRaises(das.ValidationError):
+         st.validate("red")
+      # In place modifications require invalidate_choices
+      st.choices.append("red")
+      with self.assertRaises(das.ValidationError):
+         st.validate("red")
+      st.invalidate_choices()
+      self.assertEqual(st.validate("red"), "red")
+      st.choices[0] = "cyan"
+      self.assertEqual(st.validate("blue"), "blue")
+      st.invalidate_choices()
+      self.assertEqual(st.validate("cyan"), "cyan")
+      with self.assertRaises(das.ValidationError):
+         st.validate("blue")
+      self.assertEqual(st._expand_choices(asSet=True), frozenset(["cyan", "red"]))
+      st.choices.pop()
+      st.invalidate_choices()
+      with self.assertRaises(das.ValidationError):
+         st.validate("red")
+
+   def testPositional(self):
+      st = das.get_schema_type("choices.Described")
+      self.assertEqual(st.description, "Letter")
+      self.assertEqual(st.get_property("unit"), "none")
+      self.assertEqual(st.choices_ttl, None)
+      self.assertEqual(st.validate("a"), "a")
+
+   def testCached(self):
+      assets = das.validate(["chair", "table", u"caf\xe9"] * 1000, "choices.Assets")
+      self.assertEqual(len(assets), 3000)
+      self.assertEqual(self.calls["names"], 1)
+      with self.assertRaises(das.ValidationError):
+         das.validate("lamp", "choices.Names")
+      self.assertEqual(self.calls["names"], 1)
+
+   def testInvalidate(self):
+      st = das.get_schema_type("choices.Names")
+      timed = das.get_schema_type("choices.Timed")
+      st.validate("chair")
+      timed.validate("chair")
+      self.mod.Names = ["chair", "lamp"]
+      with self.assertRaises(das.ValidationError):
+         st.validate("lamp")
+      st.invalidate_choices()
+      self.assertEqual(st.validate("lamp"), "lamp")
+      self.assertEqual(self.calls["names"], 3)
+      # All String schema types
+      self.mod.Names = ["chair", "desk"]
+      das.schematypes.String.InvalidateAllChoices()
+      self.assertEqual(st.validate("desk"), "desk")
+      self.assertEqual(timed.validate("desk"), "desk")
+      self.assertEqual(self.calls["names"], 5)
+
+   def testTTL(self):
+      asset = das.make_default("choices.Asset")
+      calls = self.calls["types"]
+      for _ in xrange(5):
+         asset.type = "set"
+      # Not cached by default
+      self.assertEqual(self.calls["types"], calls + 5)
+      das.schematypes.time = self
+      timed = das.get_schema_type("choices.Timed")
+      timed.validate("chair")
+      calls = self.calls["names"]
+      self.mod.Names = ["lamp"]
+      self.now += 59.0
+      with self.assertRaises(das.ValidationError):
+         timed.validate("lamp")
+      self.now += 1.0
+      self.assertEqual(timed.validate("lamp"), "lamp")
+      self.assertEqual(timed.validate("lamp"), "lamp")
+      self.assertEqual(self.calls["names"], calls + 1)
+
+   def testSchemaType(self):
+      st = das.get_schema_type("choices.Timed")
+      st.validate("chair")
+      self.assertEqual(repr(st), "String(choices=asset_names, strict=True, choices_ttl=60)")
+      self.assertEqual(st.copy().choices_ttl, 60)
+      # Cached values are not pickled
+      self.assertFalse("_choices_cache" in st.__getstate__())
@@ -0,0 +1,18 @@
+# -*- coding: utf8 -*-
+import das # pylint: disable=import-error
+
+__all__ = ["asset_names", "asset_types"]
+
+Calls = {"names": 0, "types": 0}
+
+Names = ["chair", "table", u"caf\xe9"]
+
+
+def asset_names():
+   Calls["names"] += 1
+   return Names
+
+
+def asset_types():
+   Calls["types"] += 1
+   return ["prop", "set"]